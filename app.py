@@ -1,14 +1,94 @@
-from flask import Flask, render_template
-from data_fetching.fetch_openalex import fetch_latest_research_papers
-from data_fetching.fetch_world_bank import fetch_gender_equality_data, fetch_gender_equality_data_for_neighbors
+import os
+import time
+
+import click
+from flask import Flask, Response, abort, jsonify, redirect, render_template, request, url_for
+from data_fetching import cache
+from data_fetching.cache import SOURCE_TTLS
+from data_fetching.country_metadata import CountryMetadataUnavailable, get_metadata
+from data_fetching.fetch_world_bank import fetch_country_classifications, get_country_names, get_neighboring_country_codes
+from data_fetching.history import get_history_versions, get_trend, load_indicator_store, sync_indicator_history
+from data_fetching.ingest_wdi import ingest_wdi_archive
+from data_fetching.named_places import fetch_gender_named_counts, fetch_gender_naming_breakdown
+from data_fetching.research_corpus import fetch_latest_research_papers
 # from data_fetching.fetch_dbpedia import fetch_ukrainian_gender_activists
-from data_fetching.fetch_wikidata import fetch_gender_named_counts
+from data_processing.country_pool import CountryPool
+from data_processing.derived_metrics import DerivedMetrics, Gap, Largest, RegionalComparison, Rank, Text, Value, nest
+from data_processing.group_aggregates import POPULATION_INDICATOR, GroupAggregator, define_country_groups
+from data_processing.research_index import get_research_index
+from data_processing.snapshot import (
+    get_current_snapshot,
+    refresh_section,
+    restore_snapshot,
+    start_snapshot_refresher,
+    wait_for_section,
+)
+from monitoring.metrics import (
+    SECTION_LAST_BUILD_SECONDS,
+    finish_request_timing,
+    instrument,
+    record_request_timing,
+    render_metrics,
+    start_request_timing,
+    timed,
+)
+from serving.http_cache import cache_control, make_etag, versioned_response
+from serving.page_cache import PageCache
+from serving.static_export import StaticExport, directory_digests, file_digest
 
 app = Flask(__name__)
 
 # Main country to analyze
 MAIN_COUNTRY = "Ukraine"
-MAIN_COUNTRY_CODE = "UA"
+MAIN_COUNTRY_CODE = "UKR"  # ISO3, as used by REST Countries borders and World Bank bulk data
+MAIN_COUNTRY_ISO2 = "UA"  # For the flag, shown even before the country metadata is loaded
+
+# Seconds the browser waits before asking again for a section that is still loading
+SECTION_RETRY_AFTER = 3
+# Seconds before asking again for a section whose source is currently unavailable
+SECTION_UNAVAILABLE_RETRY_AFTER = 30
+
+# Seconds a page request may wait for sections before rendering without them
+REQUEST_DEADLINE = float(os.environ.get("TRACKER_REQUEST_DEADLINE", 1))
+
+# Seconds each source may take to build its sections before they are shown as unavailable
+# (the last good version is kept if there is one); a late result is still shown once it arrives
+SOURCE_BUDGETS = {
+    "world_bank": float(os.environ.get("TRACKER_BUDGET_WORLD_BANK", 30)),
+    "gender_naming": float(os.environ.get("TRACKER_BUDGET_WIKIDATA", 20)),
+    "research": float(os.environ.get("TRACKER_BUDGET_OPENALEX", 15)),
+    "country_groups": float(os.environ.get("TRACKER_BUDGET_COUNTRY_GROUPS", 60)),
+}
+
+# Megabytes of rendered pages and section responses kept in memory
+PAGE_CACHE_MB = float(os.environ.get("TRACKER_PAGE_CACHE_MB", 64))
+# Seconds a country page is cached when some of its countries have no stored data yet (e.g., the World Bank was down)
+INCOMPLETE_PAGE_MAX_AGE = 60
+
+# Version of the deployed code; by default a digest of the app's Python sources
+APP_VERSION = os.environ.get("TRACKER_APP_VERSION") or make_etag(
+    [("app.py", file_digest(os.path.join(app.root_path, "app.py")))] + [
+        (package, directory_digests(os.path.join(app.root_path, package), (".py",)))
+        for package in ("data_fetching", "data_processing", "monitoring", "serving")
+    ]
+)
+# Part of every response version, so a deployment changing the templates or the code never gets a
+# 304 (or a cached copy) of a page rendered by the previous one, even if the data did not change
+RENDER_VERSION = make_etag((APP_VERSION, directory_digests(os.path.join(app.root_path, app.template_folder))))
+
+def response_version(dataset_version):
+    """Combine the dataset version of a response with the version of the code and templates rendering it."""
+    return RENDER_VERSION, dataset_version
+
+# Rendered and compressed pages and section responses, each kept until its dataset version changes
+page_cache = PageCache(int(PAGE_CACHE_MB * 1024 * 1024), max_age=SOURCE_TTLS["world_bank"])
+
+# Localities with the most named places shown in the gender naming section
+GENDER_NAMING_TOP_LOCALITIES = 10
+
+# Papers shown in the Research Explorer before searching, and at most per search
+RESEARCH_SECTION_SIZE = 15
+RESEARCH_SEARCH_LIMIT = 50
 
 # Indicator codes
 INDICATORS = {
@@ -84,238 +164,732 @@ indicator_colors = {
 }
 
 
-def calculate_quick_overview_metrics(country_data, main_country):
+# Derived metrics of the Quick Overview section, computed once per dataset version
+OVERVIEW_METRICS = DerivedMetrics([
+    Value("female_population.value", "female_population"),
+    Rank("female_population.ranking", "female_population"),
+    Value("labor_force_participation.female", "labor_force_participation_female"),
+    Value("labor_force_participation.male", "labor_force_participation_male"),
+    Gap("labor_force_participation.gap", "labor_force_participation_female", "labor_force_participation_male"),
+    Value("women_in_parliament.value", "women_in_parliament"),
+    RegionalComparison("women_in_parliament.regional_position", "women_in_parliament",
+                       above="Above Regional Average", below="Below Regional Average"),
+    Value("unemployment_rate.female", "unemployment_rate_female"),
+    Value("unemployment_rate.male", "unemployment_rate_male"),
+    Gap("unemployment_rate.gap", "unemployment_rate_female", "unemployment_rate_male"),
+    Text("unemployment_rate.trend", ["unemployment_rate.gap"],
+         lambda gap: "Higher unemployment among women" if gap > 0 else "Lower unemployment among women"),
+    Largest("sector_employment.most_common", (
+        ("Agriculture", "employment_in_agriculture_female"),
+        ("Industry", "employment_in_industry_female"),
+        ("Services", "employment_in_services_female"),
+    )),
+    Text("sector_employment.comparison_to_region", ["sector_employment.most_common"],
+         lambda sector: f"More women work in {sector} compared to other sectors regionally."),
+    Value("wage_and_salaried_workers.female", "wage_and_salaried_workers_female"),
+    Text("wage_and_salaried_workers.context", ["wage_and_salaried_workers.female"],
+         lambda female: f"{female}% of women are in salaried positions."),
+    Value("maternal_mortality_comparison.value", "maternal_mortality_ratio"),
+    RegionalComparison("maternal_mortality_comparison.comparison_to_region", "maternal_mortality_ratio",
+                       above="Higher than region", below="Lower than region"),
+    Value("youth_literacy_gap.female", "literacy_rate_female_youth"),
+    Value("youth_literacy_gap.male", "literacy_rate_male_youth"),
+    Gap("youth_literacy_gap.gap", "literacy_rate_female_youth", "literacy_rate_male_youth"),
+    Value("self_employment.female", "self_employed_female"),
+    Value("self_employment.male", "self_employed_male"),
+    Gap("self_employment.gap", "self_employed_female", "self_employed_male"),
+    Text("self_employment.context", ["self_employment.gap"],
+         lambda gap: f"Self-employment is higher among {'women' if gap > 0 else 'men'}."),
+    Value("financial_access.value", "account_ownership_female"),
+    Text("financial_access.context", ["financial_access.value"],
+         lambda value: f"Percentage of women with bank accounts: {value}%"),
+    Value("vulnerable_employment.female", "vulnerable_employment_female"),
+    Value("vulnerable_employment.male", "vulnerable_employment_male"),
+    Gap("vulnerable_employment.gap", "vulnerable_employment_female", "vulnerable_employment_male"),
+    Text("vulnerable_employment.context", ["vulnerable_employment.gap"],
+         lambda gap: f"Women are {'more' if gap > 0 else 'less'} likely to have vulnerable employment than men."),
+])
+
+# Indicators the overview compares against the country's groups, and groups every country is compared with
+# besides its World Bank region and income level and the custom groups it belongs to
+GROUP_COMPARISON_INDICATORS = [
+    "women_in_parliament",
+    "labor_force_participation_female",
+    "unemployment_rate_female",
+    "maternal_mortality_ratio",
+]
+BENCHMARK_GROUPS = ["EU27"]
+
+
+@instrument()
+def calculate_quick_overview_metrics(store, main_country):
     """
     Calculate analytical metrics for the Quick Overview section, comparing Ukraine vs. regional averages.
-    :param country_data: Dictionary with data for all countries.
+    Only metrics whose indicators changed since the previous call are recomputed (see OVERVIEW_METRICS).
+    :param store: IndicatorStore with data for all countries.
     :param main_country: Main country's name (e.g., "Ukraine").
     :return: Dictionary with analytical metrics for the Quick Overview section.
     """
-    main_country_data = country_data.get(main_country, {})
-    
-    # Calculate regional averages for indicators
-    regional_totals = {key: 0 for key in INDICATORS.keys()}
-    regional_counts = {key: 0 for key in INDICATORS.keys()}
-    
-    for country, data in country_data.items():
-        if country != main_country:
-            for key, value in data.items():
-                if value != "N/A":
-                    regional_totals[key] += value
-                    regional_counts[key] += 1
-
-    regional_averages = {
-        key: (regional_totals[key] / regional_counts[key] if regional_counts[key] > 0 else None)
-        for key in INDICATORS.keys()
+    return nest(OVERVIEW_METRICS.compute(store, main_country))
+
+@instrument()
+def generate_world_bank_insights(store):
+    """Generate highlights based on World Bank data."""
+    # Calculate highlights, skipping countries without data
+    top_female_population_country, top_female_population = store.extreme("female_population")
+    top_parliament_country, top_parliament = store.extreme("women_in_parliament")
+    lowest_labor_force_country, lowest_labor_force = store.extreme("labor_force_participation_female", highest=False)
+
+    return {
+        "top_female_population_country": top_female_population_country,
+        "top_female_population": top_female_population,
+        "top_parliament_country": top_parliament_country,
+        "top_parliament": top_parliament,
+        "lowest_labor_force_country": lowest_labor_force_country,
+        "lowest_labor_force": lowest_labor_force
     }
 
-    metrics = {
-        "female_population": {
-            "value": main_country_data.get("female_population", "N/A"),
-            "difference": None,
-            "ranking": None,
-        },
-        "labor_force_participation": {
-            "female": main_country_data.get("labor_force_participation_female", "N/A"),
-            "male": main_country_data.get("labor_force_participation_male", "N/A"),
-            "gap": None,
-        },
-        "women_in_parliament": {
-            "value": main_country_data.get("women_in_parliament", "N/A"),
-            "regional_position": None,
-        },
-        "unemployment_rate": {
-            "female": main_country_data.get("unemployment_rate_female", "N/A"),
-            "male": main_country_data.get("unemployment_rate_male", "N/A"),
-            "trend": None,
-        },
-        "sector_employment": {
-            "most_common": None, 
-            "comparison_to_region": None,
-        },
-        "wage_and_salaried_workers": {
-            "female": main_country_data.get("wage_and_salaried_workers_female", "N/A"),
-            "context": None,
-        },
-        "maternal_mortality_comparison": {
-            "value": main_country_data.get("maternal_mortality_ratio", "N/A"),
-            "comparison_to_region": (
-                "Higher than region" if main_country_data.get("maternal_mortality_ratio", 0) > regional_averages.get("maternal_mortality_ratio", float('inf')) else "Lower than region"
-            ),
-        },
-        "youth_literacy_gap": {
-            "female": main_country_data.get("literacy_rate_female_youth", "N/A"),
-            "male": main_country_data.get("literacy_rate_male_youth", "N/A"),
-            "gap": (
-                main_country_data.get("literacy_rate_female_youth", 0) - main_country_data.get("literacy_rate_male_youth", 0)
-            ),
-        },
-        "self_employment": {
-            "female": main_country_data.get("self_employed_female", "N/A"),
-            "male": main_country_data.get("self_employed_male", "N/A"),
-            "context": (
-                f"Self-employment is higher among {'women' if main_country_data.get('self_employed_female', 0) > main_country_data.get('self_employed_male', 0) else 'men'}."
-            ),
-        },
-        "financial_access": {
-            "value": main_country_data.get("account_ownership_female", "N/A"),
-            "context": f"Percentage of women with bank accounts: {main_country_data.get('account_ownership_female', 'N/A')}%",
-        },
-        "vulnerable_employment": {
-            "female": main_country_data.get("vulnerable_employment_female", "N/A"),
-            "male": main_country_data.get("vulnerable_employment_male", "N/A"),
-            "context": (
-                f"Women are {'more' if main_country_data.get('vulnerable_employment_female', 0) > main_country_data.get('vulnerable_employment_male', 0) else 'less'} likely to have vulnerable employment than men."
-            ),
-        },
+
+@instrument()
+def compare_with_groups(group_aggregates, country_code, country_values):
+    """
+    Compare a country's latest values with the precomputed statistics of its groups and the BENCHMARK_GROUPS.
+
+    :param group_aggregates: GroupAggregates, or None while the groups have not been computed yet.
+    :param country_code: ISO3 code of the country.
+    :param country_values: Dictionary mapping indicator keys to the country's latest values ("N/A" if missing).
+    :return: Dictionary with the groups compared with ('groups', with their number of 'members') and, for every
+             GROUP_COMPARISON_INDICATORS indicator, the country's value and every group's statistics, including
+             the number of members with data ('indicators'), or None if there are no groups.
+    """
+    if group_aggregates is None:
+        return None
+    group_ids = [
+        group_id
+        for group_id in dict.fromkeys([*group_aggregates.groups_of(country_code), *BENCHMARK_GROUPS])
+        if group_id in group_aggregates.groups
+    ]
+    groups = [group_aggregates.groups[group_id] for group_id in group_ids]
+
+    indicators = []
+    for indicator in GROUP_COMPARISON_INDICATORS:
+        value = country_values.get(indicator)
+        statistics = []
+        for group in groups:
+            summary = group_aggregates.summary(group.id, indicator)
+            mean = summary["mean"]
+            position = None if mean is None or not isinstance(value, (int, float)) else ("above" if value > mean else "below")
+            statistics.append({**summary, "members_with_data": int(summary["count"] or 0), "position": position})
+        indicators.append({
+            "indicator": indicator,
+            "label": indicator_labels[indicator],
+            "value": value,
+            "groups": statistics,
+        })
+    return {
+        "groups": [{"id": group.id, "name": group.name, "members": len(group.countries)} for group in groups],
+        "indicators": indicators,
     }
 
-    # Calculate ranking for female population
-    regional_female_populations = {
-        country: data.get("female_population", 0)
-        for country, data in country_data.items()
-        if data.get("female_population", "N/A") != "N/A"
+
+@instrument()
+def fetch_indicator_store():
+    """Bring the indicator history of the main country and its neighbors up to date and load it."""
+    neighbor_codes = get_neighboring_country_codes(MAIN_COUNTRY_CODE)
+    country_names = {MAIN_COUNTRY_CODE: MAIN_COUNTRY, **get_country_names(neighbor_codes)}
+
+    # Only years newer than the stored history are requested
+    sync_indicator_history(list(country_names), INDICATORS)
+    return load_indicator_store(country_names, INDICATORS)
+
+def build_world_bank_section():
+    """Fetch the World Bank data and compute the overview metrics and highlights from it."""
+    indicator_store = fetch_indicator_store()
+    return {
+        "country_data": indicator_store.to_country_data(),
+        "indicator_store": indicator_store,
+        # Calculate Quick Overview Metrics
+        "quick_overview_metrics": calculate_quick_overview_metrics(indicator_store, MAIN_COUNTRY),
+        # Generate insights and highlights
+        "world_bank_highlights": generate_world_bank_insights(indicator_store),
     }
-    metrics["female_population"]["ranking"] = (
-        sorted(regional_female_populations, key=regional_female_populations.get, reverse=True).index(main_country) + 1
-    )
 
-    # Calculate gender labor force participation gap
-    if metrics["labor_force_participation"]["female"] != "N/A" and metrics["labor_force_participation"]["male"] != "N/A":
-        metrics["labor_force_participation"]["gap"] = (
-            metrics["labor_force_participation"]["female"] - metrics["labor_force_participation"]["male"]
-        )
+# Indicator history of the countries loaded so far, shared by all country pages and the country groups
+# (which weight their means by population)
+country_pool = CountryPool({**INDICATORS, POPULATION_INDICATOR[0]: POPULATION_INDICATOR[1]})
+
+# Statistics of the country groups, each recomputed only when its countries' data changed
+group_aggregator = GroupAggregator(country_pool, INDICATORS)
+
+@instrument()
+def build_country_groups_section():
+    """Sync the history of every grouped country and precompute the statistics of all groups."""
+    classifications = fetch_country_classifications()
+    if classifications is None:
+        raise Exception("World Bank country classifications are not available")
+    return {"group_aggregates": group_aggregator.update(define_country_groups(classifications))}
+
+# Every data source is refreshed in the background on its own, so a slow one never holds back the others
+SNAPSHOT_SECTION_BUILDERS = {
+    # Fetch main and neighboring countries' data
+    "world_bank": build_world_bank_section,
+    # Sync the streets/buildings named after people and load their precomputed counts by gender
+    "gender_naming": lambda: {
+        "gender_named_counts": fetch_gender_named_counts(),
+        "gender_naming_breakdown": fetch_gender_naming_breakdown(),
+    },
+    # Sync the corpus of research papers and load it
+    "research": lambda: {"research_papers": fetch_latest_research_papers()},
+    # Precompute the statistics of the EU, World Bank regions, income levels and custom groups
+    "country_groups": build_country_groups_section,
+    # Fetch activists from DBPedia
+    # "activists": lambda: {"activists": fetch_ukrainian_gender_activists()},
+}
+
+# Snapshot section (data source) each page section is built from
+SECTION_SOURCES = {
+    "overview": "world_bank",
+    "comparison": "world_bank",
+    "gender_naming": "gender_naming",
+    "research": "research",
+}
 
-    # Analyze women in parliament for regional position
-    if metrics["women_in_parliament"]["value"] != "N/A":
-        above_region = metrics["women_in_parliament"]["value"] > regional_averages["women_in_parliament"]
-        metrics["women_in_parliament"]["regional_position"] = (
-            "Above Regional Average" if above_region else "Below Regional Average"
+# Snapshot sections a page section also reads from, so its responses change with them too
+SECTION_EXTRA_SOURCES = {
+    "overview": ["country_groups"],
+    "comparison": ["country_groups"],
+}
+
+def section_sources(section):
+    """Return every snapshot section a page section is built from, its own source first."""
+    return [SECTION_SOURCES[section], *SECTION_EXTRA_SOURCES.get(section, [])]
+
+def world_bank_section_data(section, country_data, quick_overview_metrics, world_bank_highlights, group_comparisons=None):
+    """Return the data of the 'overview' or 'comparison' section of any country's dashboard."""
+    if section == "overview":
+        return {
+            "quick_overview_metrics": quick_overview_metrics,
+            "country_count": len(country_data),
+            "group_comparisons": group_comparisons,
+        }
+    return {
+        "data": country_data,
+        "world_bank_highlights": world_bank_highlights,
+        "group_comparisons": group_comparisons,
+        "indicator_labels": indicator_labels,
+        "indicator_colors": indicator_colors,
+    }
+
+def get_section_data(section, snapshot):
+    """
+    Collect the data of one dashboard section from a snapshot.
+
+    :param section: Name of the page section ('overview', 'comparison', 'gender_naming' or 'research').
+    :param snapshot: DashboardSnapshot to read from.
+    :return: JSON-serializable dictionary, or None if the section's source has not been fetched yet.
+    """
+    if not snapshot.is_ready(SECTION_SOURCES[section]):
+        return None
+    if section in ("overview", "comparison"):
+        group_comparisons = compare_with_groups(
+            snapshot.group_aggregates if snapshot.is_ready("country_groups") else None,
+            MAIN_COUNTRY_CODE,
+            snapshot.country_data.get(MAIN_COUNTRY, {}),
+        )
+        return world_bank_section_data(
+            section, snapshot.country_data, snapshot.quick_overview_metrics, snapshot.world_bank_highlights,
+            group_comparisons,
         )
+    if section == "gender_naming":
+        breakdown = snapshot.gender_naming_breakdown or {}
+        return {
+            "gender_named_counts": snapshot.gender_named_counts,
+            "naming_regions": breakdown.get("region", []),
+            "naming_localities": breakdown.get("locality", [])[:GENDER_NAMING_TOP_LOCALITIES],
+            "naming_decades": breakdown.get("decade", []),
+        }
+    if section == "research":
+        research_index = get_research_index(snapshot.research_papers)
+        return {
+            "research_papers": snapshot.research_papers[:RESEARCH_SECTION_SIZE],
+            "research_paper_count": len(snapshot.research_papers),
+            "research_categories": research_index.top_categories(),
+        }
+    return None
+
+def render_section(section, snapshot):
+    """
+    Render the HTML of one dashboard section.
 
-    # Unemployment trend analysis
-    if metrics["unemployment_rate"]["female"] != "N/A" and metrics["unemployment_rate"]["male"] != "N/A":
-        if metrics["unemployment_rate"]["female"] > metrics["unemployment_rate"]["male"]:
-            metrics["unemployment_rate"]["trend"] = "Higher unemployment among women"
-        else:
-            metrics["unemployment_rate"]["trend"] = "Lower unemployment among women"
-
-    # Most common sector for female employment
-    sectors = {
-        "Agriculture": main_country_data.get("employment_in_agriculture_female", 0),
-        "Industry": main_country_data.get("employment_in_industry_female", 0),
-        "Services": main_country_data.get("employment_in_services_female", 0),
+    :return: The section's HTML, a notice if its source is unavailable (or in a static export, which
+             cannot load it later), or None if it is still loading.
+    """
+    section_data = get_section_data(section, snapshot)
+    if section_data is not None:
+        with timed(f"render_{section}"):
+            return render_template(f"sections/{section}.html", **section_data)
+    if snapshot.is_missing(SECTION_SOURCES[section]) or app.config.get("STATIC_EXPORT"):
+        return render_template("sections/unavailable.html")
+    return None
+
+def pending_section_response(section):
+    """Answer a section endpoint with 202 while the section's data is being built, asking the browser to retry."""
+    return jsonify({"section": section, "status": "pending"}), 202, {
+        "Retry-After": str(SECTION_RETRY_AFTER),
+        "Cache-Control": "no-store",
     }
-    metrics["sector_employment"]["most_common"] = max(sectors, key=sectors.get)
-    metrics["sector_employment"]["comparison_to_region"] = (
-        f"More women work in {metrics['sector_employment']['most_common']} compared to other sectors regionally."
+
+def section_response(section):
+    """Answer a section endpoint with the section's data and rendered HTML, or 202 while it is loading."""
+    start_snapshot_refresher(SNAPSHOT_SECTION_BUILDERS, SOURCE_BUDGETS)
+    snapshot = get_current_snapshot()
+    section_data = get_section_data(section, snapshot)
+    if section_data is None and snapshot.is_missing(SECTION_SOURCES[section]):
+        # The page keeps asking, so the section appears as soon as its source responds again
+        return jsonify({
+            "section": section,
+            "status": "unavailable",
+            "html": render_template("sections/unavailable.html"),
+        }), 200, {"Retry-After": str(SECTION_UNAVAILABLE_RETRY_AFTER), "Cache-Control": "no-cache"}
+    if section_data is None:
+        return pending_section_response(section)
+
+    sources = [source for source in section_sources(section) if snapshot.is_ready(source)]
+    return versioned_response(
+        page_cache,
+        ("section", section),
+        response_version(snapshot.version(section_sources(section))),
+        lambda: section_json(section, section_data, render_section(section, snapshot)),
+        "application/json",
+        last_modified=max(snapshot.section_built_at[source] for source in sources),
     )
 
-    # Wage and salaried workers context
-    if metrics["wage_and_salaried_workers"]["female"] != "N/A":
-        metrics["wage_and_salaried_workers"]["context"] = (
-            f"{metrics['wage_and_salaried_workers']['female']}% of women are in salaried positions."
+@app.route('/api/overview')
+def overview_section():
+    return section_response("overview")
+
+@app.route('/api/comparison')
+def comparison_section():
+    return section_response("comparison")
+
+@app.route('/api/gender-naming')
+def gender_naming_section():
+    return section_response("gender_naming")
+
+@app.route('/api/research')
+def research_section():
+    return section_response("research")
+
+@app.route('/api/research/search')
+def research_search():
+    """
+    Search the research corpus by words in titles, concepts and authors (?q=), concept (?category=)
+    and open access (?open_access=1), answered from the local index.
+    """
+    snapshot = get_current_snapshot()
+    if not snapshot.is_ready("research"):
+        return jsonify({"status": "pending"}), 202, {"Retry-After": str(SECTION_RETRY_AFTER), "Cache-Control": "no-store"}
+
+    query = request.args.get("q", "").strip()
+    category = request.args.get("category") or None
+    open_access = request.args.get("open_access") == "1"
+    with timed("research_search"):
+        total, papers = get_research_index(snapshot.research_papers).search(
+            query, category, open_access, limit=RESEARCH_SEARCH_LIMIT
         )
+    return jsonify({
+        "query": query,
+        "category": category,
+        "open_access": open_access,
+        "total": total,
+        "results": papers,
+        "html": render_template("sections/research_cards.html", research_papers=papers),
+    }), 200, {"Cache-Control": cache_control(True)}
 
-    return metrics
+@app.route('/')
+def index():
+    # Sections are rebuilt in the background; the page waits for them at most until its deadline,
+    # and the sections whose data is not ready by then are filled in by the browser from the JSON endpoints
+    start_snapshot_refresher(SNAPSHOT_SECTION_BUILDERS, SOURCE_BUDGETS)
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    with timed("wait_for_sections"):
+        for source in SNAPSHOT_SECTION_BUILDERS:
+            wait_for_section(source, max(0.0, deadline - time.monotonic()))
+    snapshot = get_current_snapshot()
+    section_urls = {section: url_for(endpoint) for section, endpoint in SECTION_ENDPOINTS.items()}
+
+    # The page only changes when a section is rebuilt, so it is rendered and compressed once per snapshot version
+    complete = all(snapshot.is_ready(source) for source in SECTION_SOURCES.values())
+    return versioned_response(
+        page_cache,
+        ("index",),
+        response_version(snapshot.version(SNAPSHOT_SECTION_BUILDERS)),
+        lambda: render_index_page(snapshot, section_urls),
+        "text/html",
+        last_modified=snapshot.built_at if complete else None,
+        cacheable=complete,
+    )
 
-def clean_data(data, default_value=0):
-    """Replace None values in data with a default value for JSON serialization."""
-    if data is None:
-        return {}  # Return an empty dictionary if data is None
-    return {key: (value if value is not None else default_value) for key, value in data.items()}
+def render_index_page(snapshot, section_urls):
+    """
+    Render the main dashboard from a snapshot.
 
-def generate_world_bank_insights(data):
-    """Generate highlights based on World Bank data."""
-    highlights = {
-        "top_female_population_country": None,
-        "top_female_population": None,
-        "top_parliament_country": None,
-        "top_parliament": None,
-        "lowest_labor_force_country": None,
-        "lowest_labor_force": None
-    }
+    :param section_urls: Dictionary mapping section names to the URLs of their JSON, from which the
+                         browser loads the sections that are not ready yet (and the chart's data).
+    """
+    sections = {section: render_section(section, snapshot) for section in SECTION_ENDPOINTS}
+    with timed("render_index"):
+        return render_template(
+            'index.html',
+            country_name=MAIN_COUNTRY,
+            country_flag=flag_emoji(MAIN_COUNTRY_ISO2),
+            sections=sections,
+            # Static pages have no section JSON to poll for sections that were not exported
+            pending_sections=set() if app.config.get("STATIC_EXPORT") else {
+                section for section, source in SECTION_SOURCES.items() if not snapshot.is_ready(source)
+            },
+            section_urls=section_urls,
+            # activists=activists,
+        )
 
-    # Calculate highlights
-    top_female_population_country = max(data, key=lambda x: data[x]['female_population'] or 0)
-    top_female_population = data[top_female_population_country]['female_population']
+def render_country_page(metadata, country_code, sections, section_urls):
+    """
+    Render the dashboard of a country other than the main one.
 
-    top_parliament_country = max(data, key=lambda x: data[x]['women_in_parliament'] or 0)
-    top_parliament = data[top_parliament_country]['women_in_parliament']
+    :param metadata: CountryMetadata, or None while it is loading (the code is shown as the name then).
+    :param country_code: ISO3 code of the country (as requested if there is no metadata yet).
+    :param sections: Section data returned by build_country_dashboard, or None while it is not available;
+                     the browser then loads the sections from their JSON.
+    :param section_urls: Dictionary mapping section names to the URLs of their JSON.
+    """
+    with timed("render_country_page"):
+        return render_template(
+            'index.html',
+            country_name=metadata.name(country_code) if metadata else country_code.upper(),
+            country_flag=flag_emoji(metadata.iso2(country_code)) if metadata else "",
+            sections={
+                section: render_template(f"sections/{section}.html", **sections[section]) if sections else None
+                for section in COUNTRY_SECTIONS
+            },
+            pending_sections=set() if sections else set(COUNTRY_SECTIONS),
+            section_urls=section_urls,
+        )
 
-    lowest_labor_force_country = min(data, key=lambda x: data[x]['labor_force_participation_female'] or float('inf'))
-    lowest_labor_force = data[lowest_labor_force_country]['labor_force_participation_female']
+def section_json(section, data, html):
+    """Return the JSON document of a ready section, as served by the section endpoints."""
+    return jsonify({"section": section, "status": "ready", "data": data, "html": html}).get_data(as_text=True)
 
-    # Assign highlights
-    highlights.update({
-        "top_female_population_country": top_female_population_country,
-        "top_female_population": top_female_population,
-        "top_parliament_country": top_parliament_country,
-        "top_parliament": top_parliament,
-        "lowest_labor_force_country": lowest_labor_force_country,
-        "lowest_labor_force": lowest_labor_force
-    })
+# Sections of the country pages (the gender naming and research sections only exist for the main country)
+COUNTRY_SECTIONS = ["overview", "comparison"]
 
-    return highlights
+def flag_emoji(iso2_code):
+    """Return the flag emoji of an ISO2 country code (e.g., 'UA'), or an empty string if it is unknown."""
+    if not iso2_code:
+        return ""
+    return "".join(chr(0x1F1E6 + ord(letter) - ord("A")) for letter in iso2_code.upper())
 
+def get_neighborhood(metadata, country_code):
+    """Return the ISO3 codes of a country and its neighbors, the country first."""
+    return [country_code, *metadata.neighbors(country_code)]
 
-from concurrent.futures import ThreadPoolExecutor
+def dataset_version(metadata, versions):
+    """Combine the history versions of a neighborhood's countries with the country metadata's and groups' versions."""
+    return metadata.version, tuple(sorted(versions.items())), get_current_snapshot().version(["country_groups"])
 
-@app.route('/')
-def index():
-    # Define the tasks to run concurrently
-    with ThreadPoolExecutor() as executor:
-        # Fetch main country data
-        main_country_future = executor.submit(
-            lambda: clean_data({
-                indicator: fetch_gender_equality_data(MAIN_COUNTRY_CODE, code)
-                for indicator, code in INDICATORS.items()
-            })
+def sync_neighborhood_in_background(neighborhood, versions):
+    """
+    Sync the history of a neighborhood in a background thread if a country has none yet or it may be outdated.
+
+    :param neighborhood: ISO3 codes of the countries.
+    :param versions: Their history versions (see get_history_versions).
+    """
+    if min(versions.values()) > time.time() - SOURCE_TTLS["world_bank"]:
+        return
+    cache.refresh_in_background(
+        ("country_history", tuple(neighborhood)), lambda: sync_indicator_history(neighborhood, country_pool.indicators)
+    )
+
+@instrument()
+def build_country_dashboard(metadata, country_code):
+    """
+    Compute the World Bank sections of a country's dashboard from the stored history, comparing it
+    against its own neighbors.
+
+    :param metadata: CountryMetadata
+    :param country_code: ISO3 code of the country (e.g., 'POL').
+    :return: Dictionary mapping section names ('overview', 'comparison') to their data.
+    """
+    country_names = {code: metadata.name(code) for code in get_neighborhood(metadata, country_code)}
+    store = country_pool.get_store(country_names, sync=False)[0].select_indicators(INDICATORS)
+    country_data = store.to_country_data()
+    quick_overview_metrics = calculate_quick_overview_metrics(store, country_names[country_code])
+    world_bank_highlights = generate_world_bank_insights(store)
+    snapshot = get_current_snapshot()
+    group_comparisons = compare_with_groups(
+        snapshot.group_aggregates if snapshot.is_ready("country_groups") else None,
+        country_code,
+        country_data[country_names[country_code]],
+    )
+    return {
+        section: world_bank_section_data(
+            section, country_data, quick_overview_metrics, world_bank_highlights, group_comparisons
         )
+        for section in COUNTRY_SECTIONS
+    }
+
+def cached_country_response(metadata, country_code, kind, render, pending, mimetype):
+    """
+    Answer a country request from the page cache, building and rendering the dashboard on a miss.
+
+    Only history that is already stored is used: requests never wait for the World Bank. Countries
+    without stored history, or whose history may be outdated, are synced in the background, and
+    until the country itself has been synced the pending response is returned.
+
+    :param metadata: CountryMetadata
+    :param country_code: ISO3 code of the country.
+    :param kind: What is rendered ('page' or a section name); part of the cache key.
+    :param render: Function turning the dashboard's {section: data} into a string.
+    :param pending: Function returning the response for a country whose history is not stored yet.
+    :param mimetype: Content type of the response.
+    """
+    neighborhood = get_neighborhood(metadata, country_code)
+    versions = get_history_versions(neighborhood)
+    sync_neighborhood_in_background(neighborhood, versions)
+    if not versions[country_code]:
+        return pending()
+
+    # Until its neighbors' data is stored as well, the page is not reused for long
+    complete = all(versions.values())
+    return versioned_response(
+        page_cache,
+        ("country", kind, country_code),
+        response_version(dataset_version(metadata, versions)),
+        lambda: render(build_country_dashboard(metadata, country_code)),
+        mimetype,
+        last_modified=max(
+            metadata.loaded_at,
+            (get_current_snapshot().section_built_at or {}).get("country_groups", 0),
+            *versions.values(),
+        ),
+        cacheable=complete,
+        max_age=None if complete else INCOMPLETE_PAGE_MAX_AGE,
+    )
+
+def resolve_country_code(metadata, country_code):
+    """Return the ISO3 code of a known country given its ISO2 or ISO3 code, or answer 404."""
+    iso3 = metadata.iso3(country_code)
+    if iso3 not in metadata.names:
+        abort(404)
+    return iso3
+
+@app.route('/country/<country_code>')
+def country_page(country_code):
+    """Dashboard of any country, compared against its own neighbors (e.g., /country/POL or /country/pl)."""
+    start_snapshot_refresher(SNAPSHOT_SECTION_BUILDERS, SOURCE_BUDGETS)
+    metadata = get_metadata(wait=False)
+    iso3 = resolve_country_code(metadata, country_code) if metadata else country_code
+    if iso3 == MAIN_COUNTRY_CODE:
+        return redirect(url_for('index'))
+    if country_code != iso3:
+        # One URL, and one cache entry, per country
+        return redirect(url_for('country_page', country_code=iso3), 301)
+
+    section_urls = {
+        section: url_for('country_section', country_code=iso3, section=section) for section in COUNTRY_SECTIONS
+    }
+
+    def pending():
+        # The browser fills in the sections from their JSON once the data is stored
+        return render_country_page(metadata, iso3, None, section_urls), 200, {"Cache-Control": "no-store"}
+
+    if metadata is None:
+        return pending()
+    return cached_country_response(
+        metadata, iso3, "page", lambda sections: render_country_page(metadata, iso3, sections, section_urls),
+        pending, "text/html",
+    )
+
+@app.route('/api/country/<country_code>/<section>')
+def country_section(country_code, section):
+    """JSON of one section of a country's dashboard, in the same format as the main dashboard's section endpoints."""
+    start_snapshot_refresher(SNAPSHOT_SECTION_BUILDERS, SOURCE_BUDGETS)
+    if section not in COUNTRY_SECTIONS:
+        abort(404)
+    metadata = get_metadata(wait=False)
+    if metadata is None:
+        return pending_section_response(section)
+    iso3 = resolve_country_code(metadata, country_code)
+
+    def render(sections):
+        with timed(f"render_country_{section}"):
+            html = render_template(f"sections/{section}.html", **sections[section])
+        return section_json(section, sections[section], html)
+
+    return cached_country_response(
+        metadata, iso3, section, render, lambda: pending_section_response(section), "application/json"
+    )
+
+@app.route('/api/country/<country_code>/trend/<indicator>')
+def country_trend(country_code, indicator):
+    """
+    How one indicator of a country changed over time (optionally since ?since=<year>), from the stored history.
+    """
+    if indicator not in INDICATORS:
+        abort(404)
+    metadata = get_metadata(wait=False)
+    if metadata is None:
+        return jsonify({"status": "pending"}), 202, {"Retry-After": str(SECTION_RETRY_AFTER), "Cache-Control": "no-store"}
+    iso3 = resolve_country_code(metadata, country_code)
+    since = request.args.get("since", type=int)
+    with timed("trend"):
+        trend = get_trend(iso3, INDICATORS[indicator], since)
+    return jsonify({
+        "country": iso3,
+        "indicator": indicator,
+        "since": since,
+        "trend": trend,
+    }), 200, {"Cache-Control": cache_control(True)}
+
+@app.template_global()
+def asset_url(filename):
+    """Return the URL of a static asset; static exports link to its content-hashed copy instead."""
+    exported = app.config.get("EXPORTED_ASSET_URLS") or {}
+    return exported.get(filename) or url_for('static', filename=filename)
+
+@app.route('/metrics')
+def metrics():
+    """Expose latency histograms, upstream request counts, cache lookups and in-flight requests to Prometheus."""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@app.before_request
+def start_server_timing():
+    start_request_timing()
+
+@app.after_request
+def add_server_timing(response):
+    """
+    Report the steps of this request as Server-Timing, and for pages and sections also how long each
+    source's last background build took.
+    """
+    if request.endpoint in BUILD_TIMING_ENDPOINTS:
+        for (section,), seconds in SECTION_LAST_BUILD_SECONDS.items():
+            record_request_timing(f"build_{section}", seconds, "last background build")
+    server_timing = finish_request_timing()
+    if server_timing:
+        response.headers["Server-Timing"] = server_timing
+    return response
+
+# Page sections and the endpoints serving them
+SECTION_ENDPOINTS = {
+    "overview": "overview_section",
+    "comparison": "comparison_section",
+    "gender_naming": "gender_naming_section",
+    "research": "research_section",
+}
+
+# Endpoints of pages and sections, whose Server-Timing also reports the last background build of every source
+BUILD_TIMING_ENDPOINTS = {"index", "country_page", "country_section", *SECTION_ENDPOINTS.values()}
+
+@app.cli.command("ingest-wdi")
+@click.argument("archive_path", type=click.Path(exists=True, dir_okay=False))
+def ingest_wdi_command(archive_path):
+    """Load a downloaded World Bank WDI bulk archive (WDI_CSV.zip) into the indicator history."""
+    summary = ingest_wdi_archive(archive_path, INDICATORS)
+    if summary["status"] == "already_complete":
+        click.echo(f"{archive_path} was already ingested completely; nothing to do.")
+        return
+    click.echo(
+        f"Read {summary['rows_read']} rows in {summary['seconds']}s ({summary['rows_per_second']} rows/s), "
+        f"stored {summary['values_stored']} values of {summary['series_ingested']} series."
+    )
+    if summary["cells_skipped"]:
+        click.echo(f"Skipped {summary['cells_skipped']} cells that are not numbers.")
+
+def export_country_page(export, metadata, country_code):
+    """Export the page and section JSON of one country, building its dashboard only if one of them changed."""
+    neighborhood = get_neighborhood(metadata, country_code)
+    # Unlike requests, the export waits for the neighborhood's history to be synced
+    sync_indicator_history(neighborhood, country_pool.indicators)
+    version = response_version(dataset_version(metadata, get_history_versions(neighborhood)))
+    built = {}
+
+    def sections():
+        if not built:
+            built.update(build_country_dashboard(metadata, country_code))
+        return built
+
+    section_urls = {
+        section: url_for('country_section', country_code=country_code, section=section) + ".json"
+        for section in COUNTRY_SECTIONS
+    }
+    for section, url in section_urls.items():
+        export.export(url.lstrip("/"), version, lambda section=section: section_json(
+            section, sections()[section], render_template(f"sections/{section}.html", **sections()[section])
+        ))
+    export.export(
+        url_for('country_page', country_code=country_code).lstrip("/") + "/index.html",
+        version,
+        lambda: render_country_page(metadata, country_code, sections(), section_urls),
+    )
+
+@app.cli.command("freeze")
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option("--country", "countries", multiple=True, help="ISO2 or ISO3 code of a country page to export; repeatable.")
+@click.option("--all-countries", is_flag=True, help="Export the pages of all known countries.")
+def freeze_command(output_dir, countries, all_countries):
+    """
+    Export the dashboard as static files for a CDN: pages, section JSON files and content-hashed assets.
 
-        # Fetch neighboring countries' data
-        neighbors_data_future = executor.submit(
-            lambda: fetch_gender_equality_data_for_neighbors(MAIN_COUNTRY_CODE, INDICATORS)
+    Files whose data, templates and assets did not change since the previous export into OUTPUT_DIR are kept as they are.
+    """
+    started_at = time.monotonic()
+    # Country codes are checked before anything is exported, so a typo leaves the output directory untouched
+    country_codes = []
+    if countries or all_countries:
+        try:
+            metadata = get_metadata()
+        except CountryMetadataUnavailable as error:
+            raise click.ClickException(f"Country pages cannot be exported: {error}")
+        unknown = [code for code in countries if metadata.iso3(code) not in metadata.names]
+        if unknown:
+            raise click.BadParameter(f"unknown country code {', '.join(unknown)}", param_hint="'--country'")
+        country_codes = sorted(metadata.names) if all_countries else [metadata.iso3(code) for code in countries]
+
+    # Export the data in the snapshot file, building the sections it does not have
+    restored = restore_snapshot()
+    for source, build in SNAPSHOT_SECTION_BUILDERS.items():
+        if source not in restored and not refresh_section(source, build):
+            click.echo(f"Warning: the {source} data could not be fetched, its sections are not exported.", err=True)
+    snapshot = get_current_snapshot()
+
+    export = StaticExport(
+        output_dir, app.static_folder, os.path.join(app.root_path, app.template_folder), app.static_url_path
+    )
+    app.config["EXPORTED_ASSET_URLS"] = export.copy_assets()
+    # Static pages have no search endpoint to call
+    app.config["STATIC_EXPORT"] = True
+
+    with app.test_request_context():
+        section_urls = {section: url_for(endpoint) + ".json" for section, endpoint in SECTION_ENDPOINTS.items()}
+        for section, url in section_urls.items():
+            if snapshot.is_ready(SECTION_SOURCES[section]):
+                export.export(url.lstrip("/"), response_version(snapshot.version(section_sources(section))), lambda section=section: section_json(
+                    section, get_section_data(section, snapshot), render_section(section, snapshot)
+                ))
+        export.export(
+            "index.html",
+            response_version(snapshot.version(SNAPSHOT_SECTION_BUILDERS)),
+            lambda: render_index_page(snapshot, section_urls),
         )
 
-        # Fetch activists from DBPedia
-        # activists_future = executor.submit(fetch_ukrainian_gender_activists)
-
-        # Fetch counts of streets/buildings named after genders
-        gender_named_counts_future = executor.submit(fetch_gender_named_counts)
-
-        # Fetch latest research papers
-        research_papers_future = executor.submit(fetch_latest_research_papers)
-
-    # Collect the results
-    main_country_data = main_country_future.result()
-    neighbors_data = neighbors_data_future.result() or {}
-    # activists = activists_future.result()
-    gender_named_counts = gender_named_counts_future.result()
-    research_papers = research_papers_future.result()
-
-    # Clean and update the country data
-    cleaned_neighbors_data = {country: clean_data(metrics) for country, metrics in neighbors_data.items()}
-    country_data = {MAIN_COUNTRY: main_country_data}
-    country_data.update(cleaned_neighbors_data)
-
-    # Calculate Quick Overview Metrics
-    quick_overview_metrics = calculate_quick_overview_metrics(country_data, MAIN_COUNTRY)
-
-    # Generate insights and highlights
-    world_bank_highlights = generate_world_bank_insights(country_data)
-
-    # Pass the data to the HTML template for rendering
-    return render_template(
-        'index.html',
-        data=country_data,
-        # activists=activists,
-        gender_named_counts=gender_named_counts,
-        research_papers=research_papers,
-        world_bank_highlights=world_bank_highlights,
-        indicator_labels=indicator_labels,
-        indicator_colors=indicator_colors,
-        quick_overview_metrics=quick_overview_metrics,
+        for country_code in country_codes:
+            if country_code != MAIN_COUNTRY_CODE:
+                export_country_page(export, metadata, country_code)
+
+    export.save_manifest()
+    click.echo(
+        f"Exported {len(export.rendered)} files ({len(export.unchanged)} unchanged) and "
+        f"{export.assets_copied} new assets to {output_dir} in {time.monotonic() - started_at:.1f}s."
     )
 
 if __name__ == '__main__':
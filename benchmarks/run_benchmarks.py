@@ -0,0 +1,317 @@
+"""
+End-to-end benchmarks of the dashboard against local stand-ins of its upstream APIs.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --latency 0.2 --error-rate 0.05 --output results.json
+
+Every scenario runs the app in a fresh process (so startup costs are measured) against stub
+servers started by this script, and the results are written as JSON.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+import numpy as np
+
+from benchmarks.stub_servers import STATS_PATH, start_stub_servers, stub_environment
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is then not reported
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Real host whose per-host limits each stub gets
+UPSTREAM_HOSTS = {
+    "world_bank": "api.worldbank.org",
+    "rest_countries": "restcountries.com",
+    "wikidata": "query.wikidata.org",
+    "openalex": "api.openalex.org",
+}
+
+# Section endpoints polled until the whole dashboard is ready
+SECTION_PATHS = ["/api/overview", "/api/comparison", "/api/gender-naming", "/api/research"]
+
+# Seconds to wait for all sections before giving up on a scenario
+READY_TIMEOUT = 300
+
+
+def summarize(latencies):
+    """
+    Summarize latencies in seconds.
+
+    :return: Dictionary with count, mean, p50, p95, p99 and max in milliseconds.
+    """
+    if not latencies:
+        return {"count": 0}
+    milliseconds = np.array(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "mean_ms": round(float(milliseconds.mean()), 2),
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 2),
+        "p95_ms": round(float(np.percentile(milliseconds, 95)), 2),
+        "p99_ms": round(float(np.percentile(milliseconds, 99)), 2),
+        "max_ms": round(float(milliseconds.max()), 2),
+    }
+
+
+def get_stub_counts(stub_urls):
+    """Return the number of requests every stub has received so far."""
+    counts = {}
+    for name, url in stub_urls.items():
+        with urlopen(url + STATS_PATH) as response:
+            counts[name] = json.load(response)["requests"]
+    return counts
+
+
+def count_difference(before, after):
+    """Return the requests received between two get_stub_counts calls, per stub and in total."""
+    difference = {name: after[name] - before[name] for name in after}
+    return {**difference, "total": sum(difference.values())}
+
+
+def timed_get(url):
+    """
+    Request a URL.
+
+    :return: Tuple (seconds taken, status code, parsed JSON body or None).
+    """
+    started_at = time.perf_counter()
+    with urlopen(url) as response:
+        body = response.read()
+        status = response.status
+    seconds = time.perf_counter() - started_at
+    is_json = body[:1] in (b"{", b"[")
+    return seconds, status, json.loads(body) if is_json else None
+
+
+def wait_for_all_sections(base_url):
+    """
+    Poll the section endpoints until all of them have left the pending state.
+
+    :return: Tuple (seconds waited, dictionary mapping section paths to their final status).
+    """
+    started_at = time.perf_counter()
+    statuses = {}
+    while time.perf_counter() - started_at < READY_TIMEOUT:
+        statuses = {path: timed_get(base_url + path)[2]["status"] for path in SECTION_PATHS}
+        if all(status != "pending" for status in statuses.values()):
+            break
+        time.sleep(0.02)
+    return time.perf_counter() - started_at, statuses
+
+
+def measure_throughput(url, concurrency, duration):
+    """
+    Request a URL from several threads for a fixed duration.
+
+    :return: Dictionary with requests per second, error count and latency summary.
+    """
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def load():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            try:
+                seconds, status, _ = timed_get(url)
+            except OSError:
+                seconds, status = None, None
+            with lock:
+                if status == 200:
+                    latencies.append(seconds)
+                else:
+                    errors += 1
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(load)
+    elapsed = time.perf_counter() - started_at
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "latency": summarize(latencies),
+    }
+
+
+def peak_memory_mb():
+    """Return the peak resident memory of this process in megabytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scenario(config):
+    """
+    Measure one scenario inside the current process. Called in a fresh process per scenario.
+
+    :param config: Dictionary with the stub URLs and netlocs, page request count, concurrency and duration.
+    :return: Dictionary of measurements.
+    """
+    from werkzeug.serving import make_server
+
+    import app
+    from data_fetching import fetch_engine
+
+    # One access log line per benchmark request would bury the scenario's warnings and errors
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    # Give every stub the limits of the host it stands in for
+    for name, netloc in config["stub_netlocs"].items():
+        fetch_engine.HOST_LIMITS[netloc] = fetch_engine.HOST_LIMITS[UPSTREAM_HOSTS[name]]
+
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="benchmark-app", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    stub_urls = config["stub_urls"]
+
+    counts_at_start = get_stub_counts(stub_urls)
+    first_page_seconds = timed_get(base_url + "/")[0]
+    ready_seconds, section_statuses = wait_for_all_sections(base_url)
+    counts_when_ready = get_stub_counts(stub_urls)
+
+    page_latencies = [timed_get(base_url + "/")[0] for _ in range(config["page_requests"])]
+    api_latencies = [
+        timed_get(base_url + path)[0] for _ in range(config["page_requests"]) for path in SECTION_PATHS
+    ]
+    throughput = measure_throughput(base_url + "/", config["concurrency"], config["duration"])
+    counts_at_end = get_stub_counts(stub_urls)
+
+    server.shutdown()
+    return {
+        "first_page_ms": round(first_page_seconds * 1000, 2),
+        "all_sections_ready_ms": round((first_page_seconds + ready_seconds) * 1000, 2),
+        "section_statuses": section_statuses,
+        "upstream_requests_until_ready": count_difference(counts_at_start, counts_when_ready),
+        "warm_page": summarize(page_latencies),
+        "warm_section_api": summarize(api_latencies),
+        "throughput": throughput,
+        "upstream_requests_while_warm": count_difference(counts_when_ready, counts_at_end),
+        "peak_memory_mb": peak_memory_mb(),
+    }
+
+
+def run_in_subprocess(config, environment):
+    """Run one scenario in a fresh Python process and return its measurements."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result_file:
+        result_path = result_file.name
+    try:
+        try:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.run_benchmarks", "--scenario-config", json.dumps(config),
+                 "--scenario-result", result_path],
+                cwd=REPO_ROOT,
+                env={**os.environ, **environment},
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except subprocess.CalledProcessError as error:
+            # The app's log is only shown when the scenario failed
+            sys.stderr.write(error.stderr)
+            raise
+        with open(result_path, encoding="utf-8") as result_file:
+            return json.load(result_file)
+    finally:
+        os.remove(result_path)
+
+
+def run_benchmarks(args):
+    """
+    Start the stub servers and run the cold and warm-start scenarios.
+
+    :return: Dictionary with the configuration and the measurements of every scenario.
+    """
+    stubs = start_stub_servers(args.latency, args.jitter, args.error_rate, args.seed)
+    config = {
+        "stub_urls": {name: stub.url for name, stub in stubs.items()},
+        "stub_netlocs": {name: stub.netloc for name, stub in stubs.items()},
+        "page_requests": args.page_requests,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="tracker-benchmark-") as work_dir:
+        environment = {
+            **stub_environment(stubs),
+            "TRACKER_CACHE_PATH": os.path.join(work_dir, "cache.sqlite3"),
+            "TRACKER_LOCK_DIR": os.path.join(work_dir, "locks"),
+            "TRACKER_SNAPSHOT_FILE": os.path.join(work_dir, "dashboard.snapshot"),
+        }
+        # Cold: empty cache; warm start: a new process reusing the cache the cold run filled
+        for scenario in ("cold", "warm_start"):
+            results[scenario] = run_in_subprocess(config, environment)
+
+    for stub in stubs.values():
+        stub.stop()
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "page_requests": args.page_requests,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "scenarios": results,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard against local stub servers.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every upstream response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests failing with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency jitter and error injection")
+    parser.add_argument("--page-requests", type=int, default=50, help="Sequential requests per warm measurement")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads requesting the page in the load test")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds the load test runs")
+    parser.add_argument("--output", help="File to write the JSON results to (default: standard output)")
+    parser.add_argument("--scenario-config", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario-result", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.scenario_config:
+        # Inside the fresh process of one scenario
+        measurements = run_scenario(json.loads(args.scenario_config))
+        with open(args.scenario_result, "w", encoding="utf-8") as result_file:
+            json.dump(measurements, result_file)
+        return
+
+    results = json.dumps(run_benchmarks(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
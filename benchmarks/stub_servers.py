@@ -0,0 +1,351 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Path answering with a stub's request counts (not counted itself)
+STATS_PATH = "/__stats"
+
+# Years served by the World Bank stub
+WORLD_BANK_YEARS = range(1990, 2024)
+
+
+def load_fixture(name):
+    """Load a JSON fixture from the fixtures directory."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as fixture_file:
+        return json.load(fixture_file)
+
+
+class StubServer:
+    """
+    Local stand-in for one upstream API, serving fixtures with configurable latency and errors.
+
+    Each stub runs a threaded HTTP server on its own port, so per-host limits apply to it as they
+    would to the real host, and counts the requests it receives.
+    """
+
+    def __init__(self, name, respond, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        """
+        :param name: Name of the upstream (e.g., 'world_bank').
+        :param respond: Function (path, query) returning (status, JSON-serializable body).
+        :param latency: Seconds added to every response.
+        :param jitter: Maximum random seconds added on top of the latency.
+        :param error_rate: Fraction of requests answered with 503 instead of the fixture.
+        :param seed: Seed of the random generator deciding jitter and errors.
+        """
+        self.name = name
+        self.respond = respond
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL of the stub."""
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def netloc(self):
+        """host:port of the stub, as used for per-host limits."""
+        return f"127.0.0.1:{self.server.server_address[1]}"
+
+    def make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == STATS_PATH:
+                    self.send_json(200, stub.stats())
+                    return
+
+                with stub.lock:
+                    stub.request_count += 1
+                    delay = stub.latency + stub.random.uniform(0, stub.jitter)
+                    failed = stub.random.random() < stub.error_rate
+                    if failed:
+                        stub.error_count += 1
+                time.sleep(delay)
+
+                if failed:
+                    status, body = 503, {"error": "injected failure"}
+                else:
+                    parts = urlsplit(self.path)
+                    status, body = stub.respond(parts.path, parse_qs(parts.query))
+
+                self.send_json(status, body)
+
+            def send_json(self, status, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name=f"stub-{self.name}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        """Return the number of requests received and of injected errors."""
+        with self.lock:
+            return {"requests": self.request_count, "injected_errors": self.error_count}
+
+
+def world_bank_value(country, indicator, year):
+    """Deterministic synthetic value of one World Bank series and year, between 0 and 100."""
+    return round(zlib.crc32(f"{country}|{indicator}|{year}".encode("utf-8")) % 10000 / 100, 2)
+
+
+# Income levels of the fixture countries served by the World Bank country list
+WORLD_BANK_INCOME_LEVELS = {
+    "HIC": "High income",
+    "UMC": "Upper middle income",
+}
+
+
+def respond_world_bank_countries(query):
+    """Answer the country list with the fixture countries, all in Europe & Central Asia, plus one aggregate."""
+    records = [
+        {
+            "id": country["cca3"],
+            "iso2Code": country["cca2"],
+            "name": country["name"]["common"],
+            "region": {"id": "ECS", "iso2code": "Z7", "value": "Europe & Central Asia"},
+            "incomeLevel": {"id": income, "iso2code": "", "value": WORLD_BANK_INCOME_LEVELS[income]},
+        }
+        for country in load_fixture("rest_countries_all.json")
+        for income in ["HIC" if zlib.crc32(country["cca3"].encode("utf-8")) % 2 else "UMC"]
+    ]
+    records.append({
+        "id": "WLD", "iso2Code": "1W", "name": "World",
+        "region": {"id": "NA", "iso2code": "NA", "value": "Aggregates"},
+        "incomeLevel": {"id": "NA", "iso2code": "NA", "value": "Aggregates"},
+    })
+    header = {"page": 1, "pages": 1, "per_page": int(query.get("per_page", ["50"])[0]), "total": len(records)}
+    return 200, [header, records]
+
+
+def respond_world_bank(path, query):
+    """
+    Answer batched indicator queries in the World Bank API format, with paging, `date` and `mrnev`,
+    and the country list with regions and income levels.
+
+    Values are synthesized deterministically, so any combination of countries, indicators and
+    years can be served without recording every possible response.
+    """
+    if path.rstrip("/").endswith("/country"):
+        return respond_world_bank_countries(query)
+    match = re.search(r"/country/([^/]+)/indicator/([^/]+)$", path)
+    if match is None:
+        return 404, {"error": "unknown path"}
+
+    countries = load_fixture("rest_countries_all.json")
+    iso2 = {country["cca3"]: country["cca2"] for country in countries}
+    names = {country["cca3"]: country["name"]["common"] for country in countries}
+    iso3 = {country["cca2"]: country["cca3"] for country in countries}
+
+    years = list(WORLD_BANK_YEARS)
+    if "date" in query:
+        first_year, last_year = (int(year) for year in query["date"][0].split(":"))
+        years = [year for year in years if first_year <= year <= last_year]
+    if "mrnev" in query:
+        years = years[-int(query["mrnev"][0]):]
+
+    records = []
+    for code in match.group(1).split(";"):
+        country = iso3.get(code.upper(), code.upper())
+        for indicator in match.group(2).split(";"):
+            for year in reversed(years):
+                records.append({
+                    "indicator": {"id": indicator, "value": indicator},
+                    "country": {"id": iso2.get(country, country), "value": names.get(country, country)},
+                    "countryiso3code": country,
+                    "date": str(year),
+                    "value": world_bank_value(country, indicator, year),
+                    "unit": "",
+                    "obs_status": "",
+                    "decimal": 1,
+                })
+
+    per_page = int(query.get("per_page", ["50"])[0])
+    page = int(query.get("page", ["1"])[0])
+    pages = max(1, -(-len(records) // per_page))
+    header = {"page": page, "pages": pages, "per_page": per_page, "total": len(records), "sourceid": "2"}
+    return 200, [header, records[(page - 1) * per_page:page * per_page]]
+
+
+def respond_rest_countries(path, query):
+    """Answer /all with the fixture country records, limited to the requested fields."""
+    if not path.endswith("/all"):
+        return 404, {"status": 404, "message": "Not Found"}
+    records = load_fixture("rest_countries_all.json")
+    if "fields" in query:
+        fields = query["fields"][0].split(",")
+        records = [{field: record[field] for field in fields if field in record} for record in records]
+    return 200, records
+
+
+# Street/building classes, regions with their localities, and the number of streets named after
+# women and men served by the Wikidata stub
+WIKIDATA_CLASSES = ["Q41176", "Q79007", "Q83620", "Q1251403", "Q3947"]
+WIKIDATA_REGIONS = {
+    "Q1899": ("Kyiv", ["Q1899"]),
+    "Q164193": ("Lviv Oblast", ["Q36036", "Q842553"]),
+    "Q170672": ("Kharkiv Oblast", ["Q42308"]),
+    "Q165473": ("Odesa Oblast", ["Q1874", "Q1016960"]),
+}
+WIKIDATA_LOCALITIES = {
+    "Q1899": "Kyiv", "Q36036": "Lviv", "Q842553": "Drohobych", "Q42308": "Kharkiv",
+    "Q1874": "Odesa", "Q1016960": "Izmail",
+}
+WIKIDATA_NAMED_COUNTS = {"Q6581072": 212, "Q6581097": 2847}
+
+
+def sparql_uri(entity):
+    """Return a SPARQL JSON binding of a Wikidata entity."""
+    return {"type": "uri", "value": f"http://www.wikidata.org/entity/{entity}"}
+
+
+def sparql_literal(value, datatype=None):
+    """Return a SPARQL JSON binding of a literal."""
+    binding = {"type": "literal", "value": value}
+    if datatype:
+        binding["datatype"] = f"http://www.w3.org/2001/XMLSchema#{datatype}"
+    return binding
+
+
+def wikidata_named_item_rows():
+    """
+    Synthesize the named item rows: streets named after women and men spread over the localities,
+    plus some that the dashboard leaves out (a ship, and a street whose naming ended).
+    """
+    localities = sorted(WIKIDATA_LOCALITIES)
+    people = [(gender, number) for gender, count in WIKIDATA_NAMED_COUNTS.items() for number in range(count)]
+    rows = []
+    for position, (gender, number) in enumerate(people + [("Q6581072", -1), ("Q6581097", -2)]):
+        row = {
+            "item": sparql_uri(f"Q9{position:06d}"),
+            "modified": sparql_literal(f"2024-{position % 12 + 1:02d}-{position % 28 + 1:02d}T00:00:00Z", "dateTime"),
+            "class": sparql_uri("Q11446" if number == -1 else WIKIDATA_CLASSES[position % len(WIKIDATA_CLASSES)]),
+            "admin": sparql_uri(localities[position % len(localities)]),
+            "namedAfter": sparql_uri(f"Q8{position:06d}"),
+            "gender": sparql_uri(gender),
+        }
+        if position % 3:
+            row["startTime"] = sparql_literal(f"{1900 + position * 7 % 124}-01-01T00:00:00Z", "dateTime")
+        if number == -2:
+            row["endTime"] = sparql_literal("2016-01-01T00:00:00Z", "dateTime")
+        rows.append(row)
+    return rows
+
+
+def respond_wikidata(path, query):
+    """
+    Answer the class closure, region and named item SPARQL queries with synthesized results,
+    honoring LIMIT/OFFSET paging and the edit time filter.
+    """
+    sparql = query.get("query", [""])[0]
+    if "?class wdt:P279*" in sparql:
+        rows = [{"class": sparql_uri(entity)} for entity in WIKIDATA_CLASSES]
+    elif "?entity wdt:P131*" in sparql:
+        rows = [
+            {
+                "entity": sparql_uri(entity),
+                "entityLabel": sparql_literal(WIKIDATA_LOCALITIES.get(entity, label)),
+                "region": sparql_uri(region),
+                "regionLabel": sparql_literal(label),
+            }
+            for region, (label, entities) in sorted(WIKIDATA_REGIONS.items())
+            for entity in sorted({region, *entities})
+        ]
+    else:
+        rows = wikidata_named_item_rows()
+        since = re.search(r'"([^"]+)"\^\^xsd:dateTime', sparql)
+        if since:
+            rows = [row for row in rows if row["modified"]["value"] >= since.group(1)]
+
+    paging = re.search(r"LIMIT (\d+) OFFSET (\d+)", sparql)
+    if paging:
+        limit, offset = int(paging.group(1)), int(paging.group(2))
+        rows = rows[offset:offset + limit]
+    return 200, {"head": {"vars": sorted({name for row in rows for name in row})}, "results": {"bindings": rows}}
+
+
+def respond_openalex(path, query):
+    """
+    Answer work searches with the fixture works, honoring the publication date filter and sort,
+    field selection and cursor paging (cursors are offsets).
+    """
+    works = load_fixture("openalex_works.json")["results"]
+    per_page = int(query.get("per-page", query.get("per_page", ["25"]))[0])
+
+    for condition in query.get("filter", [""])[0].split(","):
+        if condition.startswith("from_publication_date:"):
+            since = condition.split(":", 1)[1]
+            works = [work for work in works if work["publication_date"] >= since]
+    works.sort(key=lambda work: work["publication_date"], reverse=query.get("sort", [""])[0].endswith(":desc"))
+    if "select" in query:
+        fields = query["select"][0].split(",")
+        works = [{field: work[field] for field in fields if field in work} for work in works]
+
+    cursor = query.get("cursor", [None])[0]
+    offset = int(cursor) if cursor and cursor != "*" else 0
+    page = works[offset:offset + per_page]
+    has_more = cursor is not None and offset + per_page < len(works)
+    meta = {"count": len(works), "per_page": per_page, "next_cursor": str(offset + per_page) if has_more else None}
+    return 200, {"meta": meta, "results": page}
+
+
+STUB_RESPONDERS = {
+    "world_bank": respond_world_bank,
+    "rest_countries": respond_rest_countries,
+    "wikidata": respond_wikidata,
+    "openalex": respond_openalex,
+}
+
+
+def start_stub_servers(latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+    """
+    Start one stub server per upstream.
+
+    :return: Dictionary mapping upstream names to started StubServer instances.
+    """
+    return {
+        name: StubServer(name, respond, latency, jitter, error_rate, seed + position).start()
+        for position, (name, respond) in enumerate(STUB_RESPONDERS.items())
+    }
+
+
+def stub_environment(stubs):
+    """Return the environment variables pointing the tracker at the stub servers."""
+    return {
+        "TRACKER_WORLD_BANK_API_URL": stubs["world_bank"].url + "/v2",
+        "TRACKER_REST_COUNTRIES_API_URL": stubs["rest_countries"].url + "/v3.1",
+        "TRACKER_WIKIDATA_SPARQL_URL": stubs["wikidata"].url + "/sparql",
+        "TRACKER_OPENALEX_API_URL": stubs["openalex"].url + "/works",
+    }
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from data_fetching import single_flight
+from monitoring.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Location of the persistent cache shared by all data_fetching modules
+CACHE_PATH = os.environ.get(
+    "TRACKER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "tracker.sqlite3"),
+)
+
+# Render entirely from cache, never calling upstream APIs
+OFFLINE_MODE = os.environ.get("TRACKER_OFFLINE", "0") == "1"
+
+# Time (in seconds) after which cached values of a source are considered stale
+SOURCE_TTLS = {
+    "world_bank": 7 * 24 * 3600,  # Indicators change at most a few times a year
+    "rest_countries": 30 * 24 * 3600,  # Names and borders practically never change
+    "wikidata": 24 * 3600,
+    "wikidata_reference": 30 * 24 * 3600,  # Street/building classes and administrative regions
+    "openalex": 6 * 3600,
+    "dbpedia": 7 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+# Every thread gets its own SQLite connection
+_local = threading.local()
+
+# Keys that are currently being refreshed in the background
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def get_connection():
+    """
+    Return the SQLite connection of the current thread, creating the cache database if needed.
+
+    :return: sqlite3.Connection to the cache database.
+    """
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        connection = sqlite3.connect(CACHE_PATH, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                source TEXT NOT NULL,
+                country TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                value TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (source, country, indicator)
+            )
+            """
+        )
+        connection.commit()
+        _local.connection = connection
+    return connection
+
+
+def is_offline():
+    """Return True if the app should render from cache only."""
+    return OFFLINE_MODE
+
+
+def lookup(source, country, indicator):
+    """
+    Look up a cached value.
+
+    :param source: Name of the data source (e.g., 'world_bank')
+    :param country: Country code the value belongs to
+    :param indicator: Indicator (or query) the value belongs to
+    :return: Tuple (value, state) where state is 'fresh', 'stale' or 'missing'.
+    """
+    row = get_connection().execute(
+        "SELECT value, fetched_at FROM cache WHERE source = ? AND country = ? AND indicator = ?",
+        (source, country, indicator),
+    ).fetchone()
+    if row is None:
+        CACHE_LOOKUPS.inc(source, "missing")
+        return None, "missing"
+
+    value, fetched_at = row
+    ttl = SOURCE_TTLS.get(source, DEFAULT_TTL)
+    state = "fresh" if time.time() - fetched_at < ttl else "stale"
+    CACHE_LOOKUPS.inc(source, state)
+    return json.loads(value), state
+
+
+def store(source, rows):
+    """
+    Store values in the cache.
+
+    :param source: Name of the data source (e.g., 'world_bank')
+    :param rows: Iterable of (country, indicator, value) tuples. Values must be JSON serializable.
+    """
+    fetched_at = time.time()
+    connection = get_connection()
+    with connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO cache (source, country, indicator, value, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            [(source, country, indicator, json.dumps(value), fetched_at) for country, indicator, value in rows],
+        )
+
+
+def refresh_in_background(key, refresh):
+    """
+    Run a refresh function in a background thread unless the same key is already being refreshed.
+
+    :param key: Hashable identifier of what is being refreshed
+    :param refresh: Function without arguments that fetches and stores fresh values
+    """
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            refresh()
+        except Exception:
+            logger.exception("Background refresh of %s failed", key)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
+
+
+def cached_fetch(source, country, indicator, fetch):
+    """
+    Return a cached value, fetching it if missing and refreshing it in the background if stale.
+
+    Fresh values are returned directly. Stale values are returned immediately while a background
+    refresh runs. Missing values are fetched synchronously. In offline mode nothing is fetched.
+    Fetched values of None are treated as failures and are not cached. Concurrent fetches of the
+    same key, from any thread or worker process on this host, are coalesced into one upstream call.
+
+    :param source: Name of the data source (e.g., 'wikidata')
+    :param country: Country code the value belongs to
+    :param indicator: Indicator (or query) the value belongs to
+    :param fetch: Function without arguments returning the fresh value
+    :return: The cached or freshly fetched value, or None if unavailable.
+    """
+    key = (source, country, indicator)
+    value, state = lookup(source, country, indicator)
+    if state == "fresh" or OFFLINE_MODE:
+        return value
+
+    def refresh():
+        fresh_value = fetch()
+        if fresh_value is not None:
+            store(source, [(country, indicator, fresh_value)])
+        return fresh_value
+
+    def recheck(accepted_states):
+        # Another process may have stored the value while this one waited for the lock
+        cached_value, cached_state = lookup(source, country, indicator)
+        return cached_value if cached_state in accepted_states else single_flight.NOT_FOUND
+
+    if state == "stale":
+        refresh_in_background(key, lambda: single_flight.do(key, refresh, lambda: recheck({"fresh"})))
+        return value
+
+    return single_flight.do(key, refresh, lambda: recheck({"fresh", "stale"}))
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from data_fetching import cache, fetch_engine
+
+logger = logging.getLogger(__name__)
+
+# All countries in one request, limited to the fields the tracker uses
+REST_COUNTRIES_API_URL = os.environ.get("TRACKER_REST_COUNTRIES_API_URL", "https://restcountries.com/v3.1")
+REST_COUNTRIES_ALL_URL = REST_COUNTRIES_API_URL + "/all"
+REST_COUNTRIES_FIELDS = "name,cca2,cca3,borders"
+
+# Optional local copy of the REST Countries records (same JSON format) used instead of the API
+LOCAL_COUNTRIES_PATH = os.environ.get("TRACKER_COUNTRIES_PATH")
+
+# Seconds after which the in-memory index is rebuilt from the cache in the background
+METADATA_RELOAD_INTERVAL = 3600
+
+
+class CountryMetadataUnavailable(Exception):
+    """Raised when the country records can be neither fetched nor read from the cache."""
+
+
+class CountryMetadata:
+    """
+    Names, ISO2/ISO3 codes and land borders of all countries, indexed by code.
+
+    Instances are never modified after they are built; a reload builds a new one and swaps it in,
+    so lookups need no locking.
+    """
+
+    def __init__(self, records, loaded_at=None):
+        """
+        :param records: List of REST Countries records with 'name', 'cca2', 'cca3' and 'borders'.
+        :param loaded_at: Time the records were loaded (defaults to now).
+        """
+        self.loaded_at = time.time() if loaded_at is None else loaded_at
+        self.records = list(records)
+        # Changes only when the records do, unlike loaded_at, so it can version pages across processes
+        self.version = hashlib.blake2b(json.dumps(self.records, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+        self.names = {}
+        self.borders = {}
+        self.iso2_to_iso3 = {}
+        self.iso3_to_iso2 = {}
+        for record in self.records:
+            iso3 = record.get("cca3")
+            if not iso3:
+                continue
+            self.names[iso3] = record.get("name", {}).get("common", iso3)
+            self.borders[iso3] = list(record.get("borders", []))
+            if record.get("cca2"):
+                self.iso2_to_iso3[record["cca2"]] = iso3
+                self.iso3_to_iso2[iso3] = record["cca2"]
+
+    def iso3(self, country_code):
+        """Return the ISO3 code of an ISO2 or ISO3 country code (the code itself if unknown)."""
+        country_code = country_code.upper()
+        return self.iso2_to_iso3.get(country_code, country_code)
+
+    def iso2(self, country_code):
+        """Return the ISO2 code of an ISO2 or ISO3 country code, or None if the country is unknown."""
+        return self.iso3_to_iso2.get(self.iso3(country_code))
+
+    def name(self, country_code):
+        """
+        Return the common name of a country.
+
+        :param country_code: ISO2 or ISO3 country code (e.g., 'PL' or 'POL').
+        :return: Full country name (e.g., 'Poland') or the country code if not found.
+        """
+        return self.names.get(self.iso3(country_code), country_code)
+
+    def neighbors(self, country_code):
+        """
+        Return the ISO3 codes of the countries sharing a land border with a country.
+
+        :param country_code: ISO2 or ISO3 country code (e.g., 'UA' or 'UKR').
+        :return: List of ISO3 codes, empty if the country is unknown.
+        """
+        return list(self.borders.get(self.iso3(country_code), []))
+
+
+_metadata = None
+_load_lock = threading.Lock()
+
+
+def fetch_country_records():
+    """
+    Fetch the records of all countries from the REST Countries API in a single request.
+
+    :return: List of records, or None if the request failed.
+    """
+    response = fetch_engine.get(REST_COUNTRIES_ALL_URL, params={"fields": REST_COUNTRIES_FIELDS})
+    if response.status_code == 200:
+        return response.json()
+    logger.warning("Fetching country metadata failed with status %s", response.status_code)
+    return None
+
+
+def load_metadata():
+    """
+    Build the country index from the local table if configured, otherwise from the cached bulk records.
+
+    :return: CountryMetadata
+    :raises CountryMetadataUnavailable: If no records are available, so the previous index stays in use
+                                        and sections built from it keep their previous version.
+    """
+    if LOCAL_COUNTRIES_PATH:
+        with open(LOCAL_COUNTRIES_PATH, encoding="utf-8") as countries_file:
+            return CountryMetadata(json.load(countries_file))
+
+    records = cache.cached_fetch("rest_countries", "", "all", fetch_country_records)
+    if records is None:
+        raise CountryMetadataUnavailable("No country metadata available from REST Countries")
+    return CountryMetadata(records)
+
+
+def reload_metadata():
+    """Rebuild the country index and swap it in; the current one is kept if that fails."""
+    global _metadata
+    _metadata = load_metadata()
+
+
+def install_metadata(records, loaded_at=None):
+    """
+    Use the given records (e.g., restored from a snapshot file) until the next reload.
+
+    :param records: List of REST Countries records.
+    :param loaded_at: Time the records were originally loaded, so outdated ones are reloaded soon.
+    """
+    global _metadata
+    _metadata = CountryMetadata(records, loaded_at)
+
+
+def get_metadata(wait=True):
+    """
+    Return the country index, loading it on first use and reloading it in the background when outdated.
+
+    :param wait: If False, the first load runs in the background instead and None is returned until it is done.
+    :return: CountryMetadata, or None if it is not loaded yet and wait is False.
+    :raises CountryMetadataUnavailable: If the index was never loaded and cannot be loaded now.
+    """
+    if _metadata is None:
+        if not wait:
+            cache.refresh_in_background("country_metadata", reload_metadata)
+            return None
+        with _load_lock:
+            if _metadata is None:
+                reload_metadata()
+    elif time.time() - _metadata.loaded_at >= METADATA_RELOAD_INTERVAL:
+        cache.refresh_in_background("country_metadata", reload_metadata)
+    return _metadata
+
+
+def peek_metadata():
+    """
+    Return the country index if it has been loaded, without loading it.
+
+    :return: CountryMetadata, or None if not loaded yet.
+    """
+    return _metadata
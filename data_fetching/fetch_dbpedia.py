@@ -1,6 +1,6 @@
 # NOT IMPLEMENTED FULLY. In a working state, though
 
-import requests
+from data_fetching import cache, fetch_engine
 
 DBPEDIA_SPARQL_URL = "https://dbpedia.org/sparql"
 
@@ -25,10 +25,18 @@ def fetch_ukrainian_gender_activists():
     
     :return: List of dictionaries with activist data (name, link, description)
     """
+    return cache.cached_fetch("dbpedia", "UA", "gender_activists", fetch_ukrainian_gender_activists_from_dbpedia)
+
+def fetch_ukrainian_gender_activists_from_dbpedia():
+    """
+    Run the activists SPARQL query against the live DBPedia endpoint.
+
+    :return: List of dictionaries with activist data (name, link, description), or None on failure
+    """
     headers = {
         "Accept": "application/sparql-results+json"
     }
-    response = requests.get(DBPEDIA_SPARQL_URL, headers=headers, params={"query": SPARQL_QUERY_ACTIVISTS})
+    response = fetch_engine.get(DBPEDIA_SPARQL_URL, headers=headers, params={"query": SPARQL_QUERY_ACTIVISTS})
     
     if response.status_code == 200:
         results = response.json()["results"]["bindings"]
@@ -0,0 +1,192 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from data_fetching import http_client
+from monitoring.metrics import UPSTREAM_QUEUE_SECONDS
+
+# Per-host limits as (max concurrent requests, max requests per second), keyed by host name
+# or by "host:port" for upstreams that share a host name (e.g., local stubs)
+HOST_LIMITS = {
+    "api.worldbank.org": (8, 20),
+    "restcountries.com": (4, 10),
+    "query.wikidata.org": (2, 1),  # The public SPARQL endpoint throttles parallel queries hard
+    "api.openalex.org": (4, 10),
+    "dbpedia.org": (2, 2),
+}
+DEFAULT_HOST_LIMIT = (4, 5)
+
+# Threads running whole blocking fetch functions (one per data source at most)
+TASK_WORKERS = int(os.environ.get("TRACKER_TASK_WORKERS", 8))
+
+
+class HostLimiter:
+    """Concurrency and rate limit for a single upstream host. Only used from the engine's event loop."""
+
+    def __init__(self, concurrency, requests_per_second):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self.next_slot = 0.0
+
+    async def wait_for_slot(self):
+        """Sleep until the host's rate limit allows another request."""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+_host_limiters = {}
+
+# Blocking HTTP calls run here; the pool matches the HTTP connection pool
+_http_executor = ThreadPoolExecutor(max_workers=http_client.HTTP_POOL_SIZE, thread_name_prefix="fetch-http")
+# Blocking fetch functions run here, separately, so they can wait on HTTP calls without starving them
+_task_executor = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix="fetch-task")
+
+
+def get_loop():
+    """
+    Return the engine's event loop, starting its thread on first use.
+
+    :return: asyncio event loop running in a daemon thread.
+    """
+    global _loop, _loop_thread
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                _loop_thread = threading.Thread(target=loop.run_forever, name="fetch-engine", daemon=True)
+                _loop_thread.start()
+                _loop = loop
+    return _loop
+
+
+def get_host_limiter(url):
+    """Return the limiter of a URL's host, creating it on first use."""
+    parts = urlsplit(url)
+    if parts.netloc not in _host_limiters:
+        limit = HOST_LIMITS.get(parts.netloc) or HOST_LIMITS.get(parts.hostname, DEFAULT_HOST_LIMIT)
+        _host_limiters[parts.netloc] = HostLimiter(*limit)
+    return _host_limiters[parts.netloc]
+
+
+async def get_async(url, hedge_after=None, **kwargs):
+    """
+    Send a GET request through the shared HTTP client, respecting the host's concurrency and rate limits.
+
+    :param url: URL to request.
+    :param hedge_after: Optional number of seconds after which a slow request is hedged (see get_hedged_async).
+    :param kwargs: Arguments passed on to http_client.get (params, headers, timeout, verify...).
+    :return: requests.Response
+    """
+    if hedge_after is not None:
+        return await get_hedged_async(url, hedge_after, **kwargs)
+
+    limiter = get_host_limiter(url)
+    queued_at = time.perf_counter()
+    async with limiter.semaphore:
+        await limiter.wait_for_slot()
+        UPSTREAM_QUEUE_SECONDS.observe(urlsplit(url).netloc, value=time.perf_counter() - queued_at)
+        return await asyncio.get_running_loop().run_in_executor(
+            _http_executor, functools.partial(http_client.get, url, **kwargs)
+        )
+
+
+async def get_hedged_async(url, hedge_after, **kwargs):
+    """
+    Send a GET request and, if it has not completed after `hedge_after` seconds, a second identical one.
+
+    Whichever completes first is used, which cuts the tail latency of occasionally slow upstream
+    responses at the cost of some duplicate requests. Both still count against the host's limits.
+
+    :param url: URL to request.
+    :param hedge_after: Seconds to wait for the first request before sending the hedge.
+    :param kwargs: Arguments passed on to http_client.get.
+    :return: requests.Response
+    """
+    first = asyncio.ensure_future(get_async(url, **kwargs))
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result()
+
+    second = asyncio.ensure_future(get_async(url, **kwargs))
+    pending = {first, second}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        # A failed request only counts if the other one failed too
+        succeeded = [task for task in done if task.exception() is None]
+        if succeeded or not pending:
+            for task in pending:
+                task.cancel()  # The blocking HTTP call itself finishes in the background
+            return (succeeded or list(done))[0].result()
+
+
+async def run_in_thread(func, *args):
+    """
+    Run a blocking function (e.g., a whole fetcher) without blocking the event loop.
+
+    :param func: Function to call.
+    :param args: Positional arguments for the function.
+    :return: The function's result.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_task_executor, functools.partial(func, *args))
+
+
+def run(coroutine, timeout=None):
+    """
+    Run a coroutine on the engine's event loop and wait for its result. Used by synchronous code such as Flask views.
+
+    :param coroutine: Coroutine to run.
+    :param timeout: Maximum number of seconds to wait, or None to wait forever.
+    :return: The coroutine's result.
+    """
+    loop = get_loop()
+    if threading.current_thread() is _loop_thread:
+        coroutine.close()
+        raise RuntimeError("fetch_engine.run() called from the engine's own event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+
+def get(url, **kwargs):
+    """
+    Synchronous wrapper around get_async.
+
+    :param url: URL to request.
+    :param kwargs: Arguments passed on to http_client.get.
+    :return: requests.Response
+    """
+    return run(get_async(url, **kwargs))
+
+
+def get_many(requests_to_send):
+    """
+    Send several GET requests concurrently, each within its host's limits.
+
+    :param requests_to_send: Iterable of (url, kwargs) tuples.
+    :return: List of requests.Response in the same order.
+    """
+    async def send_all():
+        return await asyncio.gather(*(get_async(url, **kwargs) for url, kwargs in requests_to_send))
+
+    return run(send_all())
+
+
+def run_concurrently(*funcs):
+    """
+    Run several blocking functions concurrently on the engine and wait for all of them.
+
+    :param funcs: Functions without arguments.
+    :return: List of the functions' results in the same order.
+    """
+    async def run_all():
+        return await asyncio.gather(*(run_in_thread(func) for func in funcs))
+
+    return run(run_all())
@@ -1,37 +1,89 @@
-import requests
+import os
 
-OPENALEX_API_URL = "https://api.openalex.org/works"
+from data_fetching import fetch_engine
 
-def fetch_latest_research_papers(query="gender equality", per_page=15):
+OPENALEX_API_URL = os.environ.get("TRACKER_OPENALEX_API_URL", "https://api.openalex.org/works")
+
+# Only the fields the Research Explorer shows, instead of full work records with abstracts and references
+OPENALEX_SELECT_FIELDS = "id,display_name,publication_date,authorships,concepts,open_access,primary_location"
+
+# Works per cursor page (the API's maximum) and pages fetched per sync
+OPENALEX_PAGE_SIZE = 200
+OPENALEX_MAX_PAGES = int(os.environ.get("TRACKER_OPENALEX_MAX_PAGES", 5))
+
+
+def parse_work(item):
+    """
+    Turn an OpenAlex work record into the paper shown in the Research Explorer.
+
+    :param item: Work record with (at least) the OPENALEX_SELECT_FIELDS.
+    :return: Dictionary with the paper's id, title, authors, date, license, access, link, journal and top concepts.
+    """
+    # Extract top concepts based on score
+    concepts = sorted(item.get("concepts") or [], key=lambda c: c.get("score", 0), reverse=True)
+    top_concepts = [concept.get("display_name", "General") for concept in concepts[:3]]
+    primary_location = item.get("primary_location") or {}
+
+    return {
+        "id": item.get("id", "N/A"),
+        "title": item.get("display_name") or "No Title Available",
+        "authors": ", ".join([auth['author']['display_name'] for auth in item.get("authorships") or []]),
+        "publication_date": item.get("publication_date", "N/A"),
+        "license": primary_location.get("license"),
+        "open_access": (item.get("open_access") or {}).get("is_oa", False),
+        "link": primary_location.get("landing_page_url") or "#",
+        "journal": (primary_location.get("source") or {}).get("display_name"),
+        "categories": top_concepts
+    }
+
+
+def fetch_works_page(query, cursor, since=None):
     """
-    Fetch the latest research papers on gender equality from OpenAlex.
+    Fetch one cursor page of works matching a search query.
 
     :param query: Search query for papers.
-    :param per_page: Number of papers to fetch.
-    :return: A list of dictionaries with detailed paper information.
+    :param cursor: Cursor returned with the previous page, or '*' for the first one.
+    :param since: Optional first publication date (YYYY-MM-DD); pages then go from older to newer works.
+    :return: Tuple (list of papers, cursor of the next page or None), or None if the request failed.
+    """
+    params = {
+        "search": query,
+        "select": OPENALEX_SELECT_FIELDS,
+        "per-page": OPENALEX_PAGE_SIZE,
+        "cursor": cursor,
+        # Without a start date the newest works come first; with one, older first, so an
+        # interrupted sync never leaves a gap between the stored and the fetched works
+        "sort": "publication_date:asc" if since else "publication_date:desc",
+    }
+    if since:
+        params["filter"] = f"from_publication_date:{since}"
+
+    response = fetch_engine.get(OPENALEX_API_URL, params=params)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    results = data.get("results", [])
+    next_cursor = data.get("meta", {}).get("next_cursor")
+    return [parse_work(item) for item in results], (next_cursor if results else None)
+
+
+def fetch_research_works(query, since=None, max_pages=OPENALEX_MAX_PAGES):
     """
-    url = f"{OPENALEX_API_URL}?search={query}&sort=publication_date:desc&per-page={per_page}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        papers = []
-        for item in data.get("results", []):
-           
-            # Extract top concepts based on score
-            concepts = sorted(item.get("concepts", []), key=lambda c: c.get("score", 0), reverse=True)
-            top_concepts = [concept.get("display_name", "General") for concept in concepts[:3]]
-
-            paper = {
-                "id": item.get("id", "N/A"),
-                "title": item.get("display_name", "No Title Available"),
-                "authors": ", ".join([auth['author']['display_name'] for auth in item.get("authorships", [])]),
-                "publication_date": item.get("publication_date", "N/A"),
-                "license": item.get("license", {}).get("url", None),
-                "open_access": item.get("open_access", {}).get("is_oa", False),
-                "link": item.get("primary_location", {}).get("landing_page_url", "#"),
-                "categories": top_concepts
-            }
-            papers.append(paper)
-        return papers
-    return []
+    Fetch the works matching a search query, following cursors for up to max_pages pages.
 
+    :param query: Search query for papers.
+    :param since: Optional first publication date (YYYY-MM-DD) to fetch only newer works.
+    :param max_pages: Maximum number of pages to fetch.
+    :return: List of papers (possibly incomplete if the page limit was reached), or None if the
+             first page failed. Pages fetched before a later failure are returned.
+    """
+    papers, cursor = [], "*"
+    for page in range(max_pages):
+        result = fetch_works_page(query, cursor, since)
+        if result is None:
+            return papers if page else None
+        page_papers, cursor = result
+        papers.extend(page_papers)
+        if not cursor:
+            break
+    return papers
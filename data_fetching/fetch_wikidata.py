@@ -1,52 +1,210 @@
-import requests
+import logging
+import os
+from datetime import datetime, timezone
 
-WIKIDATA_SPARQL_URL = "https://query.wikidata.org/sparql"
+from data_fetching import cache, fetch_engine, http_client
 
-# SPARQL query to count streets and buildings named after women and men
-SPARQL_QUERY_GENDER_COUNTS = """
+try:
+    import ijson
+except ImportError:  # Optional; result pages are then parsed whole instead of as they arrive
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+WIKIDATA_SPARQL_URL = os.environ.get("TRACKER_WIKIDATA_SPARQL_URL", "https://query.wikidata.org/sparql")
+
+# The public endpoint cancels queries after 60 seconds, so wait slightly longer than that
+WIKIDATA_TIMEOUT = (http_client.HTTP_CONNECT_TIMEOUT, 65)
+
+# Result rows per SPARQL page, and pages fetched per query at most
+WIKIDATA_PAGE_SIZE = int(os.environ.get("TRACKER_WIKIDATA_PAGE_SIZE", 5000))
+WIKIDATA_MAX_PAGES = int(os.environ.get("TRACKER_WIKIDATA_MAX_PAGES", 200))
+
+# Genders of the people places are named after
+GENDERS = {
+    "Q6581072": "female",
+    "Q6581097": "male",
+}
+
+SPARQL_PREFIXES = """
 PREFIX wdt: <http://www.wikidata.org/prop/direct/>
 PREFIX wd: <http://www.wikidata.org/entity/>
 PREFIX p: <http://www.wikidata.org/prop/>
 PREFIX ps: <http://www.wikidata.org/prop/statement/>
 PREFIX pq: <http://www.wikidata.org/prop/qualifier/>
 PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX wikibase: <http://wikiba.se/ontology#>
-PREFIX bd: <http://www.bigdata.com/rdf#>
+PREFIX schema: <http://schema.org/>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
 
-SELECT ?genderLabel (COUNT(DISTINCT ?item) AS ?count) WHERE {
-  ?item wdt:P31/wdt:P279* ?class .
+# Every class of streets and buildings; resolved once and cached, so the item query needs no subclass walk
+SPARQL_QUERY_NAMED_PLACE_CLASSES = SPARQL_PREFIXES + """
+SELECT DISTINCT ?class WHERE {
   VALUES ?superclass { wd:Q83620 wd:Q41176 }  # Streets, buildings, etc.
   ?class wdt:P279* ?superclass .
-  ?item wdt:P17 wd:Q212 .
-  ?item p:P138 ?statement .
+}
+ORDER BY ?class
+LIMIT {limit} OFFSET {offset}
+"""
+
+# Every administrative entity of Ukraine with the oblast (or Kyiv, Sevastopol, Crimea) it lies in
+SPARQL_QUERY_REGIONS = SPARQL_PREFIXES + """
+SELECT ?entity ?entityLabel ?region ?regionLabel WHERE {
+  { ?region wdt:P31 wd:Q3348196 . }  # Oblasts
+  UNION
+  { VALUES ?region { wd:Q1899 wd:Q7525 wd:Q756294 } }  # Kyiv, Sevastopol, Crimea
+  ?entity wdt:P131* ?region .
+  OPTIONAL { ?entity rdfs:label ?entityLabel . FILTER (LANG(?entityLabel) = "en") }
+  OPTIONAL { ?region rdfs:label ?regionLabel . FILTER (LANG(?regionLabel) = "en") }
+}
+ORDER BY ?entity ?region
+LIMIT {limit} OFFSET {offset}
+"""
+
+# Items in Ukraine named after a woman or a man, one row per class, location and namesake; optionally
+# only those edited since a given time. No labels and no subclass walks, which kept the former
+# national count query close to the endpoint's timeout.
+SPARQL_QUERY_NAMED_ITEMS = SPARQL_PREFIXES + """
+SELECT ?item ?modified ?class ?admin ?namedAfter ?gender ?startTime ?endTime WHERE {
+  ?item wdt:P17 wd:Q212 ;
+        p:P138 ?statement ;
+        schema:dateModified ?modified .
+  {since_filter}
   ?statement ps:P138 ?namedAfter .
-  OPTIONAL { ?statement pq:P580 ?startTime . }
-  OPTIONAL { ?statement pq:P582 ?endTime . }
-  FILTER (
-    ( !BOUND(?startTime) || ?startTime <= NOW() ) &&
-    ( !BOUND(?endTime) || ?endTime > NOW() )
-  )
   ?namedAfter wdt:P21 ?gender .
   VALUES ?gender { wd:Q6581097 wd:Q6581072 }  # Male, Female
-  SERVICE wikibase:label { bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }
+  OPTIONAL { ?item wdt:P31 ?class . }
+  OPTIONAL { ?item wdt:P131 ?admin . }
+  OPTIONAL { ?statement pq:P580 ?startTime . }
+  OPTIONAL { ?statement pq:P582 ?endTime . }
 }
-GROUP BY ?genderLabel
-ORDER BY ?genderLabel
+ORDER BY ?item ?namedAfter ?class ?admin
+LIMIT {limit} OFFSET {offset}
 """
 
-def fetch_gender_named_counts():
-    """
-    Fetch counts of streets and buildings in Ukraine named after women and men from Wikidata.
-    
-    :return: Dictionary with gender labels as keys and their counts as values.
-    """
-    headers = {"Accept": "application/json"}
-    response = requests.get(WIKIDATA_SPARQL_URL, headers=headers, params={"query": SPARQL_QUERY_GENDER_COUNTS})
-    
-    if response.status_code == 200:
-        results = response.json()["results"]["bindings"]
-        counts = {result["genderLabel"]["value"]: int(result["count"]["value"]) for result in results}
-        print(counts)
-        return counts
-    else:
-        raise Exception(f"Failed to fetch data from Wikidata: {response.status_code}")
+
+def entity_id(binding, name):
+    """Return the Q-identifier of an entity in a result row, or None if it is unbound."""
+    value = binding.get(name, {}).get("value")
+    return value.rsplit("/", 1)[-1] if value else None
+
+
+def literal(binding, name):
+    """Return a literal of a result row, or None if it is unbound."""
+    return binding.get(name, {}).get("value")
+
+
+def iter_bindings(response):
+    """Yield the result rows of a SPARQL JSON response, parsing the body as it arrives if ijson is installed."""
+    if ijson is None:
+        yield from response.json()["results"]["bindings"]
+        return
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, "results.bindings.item")
+
+
+def run_paged_query(query, **substitutions):
+    """
+    Run a SPARQL query page by page, LIMIT/OFFSET being filled in for every page.
+
+    :param query: Query with {limit} and {offset} placeholders (and any other substitutions).
+    :param substitutions: Values of the query's other placeholders.
+    :return: List of result rows, or None if a page could not be fetched.
+    """
+    headers = {"Accept": "application/sparql-results+json"}
+    rows = []
+    for page in range(WIKIDATA_MAX_PAGES):
+        # str.format would trip over the braces of the query itself
+        page_query = query.replace("{limit}", str(WIKIDATA_PAGE_SIZE)).replace("{offset}", str(page * WIKIDATA_PAGE_SIZE))
+        for placeholder, value in substitutions.items():
+            page_query = page_query.replace("{" + placeholder + "}", value)
+
+        response = fetch_engine.get(
+            WIKIDATA_SPARQL_URL, headers=headers, params={"query": page_query}, timeout=WIKIDATA_TIMEOUT, stream=True
+        )
+        with response:
+            if response.status_code != 200:
+                logger.warning("Wikidata query page %d failed with status %s", page, response.status_code)
+                return None
+            page_rows = list(iter_bindings(response))
+        rows.extend(page_rows)
+        if len(page_rows) < WIKIDATA_PAGE_SIZE:
+            return rows
+    logger.warning("Wikidata query stopped after %d pages", WIKIDATA_MAX_PAGES)
+    return rows
+
+
+def fetch_named_place_classes():
+    """
+    Return the classes of streets and buildings (all subclasses of street and building).
+
+    :return: List of class identifiers (e.g., 'Q79007'), or None if unavailable.
+    """
+    return cache.cached_fetch(
+        "wikidata_reference", "ALL", "named_place_classes", fetch_named_place_classes_from_wikidata
+    )
+
+
+def fetch_named_place_classes_from_wikidata():
+    """Resolve the street and building class closure against the live Wikidata endpoint."""
+    rows = run_paged_query(SPARQL_QUERY_NAMED_PLACE_CLASSES)
+    return None if rows is None else [entity_id(row, "class") for row in rows]
+
+
+def fetch_regions():
+    """
+    Return the region (oblast, Kyiv, Sevastopol or Crimea) of every administrative entity of Ukraine.
+
+    :return: Dictionary mapping entity identifiers to [entity label, region identifier, region label],
+             or None if unavailable.
+    """
+    return cache.cached_fetch("wikidata_reference", "UA", "regions", fetch_regions_from_wikidata)
+
+
+def fetch_regions_from_wikidata():
+    """Resolve the regions of Ukraine's administrative entities against the live Wikidata endpoint."""
+    rows = run_paged_query(SPARQL_QUERY_REGIONS)
+    if rows is None:
+        return None
+    regions = {}
+    for row in rows:
+        entity, region = entity_id(row, "entity"), entity_id(row, "region")
+        # An entity lying in two regions (e.g., after a border change) keeps the first one
+        regions.setdefault(entity, [literal(row, "entityLabel") or entity, region, literal(row, "regionLabel") or region])
+    return regions
+
+
+def fetch_named_items(since=None):
+    """
+    Fetch the items in Ukraine named after women or men from the live Wikidata endpoint.
+
+    :param since: Optional ISO timestamp; only items edited since then are fetched.
+    :return: Dictionary mapping item identifiers to records with the item's last edit time ('modified'),
+             classes, administrative entities and namesakes ([person, gender, start time, end time]),
+             or None if the items could not be fetched.
+    """
+    since_filter = f'FILTER (?modified >= "{since}"^^xsd:dateTime)' if since else ""
+    rows = run_paged_query(SPARQL_QUERY_NAMED_ITEMS, since_filter=since_filter)
+    if rows is None:
+        return None
+
+    items = {}
+    for row in rows:
+        item = entity_id(row, "item")
+        record = items.setdefault(item, {"modified": literal(row, "modified"), "classes": [], "admins": [], "namesakes": []})
+        for key, name in (("classes", "class"), ("admins", "admin")):
+            value = entity_id(row, name)
+            if value and value not in record[key]:
+                record[key].append(value)
+        namesake = [entity_id(row, "namedAfter"), GENDERS.get(entity_id(row, "gender")),
+                    literal(row, "startTime"), literal(row, "endTime")]
+        if namesake not in record["namesakes"]:
+            record["namesakes"].append(namesake)
+    return items
+
+
+def is_current(namesake, now=None):
+    """Return True if a naming ([person, gender, start time, end time]) has started and not ended."""
+    now = now or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _, _, start_time, end_time = namesake
+    return (not start_time or start_time <= now) and (not end_time or end_time > now)
@@ -1,116 +1,124 @@
-import requests
+import os
 
-WORLD_BANK_API_URL = "https://api.worldbank.org/v2/country/{country_code}/indicator/{indicator_code}?format=json"
-REST_COUNTRIES_API_URL = "https://restcountries.com/v3.1/alpha/{country_code}"
+from data_fetching import cache, country_metadata, fetch_engine
 
-# Dictionary to cache country names
-country_name_cache = {}
+# Base URL of the World Bank API (overridable, e.g. to point at a local stub for benchmarks)
+WORLD_BANK_API_URL = os.environ.get("TRACKER_WORLD_BANK_API_URL", "https://api.worldbank.org/v2")
+WORLD_BANK_BATCH_API_URL = WORLD_BANK_API_URL + "/country/{country_codes}/indicator/{indicator_codes}"
 
-def get_country_name(country_code):
-    """
-    Retrieve the full country name for a given ISO country code using REST Countries API.
+# Seconds after which a slow World Bank page request is hedged with a duplicate one (unset: never)
+WORLD_BANK_HEDGE_AFTER = float(os.environ["TRACKER_WORLD_BANK_HEDGE_AFTER"]) if os.environ.get("TRACKER_WORLD_BANK_HEDGE_AFTER") else None
 
-    :param country_code: The ISO country code (e.g., 'POL' for Poland).
-    :return: Full country name (e.g., 'Poland') or the country code if not found.
+def get_country_names(country_codes):
     """
-    if country_code in country_name_cache:
-        return country_name_cache[country_code]
-
-    response = requests.get(REST_COUNTRIES_API_URL.format(country_code=country_code), verify=False)
-    if response.status_code == 200:
-        data = response.json()
-        country_name = data[0].get("name", {}).get("common", country_code)
-        country_name_cache[country_code] = country_name  # Cache the result
-        return country_name
+    Retrieve full country names for many ISO country codes.
 
-    # If API fails, return the code itself as a fallback
-    return country_code
+    :param country_codes: List of ISO country codes (e.g., ['POL', 'HUN']).
+    :return: Dictionary mapping each code to its full name (or the code itself if not found).
+    """
+    metadata = country_metadata.get_metadata()
+    return {code: metadata.name(code) for code in country_codes}
 
 def get_neighboring_country_codes(main_country_code):
     """
-    Retrieve a list of neighboring country codes for a given country using the REST Countries API.
+    Retrieve a list of neighboring country codes for a given country from the country metadata.
 
     :param main_country_code: The country code for the main country (e.g., 'UA' for Ukraine).
     :return: A list of neighboring country codes.
     """
-    response = requests.get(REST_COUNTRIES_API_URL.format(country_code=main_country_code), verify=False)
-    if response.status_code == 200:
-        data = response.json()
-        # Extract the list of neighboring countries' codes
-        neighbors = data[0].get("borders", [])
-        return neighbors
-    return []
+    return country_metadata.get_metadata().neighbors(main_country_code)
 
-def fetch_gender_equality_data(country_code, indicator_code, decimals=2):
+def fetch_country_classifications():
     """
-    Fetch gender equality metric from the World Bank for a specific country and indicator.
+    Retrieve the World Bank region and income level of every country, backed by the persistent cache.
 
-    :param country_code: Country code (e.g., 'UA' for Ukraine)
-    :param indicator_code: Indicator code for the metric to fetch
-    :param decimals: Number of decimal places to round the returned value
-    :return: Tuple containing the latest available value (rounded to 'decimals' places) 
-             and the year of that value, or (None, None) if data is unavailable.
+    :return: Dictionary mapping ISO3 codes to {'name', 'region_id', 'region', 'income_id', 'income'},
+             or None if the World Bank could not be reached.
     """
-    url = WORLD_BANK_API_URL.format(country_code=country_code, indicator_code=indicator_code)
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        if len(data) > 1 and data[1]:  # Ensure data exists
-            for record in data[1]:
-                if record['value'] is not None:  # Find the latest non-null value
-                    latest_value = round(record['value'], decimals)
-                    latest_year = record['date']
-                    return latest_value
-    return None  # Return None for both if data is unavailable
+    return cache.cached_fetch("world_bank", "", "country_classifications", fetch_country_classifications_from_world_bank)
 
+def fetch_country_classifications_from_world_bank(per_page=500):
+    """
+    Fetch the World Bank country list in a single request, leaving out aggregates such as "World".
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+    :param per_page: Number of records requested (more than the number of countries and aggregates)
+    :return: Dictionary mapping ISO3 codes to their classifications, or None if the request failed.
+    """
+    response = fetch_engine.get(WORLD_BANK_API_URL + "/country", params={"format": "json", "per_page": per_page})
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if len(data) < 2 or not data[1]:
+        return None
+
+    classifications = {}
+    for record in data[1]:
+        region = record.get("region") or {}
+        if region.get("id") in (None, "", "NA"):
+            continue  # Aggregates
+        income = record.get("incomeLevel") or {}
+        classifications[record["id"]] = {
+            "name": (record.get("name") or record["id"]).strip(),
+            "region_id": region["id"],
+            "region": (region.get("value") or region["id"]).strip(),
+            # Countries not classified by income (e.g., Venezuela) have the id "INX"
+            "income_id": income.get("id") if income.get("id") not in (None, "", "NA", "INX") else None,
+            "income": (income.get("value") or "").strip(),
+        }
+    return classifications
+
+def fetch_records(country_codes, indicator_codes, params, per_page=1000):
+    """
+    Fetch all records of a batched World Bank query, requesting the pages after the first one concurrently.
 
-def fetch_gender_equality_data_for_neighbors(main_country_code, indicators):
+    :param country_codes: List of ISO2 or ISO3 country codes (e.g., ['UA', 'POL'])
+    :param indicator_codes: List of World Bank indicator codes
+    :param params: Extra query parameters (e.g., {'mrnev': 1} or {'date': '2015:2023'})
+    :param per_page: Number of records requested per page
+    :return: List of World Bank records, or None if the World Bank could not be reached.
     """
-    Fetch gender equality metrics for neighboring countries using threading for faster performance.
+    url = WORLD_BANK_BATCH_API_URL.format(
+        country_codes=";".join(country_codes),
+        indicator_codes=";".join(indicator_codes),
+    )
+    params = {"format": "json", "source": 2, "per_page": per_page, **params}
+
+    # The first page tells how many pages there are; the rest are fetched concurrently
+    responses = [fetch_engine.get(url, params={**params, "page": 1}, hedge_after=WORLD_BANK_HEDGE_AFTER)]
+    if responses[0].status_code == 200:
+        data = responses[0].json()
+        pages = data[0].get("pages", 1) if len(data) > 1 else 1
+        responses += fetch_engine.get_many(
+            [(url, {"params": {**params, "page": page}, "hedge_after": WORLD_BANK_HEDGE_AFTER}) for page in range(2, pages + 1)]
+        )
+
+    records = []
+    for response in responses:
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if len(data) > 1 and data[1]:
+            records.extend(data[1])
+    return records
 
-    :param main_country_code: The main country's code (e.g., 'UA' for Ukraine)
-    :param indicators: Dictionary of indicator codes to fetch
-    :return: Dictionary with neighboring country names as keys and their gender equality data as values.
+def fetch_history_values(country_codes, indicator_codes, start_year, end_year, per_page=5000):
+    """
+    Fetch yearly values of many series for a range of years straight from the World Bank.
+
+    :param country_codes: List of ISO3 country codes (e.g., ['UKR', 'POL'])
+    :param indicator_codes: List of World Bank indicator codes
+    :param start_year: First year to fetch (inclusive)
+    :param end_year: Last year to fetch (inclusive)
+    :param per_page: Number of records requested per page
+    :return: List of (iso3_code, indicator_code, year, value) tuples for non-empty values,
+             or None if the World Bank could not be reached.
     """
-    neighbor_codes = get_neighboring_country_codes(main_country_code)
-    neighbor_data = {}
-
-    def fetch_data_for_country_and_indicator(country_code, indicator_key, indicator_code):
-        """
-        Fetch data for a specific country and indicator.
-        :param country_code: ISO code of the country
-        :param indicator_key: Key for the indicator in the result dictionary
-        :param indicator_code: World Bank indicator code
-        :return: Tuple (country_code, indicator_key, fetched_data)
-        """
-        return country_code, indicator_key, fetch_gender_equality_data(country_code, indicator_code)
-
-    with ThreadPoolExecutor() as executor:
-        futures = []
-
-        # Submit all tasks for each neighbor and indicator
-        for code in neighbor_codes:
-            for key, indicator_code in indicators.items():
-                futures.append(executor.submit(fetch_data_for_country_and_indicator, code, key, indicator_code))
-
-        # Collect results as they complete
-        for future in as_completed(futures):
-            country_code, indicator_key, fetched_data = future.result()
-
-            # Get the country name if not already cached
-            country_name = get_country_name(country_code)
-            if country_name not in neighbor_data:
-                neighbor_data[country_name] = {}
-
-            # Add the fetched data to the correct place
-            neighbor_data[country_name][indicator_key] = fetched_data
-
-    # Handle countries with no data (None) by assigning 'N/A'
-    for country, metrics in neighbor_data.items():
-        for key, value in metrics.items():
-            if value is None:
-                metrics[key] = "N/A"
-
-    return neighbor_data
\ No newline at end of file
+    records = fetch_records(country_codes, indicator_codes, {"date": f"{start_year}:{end_year}"}, per_page)
+    if records is None:
+        return None
+
+    return [
+        (record["countryiso3code"], record["indicator"]["id"], int(record["date"]), record["value"])
+        for record in records
+        if record.get("value") is not None and record.get("countryiso3code")
+    ]
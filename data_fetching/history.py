@@ -0,0 +1,239 @@
+import time
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+from data_fetching import cache, single_flight
+from data_fetching.fetch_world_bank import fetch_history_values
+from data_processing.indicator_store import IndicatorStore
+from monitoring.metrics import instrument
+
+# First year of the World Development Indicators
+FIRST_YEAR = 1960
+
+
+def get_connection():
+    """
+    Return the cache database connection with the history tables created.
+
+    :return: sqlite3.Connection
+    """
+    connection = cache.get_connection()
+    with connection:
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS indicator_history (
+                country TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (country, indicator, year)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS indicator_history_sync (
+                country TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                last_year INTEGER NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (country, indicator)
+            )
+            """
+        )
+    return connection
+
+
+def store_values(rows, synced_series=()):
+    """
+    Store yearly values and record the latest stored year of every synced series.
+
+    :param rows: List of (iso3_code, indicator_code, year, value) tuples.
+    :param synced_series: Iterable of (iso3_code, indicator_code) pairs whose sync just completed.
+    """
+    connection = get_connection()
+    with connection:
+        write_values(connection, rows, synced_series)
+
+
+def write_values(connection, rows, synced_series=()):
+    """
+    Write what store_values stores within the caller's transaction, without committing it.
+
+    :param connection: Connection returned by get_connection().
+    :param rows: List of (iso3_code, indicator_code, year, value) tuples.
+    :param synced_series: Iterable of (iso3_code, indicator_code) pairs whose sync just completed.
+    """
+    last_years = {}
+    for country, indicator, year, _ in rows:
+        last_years[(country, indicator)] = max(year, last_years.get((country, indicator), year))
+
+    connection.executemany(
+        "INSERT OR REPLACE INTO indicator_history (country, indicator, year, value) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    connection.executemany(
+        """
+        INSERT INTO indicator_history_sync (country, indicator, last_year, synced_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (country, indicator) DO UPDATE SET
+            last_year = MAX(last_year, excluded.last_year), synced_at = excluded.synced_at
+        """,
+        [
+            (country, indicator, last_years.get((country, indicator), FIRST_YEAR - 1), time.time())
+            for country, indicator in synced_series
+        ],
+    )
+
+
+def get_sync_state():
+    """
+    Return the latest stored year and the last sync time of every series.
+
+    :return: Dictionary mapping (iso3_code, indicator_code) to (last_year, synced_at).
+    """
+    return {
+        (country, indicator): (last_year, synced_at)
+        for country, indicator, last_year, synced_at in get_connection().execute(
+            "SELECT country, indicator, last_year, synced_at FROM indicator_history_sync"
+        )
+    }
+
+
+def get_history_versions(country_codes):
+    """
+    Return when the stored history of each country was last synced, which changes whenever its values may have.
+
+    :param country_codes: List of ISO3 country codes (e.g., ['UKR', 'POL'])
+    :return: Dictionary mapping every given code to its latest sync time (0 if it was never synced).
+    """
+    placeholders = ",".join("?" * len(country_codes))
+    versions = dict.fromkeys(country_codes, 0)
+    versions.update(get_connection().execute(
+        f"SELECT country, MAX(synced_at) FROM indicator_history_sync WHERE country IN ({placeholders}) GROUP BY country",
+        list(country_codes),
+    ).fetchall())
+    return versions
+
+
+@instrument()
+def sync_indicator_history(country_codes, indicators):
+    """
+    Bring the stored history of every (country, indicator) series up to date.
+
+    Series synced within the World Bank TTL are skipped. The others only request the years after
+    their latest stored value, grouped so that series sharing a start year go into one batched request.
+
+    :param country_codes: List of ISO3 country codes (e.g., ['UKR', 'POL'])
+    :param indicators: Dictionary mapping indicator keys to World Bank indicator codes
+    :return: Number of yearly values stored.
+    """
+    if cache.is_offline():
+        return 0
+
+    end_year = date.today().year
+    ttl = cache.SOURCE_TTLS["world_bank"]
+    synced = get_sync_state()
+
+    # Group outdated series by the first year they still need
+    series_by_start_year = defaultdict(set)
+    for country in country_codes:
+        for indicator_code in indicators.values():
+            last_year, synced_at = synced.get((country, indicator_code), (FIRST_YEAR - 1, 0))
+            if time.time() - synced_at >= ttl:
+                series_by_start_year[min(last_year + 1, end_year)].add((country, indicator_code))
+
+    stored = 0
+    for start_year, series in sorted(series_by_start_year.items()):
+        countries = sorted({country for country, _ in series})
+        indicator_codes = sorted({indicator_code for _, indicator_code in series})
+
+        def sync():
+            rows = fetch_history_values(countries, indicator_codes, start_year, end_year)
+            if rows is None:
+                return 0
+            store_values(rows, [(c, i) for c in countries for i in indicator_codes])
+            return len(rows)
+
+        def recheck():
+            # Another worker process may have synced these series while this one waited
+            sync_state = get_sync_state()
+            if all(time.time() - sync_state.get(pair, (0, 0))[1] < ttl for pair in series):
+                return 0
+            return single_flight.NOT_FOUND
+
+        stored += single_flight.do(("world_bank_history", start_year, tuple(sorted(series))), sync, recheck)
+    return stored
+
+
+def get_series(country_code, indicator_code, since=None):
+    """
+    Return the stored yearly values of one series.
+
+    :param country_code: ISO3 country code (e.g., 'UKR')
+    :param indicator_code: World Bank indicator code
+    :param since: Optional first year to include
+    :return: List of (year, value) tuples in ascending order of years.
+    """
+    return get_connection().execute(
+        "SELECT year, value FROM indicator_history WHERE country = ? AND indicator = ? AND year >= ? ORDER BY year",
+        (country_code, indicator_code, since or FIRST_YEAR),
+    ).fetchall()
+
+
+def get_trend(country_code, indicator_code, since=None):
+    """
+    Summarize how a series changed over time.
+
+    :param country_code: ISO3 country code (e.g., 'UKR')
+    :param indicator_code: World Bank indicator code
+    :param since: Optional first year to include
+    :return: Dictionary with the first and last observation, the total change and the average
+             yearly change (least-squares slope), or None if fewer than two values are stored.
+    """
+    series = get_series(country_code, indicator_code, since)
+    if len(series) < 2:
+        return None
+
+    years, values = np.array(series, dtype=np.float64).T
+    return {
+        "start_year": int(years[0]),
+        "start_value": float(values[0]),
+        "end_year": int(years[-1]),
+        "end_value": float(values[-1]),
+        "change": float(values[-1] - values[0]),
+        "annual_change": float(np.polyfit(years, values, 1)[0]),
+        "series": [(int(year), float(value)) for year, value in series],
+    }
+
+
+@instrument()
+def load_indicator_store(country_names, indicators):
+    """
+    Load the stored history of many series into an IndicatorStore.
+
+    :param country_names: Dictionary mapping ISO3 country codes to the names used in the store
+    :param indicators: Dictionary mapping indicator keys to World Bank indicator codes
+    :return: IndicatorStore with one year per column, from the earliest to the latest stored year.
+    """
+    country_positions = {code: i for i, code in enumerate(country_names)}
+    indicator_positions = {indicator_code: i for i, indicator_code in enumerate(indicators.values())}
+
+    country_placeholders = ",".join("?" * len(country_positions))
+    indicator_placeholders = ",".join("?" * len(indicator_positions))
+    rows = get_connection().execute(
+        f"""
+        SELECT country, indicator, year, value FROM indicator_history
+        WHERE country IN ({country_placeholders}) AND indicator IN ({indicator_placeholders})
+        """,
+        [*country_positions, *indicator_positions],
+    ).fetchall()
+
+    years = sorted({row[2] for row in rows})
+    year_positions = {year: i for i, year in enumerate(years)}
+    values = np.full((len(country_positions), len(indicator_positions), len(years)), np.nan)
+    for country, indicator_code, year, value in rows:
+        values[country_positions[country], indicator_positions[indicator_code], year_positions[year]] = value
+
+    return IndicatorStore(country_names.values(), indicators.keys(), years, values)
@@ -0,0 +1,118 @@
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from monitoring.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_REQUEST_SECONDS, UPSTREAM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Connections kept alive per upstream host; sized to the number of concurrent fetches
+HTTP_POOL_SIZE = int(os.environ.get("TRACKER_HTTP_POOL_SIZE", 16))
+# Number of distinct hosts whose pools are kept (World Bank, REST Countries, Wikidata, OpenAlex, DBPedia)
+HTTP_POOL_HOSTS = 8
+
+# Seconds allowed for connecting and for waiting on the response
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("TRACKER_HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("TRACKER_HTTP_READ_TIMEOUT", 30))
+
+# Retries with jittered exponential backoff on throttling, server errors and connection problems
+HTTP_MAX_RETRIES = int(os.environ.get("TRACKER_HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 10
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Ask upstreams for gzip-compressed bodies
+HTTP_COMPRESSION = os.environ.get("TRACKER_HTTP_COMPRESSION", "1") == "1"
+
+USER_AGENT = "gender-equality-tracker (+https://github.com/raccoon-hero/gender-equality-tracker)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide requests session with pooled keep-alive connections.
+
+    :return: requests.Session shared by all fetchers.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "User-Agent": USER_AGENT,
+                    "Accept-Encoding": "gzip, deflate" if HTTP_COMPRESSION else "identity",
+                })
+                _session = session
+    return _session
+
+
+def backoff_delay(attempt, response=None):
+    """
+    Return how long to sleep before the next attempt.
+
+    Honors a numeric Retry-After header, otherwise uses exponential backoff with full jitter.
+
+    :param attempt: Number of the attempt that just failed, starting at 0.
+    :param response: The failed response, if any.
+    :return: Delay in seconds.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def get(url, params=None, headers=None, timeout=None, retries=HTTP_MAX_RETRIES, **kwargs):
+    """
+    Send a GET request through the shared session with bounded timeouts and retries.
+
+    :param url: URL to request.
+    :param params: Query string parameters.
+    :param headers: Extra request headers.
+    :param timeout: (connect, read) timeout tuple; defaults to the configured timeouts.
+    :param retries: Number of retries on 429/5xx responses and connection errors.
+    :param kwargs: Other arguments passed on to requests (e.g., verify, stream).
+    :return: requests.Response of the last attempt.
+    :raises requests.RequestException: If the upstream could not be reached after all retries.
+    """
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    session = get_session()
+    host = urlsplit(url).netloc
+
+    for attempt in range(retries + 1):
+        started_at = time.perf_counter()
+        try:
+            with UPSTREAM_IN_FLIGHT.track_in_progress(host):
+                response = session.get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            UPSTREAM_REQUEST_SECONDS.observe(host, value=time.perf_counter() - started_at)
+            UPSTREAM_REQUESTS.inc(host, "error")
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning("GET %s failed (%s), retrying in %.1fs", url, error, delay)
+            time.sleep(delay)
+            continue
+
+        UPSTREAM_REQUEST_SECONDS.observe(host, value=time.perf_counter() - started_at)
+        UPSTREAM_REQUESTS.inc(host, str(response.status_code))
+        if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+            return response
+
+        delay = backoff_delay(attempt, response)
+        logger.warning("GET %s returned %s, retrying in %.1fs", url, response.status_code, delay)
+        response.close()
+        time.sleep(delay)
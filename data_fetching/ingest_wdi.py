@@ -0,0 +1,155 @@
+import csv
+import io
+import logging
+import math
+import os
+import time
+import zipfile
+
+from data_fetching import history
+
+logger = logging.getLogger(__name__)
+
+# Names of the data file inside the bulk archive (current and older WDI releases)
+WDI_DATA_FILES = ("WDICSV.csv", "WDIData.csv")
+
+# Number of matching CSV rows stored per transaction
+INGEST_BATCH_ROWS = 500
+
+
+def get_connection():
+    """
+    Return the cache database connection with the ingestion progress table created.
+
+    :return: sqlite3.Connection
+    """
+    connection = history.get_connection()
+    with connection:
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingest_progress (
+                archive TEXT PRIMARY KEY,
+                rows_done INTEGER NOT NULL,
+                completed INTEGER NOT NULL
+            )
+            """
+        )
+    return connection
+
+
+def archive_fingerprint(archive_path):
+    """Identify an archive by its path, size and modification time, so a replaced file starts over."""
+    stat = os.stat(archive_path)
+    return f"{os.path.abspath(archive_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def find_data_file(archive):
+    """
+    Find the indicator data CSV inside a WDI bulk archive.
+
+    :param archive: Open zipfile.ZipFile
+    :return: Name of the data file within the archive.
+    """
+    for name in archive.namelist():
+        if os.path.basename(name) in WDI_DATA_FILES:
+            return name
+    raise ValueError(f"No WDI data file ({', '.join(WDI_DATA_FILES)}) found in the archive")
+
+
+def ingest_wdi_archive(archive_path, indicators, batch_rows=INGEST_BATCH_ROWS):
+    """
+    Stream a World Bank WDI bulk archive (zip of CSVs) into the stored indicator history.
+
+    The data CSV is read row by row straight from the archive, only rows of the given indicators
+    are kept, and every batch is committed in one transaction with the number of rows read so far,
+    so an interrupted run resumes where it stopped. Cells that are not numbers are skipped and counted.
+
+    :param archive_path: Path to the downloaded WDI_CSV.zip
+    :param indicators: Dictionary mapping indicator keys to World Bank indicator codes
+    :param batch_rows: Number of matching CSV rows stored per transaction
+    :return: Dictionary with the status ('completed', or 'already_complete' if the archive was ingested
+             before and nothing was read), rows read, series ingested, values stored, cells skipped,
+             seconds taken and rows per second.
+    """
+    indicator_codes = set(indicators.values())
+    fingerprint = archive_fingerprint(archive_path)
+    connection = get_connection()
+
+    progress = connection.execute(
+        "SELECT rows_done, completed FROM ingest_progress WHERE archive = ?", (fingerprint,)
+    ).fetchone()
+    rows_done, completed = progress or (0, 0)
+    if completed:
+        logger.info("%s was already ingested, skipping it", archive_path)
+        return {
+            "status": "already_complete", "rows_read": 0, "series_ingested": 0, "values_stored": 0,
+            "cells_skipped": 0, "seconds": 0.0, "rows_per_second": 0.0,
+        }
+    if rows_done:
+        logger.info("Resuming %s after %d rows", archive_path, rows_done)
+
+    started_at = time.monotonic()
+    rows_read = series_ingested = values_stored = cells_skipped = 0
+    pending_rows, pending_series = [], []
+
+    def flush(rows_position):
+        nonlocal values_stored, pending_rows, pending_series
+        with connection:
+            history.write_values(connection, pending_rows, pending_series)
+            connection.execute(
+                "INSERT OR REPLACE INTO ingest_progress (archive, rows_done, completed) VALUES (?, ?, 0)",
+                (fingerprint, rows_position),
+            )
+        values_stored += len(pending_rows)
+        pending_rows, pending_series = [], []
+
+    with zipfile.ZipFile(archive_path) as archive:
+        with archive.open(find_data_file(archive)) as data_file:
+            reader = csv.reader(io.TextIOWrapper(data_file, encoding="utf-8-sig", newline=""))
+            header = next(reader)
+            country_column = header.index("Country Code")
+            indicator_column = header.index("Indicator Code")
+            year_columns = [(position, int(name)) for position, name in enumerate(header) if name.strip().isdigit()]
+
+            for position, row in enumerate(reader, start=1):
+                if position <= rows_done:
+                    continue
+                rows_read += 1
+
+                if len(row) > indicator_column and row[indicator_column] in indicator_codes:
+                    country, indicator_code = row[country_column], row[indicator_column]
+                    pending_series.append((country, indicator_code))
+                    for column, year in year_columns:
+                        if column < len(row) and row[column]:
+                            try:
+                                value = float(row[column])
+                            except ValueError:
+                                value = math.nan
+                            if math.isfinite(value):
+                                pending_rows.append((country, indicator_code, year, value))
+                            else:
+                                cells_skipped += 1
+                    series_ingested += 1
+                    if len(pending_series) >= batch_rows:
+                        flush(position)
+
+                if rows_read % 100000 == 0:
+                    logger.info("Read %d rows (%.0f rows/s)", rows_read, rows_read / (time.monotonic() - started_at))
+
+            flush(position if rows_read else rows_done)
+
+    with connection:
+        connection.execute("UPDATE ingest_progress SET completed = 1 WHERE archive = ?", (fingerprint,))
+
+    seconds = time.monotonic() - started_at
+    summary = {
+        "status": "completed",
+        "rows_read": rows_read,
+        "series_ingested": series_ingested,
+        "values_stored": values_stored,
+        "cells_skipped": cells_skipped,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows_read / seconds, 1) if seconds > 0 else 0.0,
+    }
+    logger.info("Ingested %s: %s", archive_path, summary)
+    return summary
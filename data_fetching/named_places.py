@@ -0,0 +1,237 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+from data_fetching import cache, single_flight
+from data_fetching.fetch_wikidata import fetch_named_items, fetch_named_place_classes, fetch_regions, is_current
+from monitoring.metrics import instrument
+
+# Country the named places are synced for (Wikidata's Ukraine, Q212)
+NAMED_PLACES_COUNTRY = "UA"
+
+# Seconds between full syncs; in between only items edited since the last sync are fetched, so items
+# that lost their namesake (or namesakes whose gender was corrected) are only caught up with then
+WIKIDATA_FULL_SYNC_INTERVAL = float(os.environ.get("TRACKER_WIKIDATA_FULL_SYNC_DAYS", 7)) * 24 * 3600
+
+# Breakdowns precomputed after every sync, besides the national total
+NAMING_DIMENSIONS = ["region", "locality", "decade"]
+
+
+def get_connection():
+    """
+    Return the cache database connection with the named places tables created.
+
+    :return: sqlite3.Connection
+    """
+    connection = cache.get_connection()
+    with connection:
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS named_places (
+                country TEXT NOT NULL,
+                item TEXT NOT NULL,
+                modified TEXT NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (country, item)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS named_place_counts (
+                country TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                label TEXT NOT NULL,
+                female INTEGER NOT NULL,
+                male INTEGER NOT NULL,
+                PRIMARY KEY (country, dimension, key)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS named_places_sync (
+                country TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL,
+                full_synced_at REAL NOT NULL
+            )
+            """
+        )
+    return connection
+
+
+def get_last_sync(country=NAMED_PLACES_COUNTRY):
+    """
+    Return the state of a country's named places.
+
+    :return: Tuple (time of the last sync or 0, time of the last full sync or 0, latest stored edit time or None).
+    """
+    connection = get_connection()
+    synced = connection.execute(
+        "SELECT synced_at, full_synced_at FROM named_places_sync WHERE country = ?", (country,)
+    ).fetchone()
+    latest = connection.execute("SELECT MAX(modified) FROM named_places WHERE country = ?", (country,)).fetchone()
+    return (*(synced or (0, 0)), latest[0])
+
+
+def count_named_places(records, classes, regions):
+    """
+    Count the streets and buildings named after women and men, in total and per breakdown.
+
+    A place named after several people counts once for every gender among them, and once in every
+    region and locality it lies in. Namings that ended (or have not started yet) are left out.
+
+    :param records: Iterable of item records as returned by fetch_named_items.
+    :param classes: Classes of streets and buildings (see fetch_named_place_classes).
+    :param regions: Region of every administrative entity (see fetch_regions).
+    :return: List of (dimension, key, label, female count, male count) tuples.
+    """
+    classes = set(classes)
+    counts = defaultdict(lambda: {"female": 0, "male": 0})
+    labels = {}
+    for record in records:
+        if classes.isdisjoint(record["classes"]):
+            continue
+        namesakes = [namesake for namesake in record["namesakes"] if is_current(namesake)]
+        genders = {gender for _, gender, _, _ in namesakes if gender}
+        if not genders:
+            continue
+
+        keys = {("total", NAMED_PLACES_COUNTRY)}
+        for admin in record["admins"]:
+            if admin in regions:
+                locality_label, region, region_label = regions[admin]
+                keys |= {("region", region), ("locality", admin)}
+                labels[("region", region)], labels[("locality", admin)] = region_label, locality_label
+        years = [int(start_time[:4]) for _, _, start_time, _ in namesakes if start_time and start_time[:4].isdigit()]
+        if years:
+            decade = str(min(years) // 10 * 10)
+            keys.add(("decade", decade))
+            labels[("decade", decade)] = f"{decade}s"
+
+        for key in keys:
+            for gender in genders:
+                counts[key][gender] += 1
+
+    return [
+        (dimension, key, labels.get((dimension, key), key), count["female"], count["male"])
+        for (dimension, key), count in counts.items()
+    ]
+
+
+def store_named_places(items, classes, regions, full, country=NAMED_PLACES_COUNTRY):
+    """
+    Store fetched items, recompute the counts from all stored items and record the sync.
+
+    :param items: Items as returned by fetch_named_items.
+    :param classes: Classes of streets and buildings.
+    :param regions: Region of every administrative entity.
+    :param full: True if the items are all of the country's named items, replacing the stored ones.
+    :param country: Country the items were fetched for.
+    """
+    connection = get_connection()
+    with connection:
+        if full:
+            connection.execute("DELETE FROM named_places WHERE country = ?", (country,))
+        connection.executemany(
+            "INSERT OR REPLACE INTO named_places (country, item, modified, record) VALUES (?, ?, ?, ?)",
+            [(country, item, record["modified"] or "", json.dumps(record)) for item, record in items.items()],
+        )
+        records = (
+            json.loads(record)
+            for record, in connection.execute("SELECT record FROM named_places WHERE country = ?", (country,))
+        )
+        counts = count_named_places(records, classes, regions)
+        connection.execute("DELETE FROM named_place_counts WHERE country = ?", (country,))
+        connection.executemany(
+            "INSERT INTO named_place_counts (country, dimension, key, label, female, male) VALUES (?, ?, ?, ?, ?, ?)",
+            [(country, *row) for row in counts],
+        )
+        now = time.time()
+        connection.execute(
+            """
+            INSERT INTO named_places_sync (country, synced_at, full_synced_at) VALUES (?, ?, ?)
+            ON CONFLICT (country) DO UPDATE SET
+                synced_at = excluded.synced_at,
+                full_synced_at = CASE WHEN ? THEN excluded.full_synced_at ELSE full_synced_at END
+            """,
+            (country, now, now if full else 0, full),
+        )
+
+
+@instrument()
+def sync_named_places(country=NAMED_PLACES_COUNTRY):
+    """
+    Bring the named places up to date, fetching only the items edited since the latest stored edit
+    (all of them every WIKIDATA_FULL_SYNC_INTERVAL), and precompute their counts.
+
+    Skipped if the places were synced within the Wikidata TTL.
+
+    :return: Number of items fetched.
+    """
+    if cache.is_offline():
+        return 0
+    ttl = cache.SOURCE_TTLS["wikidata"]
+
+    def sync():
+        synced_at, full_synced_at, latest_modified = get_last_sync(country)
+        if time.time() - synced_at < ttl:
+            # Another worker process synced the places while this one waited
+            return 0
+        classes, regions = fetch_named_place_classes(), fetch_regions()
+        if classes is None or regions is None:
+            return 0
+        full = latest_modified is None or time.time() - full_synced_at >= WIKIDATA_FULL_SYNC_INTERVAL
+        # Items edited at the latest stored edit time are fetched again, as more may have been edited that second
+        items = fetch_named_items(since=None if full else latest_modified)
+        if items is None:
+            return 0
+        store_named_places(items, classes, regions, full, country)
+        return len(items)
+
+    if time.time() - get_last_sync(country)[0] < ttl:
+        return 0
+    return single_flight.do(("wikidata_named_places", country), sync)
+
+
+def load_naming_counts(dimension, country=NAMED_PLACES_COUNTRY):
+    """
+    Return the precomputed counts of one breakdown.
+
+    :param dimension: 'total', 'region', 'locality' or 'decade'.
+    :param country: Country the places were synced for.
+    :return: List of dictionaries with the key, label, female and male counts; decades in chronological
+             order, regions and localities with the most named places first.
+    """
+    order = "key" if dimension == "decade" else "female + male DESC, key"
+    return [
+        {"key": key, "label": label, "female": female, "male": male}
+        for key, label, female, male in get_connection().execute(
+            f"SELECT key, label, female, male FROM named_place_counts WHERE country = ? AND dimension = ? ORDER BY {order}",
+            (country, dimension),
+        )
+    ]
+
+
+def fetch_gender_named_counts():
+    """
+    Sync the streets and buildings in Ukraine named after women and men and return their counts.
+
+    :return: Dictionary with gender labels as keys and their counts as values.
+    """
+    sync_named_places()
+    totals = load_naming_counts("total")
+    if not totals:
+        raise Exception("No Wikidata naming statistics available")
+    return {"female": totals[0]["female"], "male": totals[0]["male"]}
+
+
+def fetch_gender_naming_breakdown():
+    """
+    Return the precomputed counts per region, locality and decade of naming (synced by fetch_gender_named_counts).
+
+    :return: Dictionary mapping each of NAMING_DIMENSIONS to its list of counts.
+    """
+    return {dimension: load_naming_counts(dimension) for dimension in NAMING_DIMENSIONS}
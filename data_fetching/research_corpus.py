@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from datetime import date
+
+from data_fetching import cache, single_flight
+from data_fetching.fetch_openalex import fetch_research_works
+from monitoring.metrics import instrument
+
+# Search query the corpus is built from
+RESEARCH_QUERY = "gender equality"
+
+# Works kept per query; the oldest are dropped beyond it
+RESEARCH_MAX_WORKS = int(os.environ.get("TRACKER_OPENALEX_MAX_WORKS", 2000))
+
+
+def get_connection():
+    """
+    Return the cache database connection with the research corpus tables created.
+
+    :return: sqlite3.Connection
+    """
+    connection = cache.get_connection()
+    with connection:
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS research_works (
+                query TEXT NOT NULL,
+                id TEXT NOT NULL,
+                publication_date TEXT NOT NULL,
+                paper TEXT NOT NULL,
+                PRIMARY KEY (query, id)
+            )
+            """
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS research_works_by_date ON research_works (query, publication_date)"
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS research_sync (
+                query TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL
+            )
+            """
+        )
+    return connection
+
+
+def get_last_sync(query):
+    """
+    Return the state of a query's corpus.
+
+    :return: Tuple (time of the last sync or 0, latest stored publication date or None).
+    """
+    connection = get_connection()
+    synced = connection.execute("SELECT synced_at FROM research_sync WHERE query = ?", (query,)).fetchone()
+    latest = connection.execute(
+        "SELECT MAX(publication_date) FROM research_works WHERE query = ?", (query,)
+    ).fetchone()
+    return (synced[0] if synced else 0), latest[0]
+
+
+def store_works(query, papers):
+    """
+    Add or update works in a query's corpus, drop the oldest beyond RESEARCH_MAX_WORKS and record the sync.
+
+    :param query: Search query the works were found with.
+    :param papers: List of papers as returned by fetch_research_works.
+    """
+    connection = get_connection()
+    with connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO research_works (query, id, publication_date, paper) VALUES (?, ?, ?, ?)",
+            [(query, paper["id"], paper["publication_date"] or "", json.dumps(paper)) for paper in papers],
+        )
+        connection.execute(
+            """
+            DELETE FROM research_works WHERE query = ? AND id NOT IN (
+                SELECT id FROM research_works WHERE query = ? ORDER BY publication_date DESC, id DESC LIMIT ?
+            )
+            """,
+            (query, query, RESEARCH_MAX_WORKS),
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO research_sync (query, synced_at) VALUES (?, ?)", (query, time.time())
+        )
+
+
+@instrument()
+def sync_research_corpus(query=RESEARCH_QUERY):
+    """
+    Bring a query's corpus up to date, fetching only works published since the latest stored one (or today,
+    if that one is dated in the future).
+
+    Skipped if the corpus was synced within the OpenAlex TTL.
+
+    :param query: Search query for papers.
+    :return: Number of works fetched.
+    """
+    if cache.is_offline():
+        return 0
+    ttl = cache.SOURCE_TTLS["openalex"]
+
+    def sync():
+        synced_at, latest_date = get_last_sync(query)
+        if time.time() - synced_at < ttl:
+            # Another worker process synced the corpus while this one waited
+            return 0
+        # Works of the latest stored day are fetched again, as more may have been added since. Works
+        # announced with a future publication date must not hold back the works published until then.
+        since = min(latest_date, date.today().isoformat()) if latest_date else None
+        papers = fetch_research_works(query, since=since)
+        if papers is None:
+            return 0
+        store_works(query, papers)
+        return len(papers)
+
+    if time.time() - get_last_sync(query)[0] < ttl:
+        return 0
+    return single_flight.do(("openalex_corpus", query), sync)
+
+
+def load_research_corpus(query=RESEARCH_QUERY):
+    """
+    Return a query's stored corpus.
+
+    :param query: Search query for papers.
+    :return: List of papers, newest first.
+    """
+    return [
+        json.loads(paper)
+        for paper, in get_connection().execute(
+            "SELECT paper FROM research_works WHERE query = ? ORDER BY publication_date DESC, id DESC", (query,)
+        )
+    ]
+
+
+def fetch_latest_research_papers(query=RESEARCH_QUERY):
+    """
+    Sync the corpus of research papers on gender equality and return it.
+
+    :param query: Search query for papers.
+    :return: List of papers, newest first.
+    """
+    sync_research_corpus(query)
+    return load_research_corpus(query)
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; coalescing then only works within a process
+    fcntl = None
+
+# Lock files shared by all worker processes on this host
+LOCK_DIR = os.environ.get("TRACKER_LOCK_DIR", os.path.join(tempfile.gettempdir(), "gender-equality-tracker-locks"))
+
+# Returned by recheck functions when the value is still not available
+NOT_FOUND = object()
+
+# Futures of the fetches currently running in this process
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+@contextmanager
+def process_lock(key):
+    """
+    Hold an exclusive lock on a key across all processes on this host.
+
+    :param key: Hashable identifier of the fetch.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    lock_path = os.path.join(LOCK_DIR, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".lock")
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def do(key, fetch, recheck=None):
+    """
+    Run a fetch at most once at a time per key; concurrent callers wait for it and share its result.
+
+    Threads of this process share one call. Other processes wait on a lock file and then call
+    `recheck`, so they can pick up the value the first process just stored instead of fetching it again.
+
+    :param key: Hashable identifier of the fetch, e.g. (source, country, indicator).
+    :param fetch: Function without arguments performing the upstream call.
+    :param recheck: Optional function without arguments returning the value if it became available
+                    (e.g., from the cache) or NOT_FOUND.
+    :return: The fetched (or rechecked) value.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _in_flight[key] = future
+
+    if not is_leader:
+        return future.result()
+
+    try:
+        with process_lock(key):
+            result = recheck() if recheck is not None else NOT_FOUND
+            if result is NOT_FOUND:
+                result = fetch()
+        future.set_result(result)
+        return result
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
@@ -0,0 +1,51 @@
+import threading
+
+from data_fetching.history import get_history_versions, load_indicator_store, sync_indicator_history
+from data_processing.indicator_store import IndicatorStore
+from monitoring.metrics import instrument
+
+
+class CountryPool:
+    """
+    Indicator history of every country loaded so far, kept as one single-country store per country.
+
+    Neighborhoods overlap (Poland is a neighbor of Ukraine, Germany, Czechia, ...), so the store of a
+    neighborhood is stacked from the countries' shared slices instead of being loaded from the database
+    again for every main country. A slice is reloaded only when its country's history was synced since,
+    whatever name the country is given in the returned store.
+    """
+
+    def __init__(self, indicators):
+        """
+        :param indicators: Dictionary mapping indicator keys to World Bank indicator codes.
+        """
+        self.indicators = indicators
+        self._slices = {}  # ISO3 code -> (history version, single-country IndicatorStore)
+        self._lock = threading.Lock()
+
+    @instrument("country_pool_get_store")
+    def get_store(self, country_names, sync=True):
+        """
+        Bring the history of some countries up to date and return it as one store.
+
+        :param country_names: Dictionary mapping ISO3 country codes to the names used in the store.
+        :param sync: If False, the stored history is returned as it is, without contacting the World Bank.
+        :return: Tuple (IndicatorStore with the countries in the given order, {iso3_code: history version}).
+        """
+        # Series synced within the World Bank TTL are skipped, so this only fetches new neighbors or stale data
+        if sync:
+            sync_indicator_history(list(country_names), self.indicators)
+        versions = get_history_versions(list(country_names))
+
+        with self._lock:
+            outdated = [code for code in country_names if self._slices.get(code, (None,))[0] != versions[code]]
+        if outdated:
+            # Slices are stored under their ISO3 codes and named on the way out
+            loaded = load_indicator_store({code: code for code in outdated}, self.indicators)
+            with self._lock:
+                for code in outdated:
+                    self._slices[code] = (versions[code], loaded.select([code]))
+
+        with self._lock:
+            slices = [self._slices[code][1] for code in country_names]
+        return IndicatorStore.concat(slices, list(country_names.values())), versions
@@ -0,0 +1,249 @@
+import hashlib
+import threading
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+# Shown for values the main country has no data for
+MISSING = "N/A"
+
+# Decimal places numeric metrics are rounded to, so pages and Text metrics show the same number
+DECIMALS = 2
+
+
+@dataclass(frozen=True)
+class Value:
+    """Latest value of an indicator for the main country, rounded to DECIMALS (MISSING if it has none)."""
+    name: str
+    indicator: str
+
+    @property
+    def inputs(self):
+        return (self.indicator,)
+
+
+@dataclass(frozen=True)
+class Gap:
+    """Difference between two indicators for the main country (e.g., female − male), None if either is missing."""
+    name: str
+    first: str
+    second: str
+
+    @property
+    def inputs(self):
+        return (self.first, self.second)
+
+
+@dataclass(frozen=True)
+class Rank:
+    """1-based rank of the main country among all countries with a value, None if it has none."""
+    name: str
+    indicator: str
+    descending: bool = True
+
+    @property
+    def inputs(self):
+        return (self.indicator,)
+
+
+@dataclass(frozen=True)
+class RegionalComparison:
+    """Label telling whether the main country is above or below the average of the other countries."""
+    name: str
+    indicator: str
+    above: str
+    below: str
+
+    @property
+    def inputs(self):
+        return (self.indicator,)
+
+
+@dataclass(frozen=True)
+class Largest:
+    """Label of the option whose indicator has the largest value for the main country."""
+    name: str
+    options: tuple  # (label, indicator) pairs
+
+    @property
+    def inputs(self):
+        return tuple(indicator for _, indicator in self.options)
+
+
+@dataclass(frozen=True)
+class Text:
+    """Text rendered from other derived metrics; None if any of them is missing."""
+    name: str
+    metrics: tuple  # Names of the derived metrics passed to render, in order
+    render: object  # Function taking the metrics' values and returning the text
+
+    @property
+    def inputs(self):
+        return ()
+
+
+def nest(values):
+    """
+    Turn {"section.field": value} into {"section": {"field": value}} for templates.
+
+    :param values: Dictionary of derived metric values keyed by dotted names.
+    :return: Nested dictionary.
+    """
+    nested = {}
+    for name, value in values.items():
+        *sections, field = name.split(".")
+        target = nested
+        for section in sections:
+            target = target.setdefault(section, {})
+        target[field] = value
+    return nested
+
+
+def series_fingerprints(store):
+    """
+    Fingerprint the latest values of every indicator across all countries.
+
+    :return: Dictionary mapping indicator keys to digests that change whenever a value of the series does.
+    """
+    countries = "\x1f".join(store.countries).encode("utf-8")
+    return {
+        indicator: hashlib.blake2b(countries + np.ascontiguousarray(store.latest[:, position]).tobytes(),
+                                   digest_size=16).hexdigest()
+        for indicator, position in store.indicator_index.items()
+    }
+
+
+class DerivedMetrics:
+    """
+    Declarative registry of metrics derived from indicator values.
+
+    All metrics are computed in one vectorized pass over the store's latest values, grouped by kind,
+    and memoized per main country and dataset version. When only some indicator series changed,
+    only the metrics depending on them (directly or through Text metrics) are recomputed.
+    """
+
+    def __init__(self, metrics):
+        """
+        :param metrics: List of Value, Gap, Rank, RegionalComparison, Largest and Text metrics.
+                        Text metrics may only use metrics listed before them.
+        """
+        self.metrics = list(metrics)
+        self.by_name = {}
+        for metric in self.metrics:
+            if metric.name in self.by_name:
+                raise ValueError(f"Derived metric {metric.name} is defined twice")
+            if isinstance(metric, Text):
+                unknown = [name for name in metric.metrics if name not in self.by_name]
+                if unknown:
+                    raise ValueError(f"{metric.name} uses undefined metrics: {', '.join(unknown)}")
+            self.by_name[metric.name] = metric
+
+        # Indicators every metric depends on, including through the metrics a Text uses
+        self.dependencies = {}
+        for metric in self.metrics:
+            inputs = set(metric.inputs)
+            if isinstance(metric, Text):
+                for name in metric.metrics:
+                    inputs |= self.dependencies[name]
+            self.dependencies[metric.name] = inputs
+
+        self._memo = {}  # main_country -> (fingerprints, values); one entry per country at most
+        self._lock = threading.Lock()
+
+    def compute(self, store, main_country):
+        """
+        Return all derived metrics for the main country, reusing results for unchanged series.
+
+        :param store: IndicatorStore with the latest data of all countries.
+        :param main_country: Name of the country the metrics describe (e.g., "Ukraine").
+        :return: Dictionary mapping metric names to values.
+        """
+        fingerprints = series_fingerprints(store)
+        with self._lock:
+            memo = self._memo.get(main_country)
+            if memo is not None:
+                previous_fingerprints, previous_values = memo
+                changed = {
+                    indicator for indicator, fingerprint in fingerprints.items()
+                    if previous_fingerprints.get(indicator) != fingerprint
+                }
+                outdated = [metric for metric in self.metrics if self.dependencies[metric.name] & changed]
+            else:
+                previous_values, outdated = {}, self.metrics
+
+            if not outdated:
+                return dict(previous_values)
+
+            values = {**previous_values, **self.compute_metrics(store, main_country, outdated, previous_values)}
+            self._memo[main_country] = (fingerprints, values)
+            return dict(values)
+
+    def compute_metrics(self, store, main_country, metrics, known_values):
+        """
+        Compute the given metrics in one batched pass.
+
+        :param known_values: Values of metrics that are not recomputed, available to Text metrics.
+        :return: Dictionary mapping the given metrics' names to their values.
+        """
+        latest = store.latest
+        main = store.country_index.get(main_country)
+        column = store.indicator_index
+        main_row = latest[main] if main is not None else np.full(len(store.indicators), np.nan)
+        values = {}
+
+        def optional(value):
+            return None if np.isnan(value) else round(float(value), DECIMALS)
+
+        kinds = {}
+        for metric in metrics:
+            kinds.setdefault(type(metric), []).append(metric)
+
+        value_metrics = kinds.get(Value, [])
+        if value_metrics:
+            found = main_row[[column[metric.indicator] for metric in value_metrics]]
+            for metric, value in zip(value_metrics, found):
+                values[metric.name] = MISSING if np.isnan(value) else round(float(value), DECIMALS)
+
+        gap_metrics = kinds.get(Gap, [])
+        if gap_metrics:
+            gaps = (main_row[[column[metric.first] for metric in gap_metrics]]
+                    - main_row[[column[metric.second] for metric in gap_metrics]])
+            for metric, gap in zip(gap_metrics, gaps):
+                values[metric.name] = optional(gap)
+
+        rank_metrics = kinds.get(Rank, [])
+        if rank_metrics:
+            positions = [column[metric.indicator] for metric in rank_metrics]
+            main_values = main_row[positions]
+            higher = np.count_nonzero(latest[:, positions] > main_values, axis=0)
+            lower = np.count_nonzero(latest[:, positions] < main_values, axis=0)
+            for metric, main_value, above, below in zip(rank_metrics, main_values, higher, lower):
+                values[metric.name] = None if np.isnan(main_value) else int(above if metric.descending else below) + 1
+
+        comparison_metrics = kinds.get(RegionalComparison, [])
+        if comparison_metrics:
+            positions = [column[metric.indicator] for metric in comparison_metrics]
+            others = np.ones(len(store.countries), dtype=bool)
+            if main is not None:
+                others[main] = False
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=RuntimeWarning)  # All-NaN columns
+                averages = np.nanmean(latest[others][:, positions], axis=0) if others.any() else np.full(len(positions), np.nan)
+            for metric, main_value, average in zip(comparison_metrics, main_row[positions], averages):
+                if np.isnan(main_value) or np.isnan(average):
+                    values[metric.name] = None
+                else:
+                    values[metric.name] = metric.above if main_value > average else metric.below
+
+        for metric in kinds.get(Largest, []):
+            shares = main_row[[column[indicator] for _, indicator in metric.options]]
+            values[metric.name] = None if np.isnan(shares).all() else metric.options[int(np.nanargmax(shares))][0]
+
+        # Text metrics last, in registry order, so they see the values computed above
+        for metric in kinds.get(Text, []):
+            arguments = [values[name] if name in values else known_values.get(name) for name in metric.metrics]
+            missing = any(argument is None or argument == MISSING for argument in arguments)
+            values[metric.name] = None if missing else metric.render(*arguments)
+
+        return values
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from data_processing.indicator_store import IndicatorStore
+
+# Optional JSON file with more country groups: {"<id>": {"name": "...", "countries": ["POL", ...]}}
+COUNTRY_GROUPS_PATH = os.environ.get("TRACKER_COUNTRY_GROUPS_PATH")
+
+# Groups compared against besides the World Bank regions and income levels
+CUSTOM_COUNTRY_GROUPS = {
+    "EU27": ("European Union", (
+        "AUT", "BEL", "BGR", "HRV", "CYP", "CZE", "DNK", "EST", "FIN", "FRA", "DEU", "GRC", "HUN", "IRL",
+        "ITA", "LVA", "LTU", "LUX", "MLT", "NLD", "POL", "PRT", "ROU", "SVK", "SVN", "ESP", "SWE",
+    )),
+    "EASTERN_PARTNERSHIP": ("Eastern Partnership", ("ARM", "AZE", "BLR", "GEO", "MDA", "UKR")),
+}
+
+# Indicator the population-weighted means are weighted by
+POPULATION_INDICATOR = ("population", "SP.POP.TOTL")
+
+# Statistics precomputed for every group, indicator and year
+QUANTILES = {"p10": 0.1, "p25": 0.25, "p75": 0.75, "p90": 0.9}
+STATISTICS = ["count", "mean", "median", *QUANTILES, "weighted_mean"]
+
+
+@dataclass(frozen=True)
+class CountryGroup:
+    """A set of countries compared against as a whole."""
+    id: str
+    name: str
+    kind: str  # 'region' or 'income' (World Bank classifications), or 'custom'
+    countries: tuple  # ISO3 codes
+
+
+def load_custom_groups():
+    """
+    Return the built-in custom groups together with those of TRACKER_COUNTRY_GROUPS_PATH, if set.
+
+    :return: Dictionary mapping group ids to (name, ISO3 codes) tuples.
+    """
+    groups = dict(CUSTOM_COUNTRY_GROUPS)
+    if COUNTRY_GROUPS_PATH:
+        with open(COUNTRY_GROUPS_PATH, encoding="utf-8") as groups_file:
+            for group_id, group in json.load(groups_file).items():
+                groups[group_id] = (group.get("name", group_id), tuple(code.upper() for code in group["countries"]))
+    return groups
+
+
+def define_country_groups(classifications, custom_groups=None):
+    """
+    Define the World Bank region and income level groups, followed by the custom groups.
+
+    :param classifications: Dictionary mapping ISO3 codes to their World Bank 'region_id', 'region',
+                            'income_id' and 'income' (see fetch_country_classifications).
+    :param custom_groups: Dictionary mapping group ids to (name, ISO3 codes); load_custom_groups() by default.
+    :return: List of CountryGroup.
+    """
+    members, names = {}, {}
+    for code, classification in sorted(classifications.items()):
+        for kind in ("region", "income"):
+            group_id = classification.get(f"{kind}_id")
+            if group_id:
+                members.setdefault((kind, group_id), []).append(code)
+                names[group_id] = classification[kind]
+
+    groups = [
+        CountryGroup(group_id, names[group_id], kind, tuple(codes))
+        # Regions first, then income levels
+        for (kind, group_id), codes in sorted(members.items(), key=lambda item: (item[0][0] != "region", item[0][1]))
+    ]
+    custom_groups = load_custom_groups() if custom_groups is None else custom_groups
+    groups += [CountryGroup(group_id, name, "custom", tuple(codes)) for group_id, (name, codes) in custom_groups.items()]
+    return groups
+
+
+def compute_group_statistics(values, weights):
+    """
+    Compute the STATISTICS of a group across its countries, ignoring missing values.
+
+    :param values: Array of shape (countries, indicators, years).
+    :param weights: Array of shape (countries, years) with the countries' populations (NaN if unknown).
+    :return: Array of shape (len(STATISTICS), indicators, years); NaN where no country has a value.
+    """
+    present = ~np.isnan(values)
+    statistics = np.full((len(STATISTICS), *values.shape[1:]), np.nan)
+    statistics[0] = present.sum(axis=0)
+    if not present.any():
+        return statistics
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # All-NaN slices
+        statistics[1] = np.nanmean(values, axis=0)
+        statistics[2] = np.nanmedian(values, axis=0)
+        statistics[3:3 + len(QUANTILES)] = np.nanquantile(values, list(QUANTILES.values()), axis=0)
+
+        # Only countries with both a value and a population count towards the weighted mean
+        weights = np.where(present & ~np.isnan(weights)[:, np.newaxis, :], weights[:, np.newaxis, :], 0.0)
+        total_weight = weights.sum(axis=0)
+        weighted_sum = (np.where(weights > 0, values, 0.0) * weights).sum(axis=0)
+        statistics[-1] = np.divide(weighted_sum, total_weight, out=np.full_like(total_weight, np.nan), where=total_weight > 0)
+    return statistics
+
+
+class GroupAggregates:
+    """
+    Precomputed statistics of country groups, for every indicator and year and over the countries' latest values.
+
+    Rows of both stores are named '<group id>/<statistic>' (e.g., 'EU27/median'), so every lookup is a
+    dictionary access. Instances are never modified after they are built.
+    """
+
+    def __init__(self, groups, yearly, latest):
+        """
+        :param groups: List of CountryGroup.
+        :param yearly: IndicatorStore with one row per group and statistic, over the years.
+        :param latest: IndicatorStore with the same rows, computed over the countries' latest values.
+        """
+        self.groups = {group.id: group for group in groups}
+        self.yearly = yearly
+        self.latest = latest
+        self.memberships = {}
+        for group in groups:
+            for code in group.countries:
+                self.memberships.setdefault(code, []).append(group.id)
+
+    def value(self, group_id, indicator, statistic="mean"):
+        """
+        Return a statistic of a group over its countries' latest values.
+
+        :return: Float, or None if the group, indicator or value is missing.
+        """
+        return self.latest.value(f"{group_id}/{statistic}", indicator)
+
+    def series(self, group_id, indicator, statistic="mean"):
+        """
+        Return a statistic of a group for every year.
+
+        :return: List of (year, value) tuples in ascending order of years, leaving out years without a value.
+        """
+        row = self.yearly.country_index.get(f"{group_id}/{statistic}")
+        if row is None or indicator not in self.yearly.indicator_index:
+            return []
+        values = self.yearly.values[row, self.yearly.indicator_index[indicator]]
+        return [(int(year), float(value)) for year, value in zip(self.yearly.years, values) if not np.isnan(value)]
+
+    def groups_of(self, country_code):
+        """Return the ids of the groups a country (ISO3 code) belongs to."""
+        return list(self.memberships.get(country_code, []))
+
+    def summary(self, group_id, indicator):
+        """Return every statistic of a group over its countries' latest values, keyed by statistic."""
+        return {statistic: self.value(group_id, indicator, statistic) for statistic in STATISTICS}
+
+    def to_field(self):
+        """Return the groups and stores for the snapshot file (see GroupAggregates.from_field)."""
+        return {
+            "groups": [[group.id, group.name, group.kind, list(group.countries)] for group in self.groups.values()],
+            "yearly": self.yearly,
+            "latest": self.latest,
+        }
+
+    @classmethod
+    def from_field(cls, field):
+        """Rebuild the aggregates saved with to_field."""
+        groups = [CountryGroup(group_id, name, kind, tuple(codes)) for group_id, name, kind, codes in field["groups"]]
+        return cls(groups, field["yearly"], field["latest"])
+
+
+class GroupAggregator:
+    """
+    Keeps the statistics of country groups up to date.
+
+    The history of every member country is synced and loaded through a CountryPool (shared with the
+    country pages, so each country is loaded once), and a group's statistics are only computed again when
+    the history of one of its countries (or its definition) changed.
+    """
+
+    def __init__(self, pool, indicators):
+        """
+        :param pool: CountryPool whose indicators include the given ones and POPULATION_INDICATOR.
+        :param indicators: Keys of the indicators the statistics are computed for.
+        """
+        self.pool = pool
+        self.indicators = list(indicators)
+        self._computed = {}  # Group id -> (version, yearly IndicatorStore, latest IndicatorStore)
+        self._lock = threading.Lock()
+
+    def update(self, groups):
+        """
+        Bring the statistics of some groups up to date.
+
+        :param groups: List of CountryGroup.
+        :return: GroupAggregates of the given groups.
+        """
+        codes = sorted({code for group in groups for code in group.countries})
+        store, versions = self.pool.get_store({code: code for code in codes})
+        positions = [store.indicator_index[indicator] for indicator in self.indicators]
+        weight_position = store.indicator_index[POPULATION_INDICATOR[0]]
+
+        with self._lock:
+            group_stores = []
+            for group in groups:
+                version = (group, tuple(versions[code] for code in group.countries))
+                computed = self._computed.get(group.id)
+                if computed is None or computed[0] != version:
+                    rows = [store.country_index[code] for code in group.countries]
+                    values = store.values[rows][:, positions]
+                    latest = store.latest[rows][:, positions, np.newaxis]
+                    row_names = [f"{group.id}/{statistic}" for statistic in STATISTICS]
+                    computed = (
+                        version,
+                        IndicatorStore(row_names, self.indicators, store.years,
+                                       compute_group_statistics(values, store.values[rows, weight_position])),
+                        IndicatorStore(row_names, self.indicators, [0],
+                                       compute_group_statistics(latest, store.latest[rows, weight_position, np.newaxis])),
+                    )
+                    self._computed[group.id] = computed
+                group_stores.append(computed[1:])
+
+        return GroupAggregates(
+            groups,
+            IndicatorStore.concat([yearly for yearly, _ in group_stores]),
+            IndicatorStore.concat([latest for _, latest in group_stores]),
+        )
@@ -0,0 +1,191 @@
+import warnings
+
+import numpy as np
+
+
+def to_float(value):
+    """Convert an indicator value to float, mapping None, "N/A" and other non-numbers to NaN."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+class IndicatorStore:
+    """
+    Array-backed store of indicator values for many countries and years.
+
+    Values live in a single float64 array of shape (countries, indicators, years), with NaN
+    wherever a value is missing, so averages, rankings and highlights are computed with
+    vectorized NumPy operations instead of loops over nested dictionaries.
+    """
+
+    def __init__(self, countries, indicators, years, values):
+        """
+        :param countries: List of country names (first axis).
+        :param indicators: List of indicator keys (second axis).
+        :param years: List of years (third axis), in ascending order.
+        :param values: Array of shape (len(countries), len(indicators), len(years)).
+        """
+        self.countries = list(countries)
+        self.indicators = list(indicators)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.country_index = {country: i for i, country in enumerate(self.countries)}
+        self.indicator_index = {indicator: i for i, indicator in enumerate(self.indicators)}
+        self.latest = self._compute_latest()
+
+    @classmethod
+    def from_country_data(cls, country_data, indicators, year=0):
+        """
+        Build a store holding one value per series from {country: {indicator: value}} dictionaries.
+
+        :param country_data: Dictionary with country names as keys and {indicator: value} as values.
+        :param indicators: Iterable of indicator keys to include.
+        :param year: Year to file the values under (0 when only the latest value is known).
+        :return: IndicatorStore with a single year.
+        """
+        indicators = list(indicators)
+        values = np.array(
+            [[to_float(data.get(indicator)) for indicator in indicators] for data in country_data.values()],
+            dtype=np.float64,
+        ).reshape(len(country_data), len(indicators), 1)
+        return cls(country_data.keys(), indicators, [year], values)
+
+    @classmethod
+    def concat(cls, stores, countries=None):
+        """
+        Stack stores with the same indicators into one, aligning their years.
+
+        :param stores: List of IndicatorStore instances (e.g., one per country).
+        :param countries: Optional names of the stacked rows, instead of the stores' own country names.
+        :return: IndicatorStore with the countries of all stores, in order, over the union of their years.
+        """
+        indicators = stores[0].indicators if stores else []
+        years = sorted(set().union(*(store.years.tolist() for store in stores)))
+        year_positions = {year: i for i, year in enumerate(years)}
+        values = np.full((sum(len(store.countries) for store in stores), len(indicators), len(years)), np.nan)
+        row = 0
+        for store in stores:
+            columns = [year_positions[year] for year in store.years.tolist()]
+            values[row:row + len(store.countries), :, columns] = store.values
+            row += len(store.countries)
+        if countries is None:
+            countries = [country for store in stores for country in store.countries]
+        return cls(countries, indicators, years, values)
+
+    def select(self, countries):
+        """
+        Return a store with only some of the countries (in the given order) and the same years.
+
+        :param countries: Country names present in this store.
+        """
+        rows = [self.country_index[country] for country in countries]
+        return IndicatorStore(countries, self.indicators, self.years, self.values[rows])
+
+    def select_indicators(self, indicators):
+        """
+        Return a store with only some of the indicators (in the given order), the same countries and years.
+
+        :param indicators: Indicator keys present in this store.
+        """
+        columns = [self.indicator_index[indicator] for indicator in indicators]
+        return IndicatorStore(self.countries, indicators, self.years, self.values[:, columns])
+
+    def to_country_data(self, decimals=2):
+        """
+        Return the latest values as {country: {indicator: value}} dictionaries for templates.
+
+        :param decimals: Number of decimal places to round the values
+        :return: Dictionary with country names as keys; missing values are "N/A".
+        """
+        rounded = np.round(self.latest, decimals)
+        return {
+            country: {
+                indicator: ("N/A" if np.isnan(value) else float(value))
+                for indicator, value in zip(self.indicators, row)
+            }
+            for country, row in zip(self.countries, rounded)
+        }
+
+    def _compute_latest(self):
+        """Return a (countries, indicators) array with the most recent non-missing value of every series."""
+        if self.values.shape[2] == 0:
+            return np.full(self.values.shape[:2], np.nan)
+        present = ~np.isnan(self.values)
+        # Index of the last present year, found as the first present one in reversed order
+        last_present = self.values.shape[2] - 1 - np.argmax(present[:, :, ::-1], axis=2)
+        latest = np.take_along_axis(self.values, last_present[:, :, np.newaxis], axis=2)[:, :, 0]
+        latest[~present.any(axis=2)] = np.nan
+        return latest
+
+    def column(self, indicator):
+        """Return the latest values of an indicator for all countries."""
+        return self.latest[:, self.indicator_index[indicator]]
+
+    def value(self, country, indicator):
+        """
+        Return the latest value of one series.
+
+        :return: Float, or None if the country, indicator or value is missing.
+        """
+        if country not in self.country_index or indicator not in self.indicator_index:
+            return None
+        value = self.latest[self.country_index[country], self.indicator_index[indicator]]
+        return None if np.isnan(value) else float(value)
+
+    def averages(self, exclude=()):
+        """
+        Average the latest value of every indicator across countries, ignoring missing values.
+
+        :param exclude: Country names to leave out (e.g., the main country).
+        :return: Dictionary mapping indicator keys to averages (None if no country has a value).
+        """
+        mask = np.ones(len(self.countries), dtype=bool)
+        for country in exclude:
+            if country in self.country_index:
+                mask[self.country_index[country]] = False
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)  # All-NaN columns
+            means = np.nanmean(self.latest[mask], axis=0) if mask.any() else np.full(len(self.indicators), np.nan)
+        return {indicator: (None if np.isnan(mean) else float(mean)) for indicator, mean in zip(self.indicators, means)}
+
+    def yearly_averages(self):
+        """
+        Average every indicator across countries for every year, ignoring missing values.
+
+        :return: Array of shape (indicators, years), NaN where no country has a value.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return np.nanmean(self.values, axis=0)
+
+    def rank(self, country, indicator, descending=True):
+        """
+        Rank a country among all countries that have a value for an indicator.
+
+        :param descending: Rank 1 goes to the highest value if True, to the lowest otherwise.
+        :return: 1-based rank, or None if the country has no value.
+        """
+        value = self.value(country, indicator)
+        if value is None:
+            return None
+        column = self.column(indicator)
+        better = column > value if descending else column < value
+        return int(np.count_nonzero(better)) + 1
+
+    def gap(self, first_indicator, second_indicator):
+        """Return the difference between two indicators for all countries (NaN where either is missing)."""
+        return self.column(first_indicator) - self.column(second_indicator)
+
+    def extreme(self, indicator, highest=True):
+        """
+        Find the country with the highest (or lowest) latest value of an indicator.
+
+        :return: Tuple (country, value), or (None, None) if no country has a value.
+        """
+        column = self.column(indicator)
+        if np.isnan(column).all():
+            return None, None
+        position = int(np.nanargmax(column) if highest else np.nanargmin(column))
+        return self.countries[position], float(column[position])
@@ -0,0 +1,103 @@
+import bisect
+import re
+import threading
+from collections import Counter, defaultdict
+
+# Words indexed in titles, concepts and author names
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Maximum number of vocabulary words a partially typed last word may expand to
+MAX_PREFIX_EXPANSIONS = 200
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Split text into lowercase words."""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class ResearchIndex:
+    """
+    Inverted index over the titles, concepts and authors of a research corpus.
+
+    Postings hold positions in the corpus, which is ordered newest first, so sorting the matching
+    positions orders the results by publication date without looking at the papers.
+    """
+
+    def __init__(self, papers):
+        """
+        :param papers: List of papers (see data_fetching.fetch_openalex.parse_work), newest first.
+        """
+        self.papers = papers
+        self.postings = defaultdict(set)
+        self.by_category = defaultdict(set)
+        self.open_access = set()
+        for position, paper in enumerate(papers):
+            text = " ".join([paper.get("title") or "", paper.get("authors") or "", *paper.get("categories", [])])
+            for token in tokenize(text):
+                self.postings[token].add(position)
+            for category in paper.get("categories", []):
+                self.by_category[category].add(position)
+            if paper.get("open_access"):
+                self.open_access.add(position)
+        self.vocabulary = sorted(self.postings)
+
+    def prefix_postings(self, prefix):
+        """Return the positions of the papers containing a word that starts with the prefix."""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        positions = set()
+        for token in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            positions |= self.postings[token]
+        return positions
+
+    def search(self, query="", category=None, open_access=False, limit=50):
+        """
+        Find the papers matching all words of a query, the last one also as a prefix (as it is being typed).
+
+        :param query: Words to look for in titles, concepts and author names; empty matches all papers.
+        :param category: Optional concept the papers must have among their top concepts.
+        :param open_access: Only return open access papers if True.
+        :param limit: Maximum number of papers to return.
+        :return: Tuple (number of matching papers, list of up to `limit` papers, newest first).
+        """
+        tokens = tokenize(query)
+        candidate_sets = [self.postings.get(token, set()) for token in tokens[:-1]]
+        if tokens:
+            candidate_sets.append(self.prefix_postings(tokens[-1]))
+        if category:
+            candidate_sets.append(self.by_category.get(category, set()))
+        if open_access:
+            candidate_sets.append(self.open_access)
+
+        if candidate_sets:
+            # Intersect starting from the rarest word
+            candidate_sets.sort(key=len)
+            matches = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        else:
+            matches = range(len(self.papers))
+        positions = sorted(matches)
+        return len(positions), [self.papers[position] for position in positions[:limit]]
+
+    def top_categories(self, count=20):
+        """Return the most common concepts, to filter by."""
+        return [category for category, _ in Counter(
+            {category: len(positions) for category, positions in self.by_category.items()}
+        ).most_common(count)]
+
+
+def get_research_index(papers):
+    """
+    Return the index of a corpus, building it only when the corpus changed.
+
+    :param papers: List of papers, newest first; the index is rebuilt when another list is passed.
+    :return: ResearchIndex
+    """
+    global _index
+    with _index_lock:
+        if _index is None or _index.papers is not papers:
+            _index = ResearchIndex(papers)
+        return _index
@@ -0,0 +1,263 @@
+import concurrent.futures
+import dataclasses
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from data_processing import snapshot_file
+from data_processing.group_aggregates import GroupAggregates
+from data_processing.indicator_store import IndicatorStore
+from monitoring.metrics import SECTION_LAST_BUILD_SECONDS, STEP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two snapshot builds, and before retrying a failed build
+SNAPSHOT_REFRESH_INTERVAL = float(os.environ.get("TRACKER_SNAPSHOT_INTERVAL", 15 * 60))
+SNAPSHOT_RETRY_INTERVAL = float(os.environ.get("TRACKER_SNAPSHOT_RETRY_INTERVAL", 60))
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """
+    Everything the dashboard needs to render.
+
+    Every data source fills its own fields (a "section") and is refreshed independently, so a
+    field is None until its section has been built for the first time. A section that could not
+    be built within its budget, and has no earlier version, is marked missing until it succeeds.
+    Snapshots are never modified after they are published; a refresh builds a new one and swaps it in.
+    """
+    country_data: dict = None
+    indicator_store: IndicatorStore = None
+    quick_overview_metrics: dict = None
+    world_bank_highlights: dict = None
+    gender_named_counts: dict = None
+    gender_naming_breakdown: dict = None  # Counts per region, locality and decade of naming
+    research_papers: list = None
+    group_aggregates: GroupAggregates = None  # Statistics of the country groups (EU, regions, income levels...)
+    ready_sections: frozenset = frozenset()
+    missing_sections: frozenset = frozenset()
+    built_at: float = None
+    section_built_at: dict = None  # Time every ready section was built
+
+    def is_ready(self, section):
+        """Return True once the given section has been built."""
+        return section in self.ready_sections
+
+    def is_missing(self, section):
+        """Return True if the given section has never been built and its last attempt failed or timed out."""
+        return section in self.missing_sections
+
+    def version(self, sections=None):
+        """
+        Return a value that changes whenever any of the given sections is rebuilt or marked missing.
+
+        :param sections: Names of the sections to cover (all of them by default).
+        :return: Hashable tuple.
+        """
+        built_at = self.section_built_at or {}
+        return tuple(
+            (section, built_at.get(section), section in self.missing_sections)
+            for section in sorted(sections if sections is not None else built_at.keys() | self.missing_sections)
+        )
+
+
+_current_snapshot = DashboardSnapshot()
+_publish_lock = threading.Lock()
+_section_ready = {}
+# Time each section was built and the fields it published, as saved to the snapshot file
+_published_sections = {}
+_refresher_threads = {}
+_refresher_lock = threading.Lock()
+_save_lock = threading.Lock()
+_restored = False
+
+
+def get_current_snapshot():
+    """
+    Return the latest published snapshot.
+
+    :return: DashboardSnapshot, possibly with sections that are not ready yet.
+    """
+    return _current_snapshot
+
+
+def get_section_event(section):
+    """Return the event that is set once a section has been published or marked missing."""
+    with _publish_lock:
+        return _section_ready.setdefault(section, threading.Event())
+
+
+def wait_for_section(section, timeout=None):
+    """
+    Block until a section is published or marked missing. Returns immediately once it has been.
+
+    :param section: Name of the section.
+    :param timeout: Maximum number of seconds to wait, or None to wait forever.
+    :return: True if the section is ready or missing, False if the timeout expired.
+    """
+    return get_section_event(section).wait(timeout)
+
+
+def publish_section(section, fields, built_at=None):
+    """
+    Atomically swap in a new snapshot with the fields of one section replaced.
+
+    :param section: Name of the section.
+    :param fields: Dictionary of DashboardSnapshot fields built by the section.
+    :param built_at: Time the fields were built (defaults to now).
+    """
+    global _current_snapshot
+    built_at = time.time() if built_at is None else built_at
+    event = get_section_event(section)
+    with _publish_lock:
+        _current_snapshot = dataclasses.replace(
+            _current_snapshot,
+            **fields,
+            ready_sections=_current_snapshot.ready_sections | {section},
+            missing_sections=_current_snapshot.missing_sections - {section},
+            built_at=built_at,
+            section_built_at={**(_current_snapshot.section_built_at or {}), section: built_at},
+        )
+        _published_sections[section] = (built_at, fields)
+    event.set()
+
+
+def save_snapshot():
+    """Write all published sections to the snapshot file, so restarted workers can serve them right away."""
+    with _save_lock:
+        with _publish_lock:
+            sections = dict(_published_sections)
+        try:
+            snapshot_file.save_snapshot_file(sections)
+        except Exception:
+            logger.exception("Saving the snapshot file failed")
+
+
+def restore_snapshot():
+    """
+    Publish the sections stored in the snapshot file, if there is one.
+
+    :return: Dictionary mapping the restored section names to the time they were built.
+    """
+    started_at = time.monotonic()
+    sections = snapshot_file.load_snapshot_file()
+    if not sections:
+        return {}
+
+    field_names = {field.name for field in dataclasses.fields(DashboardSnapshot)}
+    for section, (built_at, fields) in sections.items():
+        publish_section(section, {name: value for name, value in fields.items() if name in field_names}, built_at)
+    logger.info("Restored %d sections from the snapshot file in %.3fs", len(sections), time.monotonic() - started_at)
+    return {section: built_at for section, (built_at, _) in sections.items()}
+
+
+def mark_section_missing(section):
+    """
+    Mark a section that has never been built as missing, so pages stop waiting for it.
+
+    A section that was built before keeps its last good version instead.
+
+    :param section: Name of the section.
+    """
+    global _current_snapshot
+    event = get_section_event(section)
+    with _publish_lock:
+        if _current_snapshot.is_ready(section) or _current_snapshot.is_missing(section):
+            return
+        _current_snapshot = dataclasses.replace(
+            _current_snapshot, missing_sections=_current_snapshot.missing_sections | {section}
+        )
+    event.set()
+
+
+def start_build(section, build):
+    """
+    Run a section build in its own daemon thread, so waiting for it can be bounded.
+
+    :return: concurrent.futures.Future of the build's result.
+    """
+    future = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(build())
+        except BaseException as error:
+            future.set_exception(error)
+
+    threading.Thread(target=run, name=f"snapshot-build-{section}", daemon=True).start()
+    return future
+
+
+def refresh_section(section, build, budget=None):
+    """
+    Build a section and publish it. On failure the previous version of the section stays in place.
+
+    If the build takes longer than its budget, a section that was never built is marked missing
+    right away, and the build's result is still published once it arrives.
+
+    :param section: Name of the section.
+    :param build: Function without arguments returning a dictionary of DashboardSnapshot fields.
+    :param budget: Seconds the section may take before it is marked missing, or None for no limit.
+    :return: True if the section was published, False otherwise.
+    """
+    started_at = time.monotonic()
+    future = start_build(section, build)
+    try:
+        try:
+            fields = future.result(timeout=budget)
+        except concurrent.futures.TimeoutError:
+            logger.warning("Building the %s section exceeded its %.1fs budget", section, budget)
+            mark_section_missing(section)
+            fields = future.result()
+    except Exception:
+        logger.exception("Building the %s section failed, keeping the previous one", section)
+        mark_section_missing(section)
+        return False
+
+    publish_section(section, fields)
+    save_snapshot()
+    seconds = time.monotonic() - started_at
+    STEP_SECONDS.observe(f"build_{section}", value=seconds)
+    SECTION_LAST_BUILD_SECONDS.set(section, value=seconds)
+    logger.info("Published the %s section in %.2fs", section, seconds)
+    return True
+
+
+def start_snapshot_refresher(section_builders, budgets=None, interval=SNAPSHOT_REFRESH_INTERVAL,
+                             retry_interval=SNAPSHOT_RETRY_INTERVAL):
+    """
+    Start one background thread per section that rebuilds it on an interval. Safe to call repeatedly.
+
+    The first call restores the sections saved in the snapshot file; a restored section is only
+    rebuilt once it is older than the interval.
+
+    :param section_builders: Dictionary mapping section names to functions without arguments
+                             that return a dictionary of DashboardSnapshot fields.
+    :param budgets: Optional dictionary mapping section names to their build budget in seconds.
+    :param interval: Seconds to wait between successful builds.
+    :param retry_interval: Seconds to wait after a failed build.
+    """
+    global _restored
+    with _refresher_lock:
+        if not _restored:
+            restored_sections = restore_snapshot()
+            _restored = True
+        else:
+            restored_sections = {}
+
+        for section, build in section_builders.items():
+            if section in _refresher_threads:
+                continue
+            first_delay = max(0.0, restored_sections.get(section, 0) + interval - time.time())
+
+            def run(section=section, build=build, budget=(budgets or {}).get(section), first_delay=first_delay):
+                time.sleep(first_delay)
+                while True:
+                    succeeded = refresh_section(section, build, budget)
+                    time.sleep(interval if succeeded else retry_interval)
+
+            thread = threading.Thread(target=run, name=f"snapshot-refresher-{section}", daemon=True)
+            _refresher_threads[section] = thread
+            thread.start()
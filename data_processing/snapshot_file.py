@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from data_fetching import country_metadata
+from data_processing.group_aggregates import GroupAggregates
+from data_processing.indicator_store import IndicatorStore
+
+logger = logging.getLogger(__name__)
+
+# Dashboard snapshot written after every section build and loaded when a worker starts
+SNAPSHOT_FILE_PATH = os.environ.get(
+    "TRACKER_SNAPSHOT_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "dashboard.snapshot"),
+)
+
+# File layout: magic, header length (uint64, little-endian), JSON header, then the arrays,
+# each starting at a multiple of ARRAY_ALIGNMENT bytes so it can be memory-mapped directly
+SNAPSHOT_MAGIC = b"GETSNAP\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+ARRAY_ALIGNMENT = 64
+ARRAY_DTYPE = "<f8"
+
+
+def align(position):
+    """Round a byte position up to the next array boundary."""
+    return -(-position // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def encode_field(value, arrays):
+    """
+    Encode a snapshot field for the JSON header, moving IndicatorStore values out into the array block.
+
+    :param value: Field value (an IndicatorStore, GroupAggregates or anything JSON-serializable).
+    :param arrays: List collecting the arrays to write; appended to in place.
+    :return: JSON-serializable value.
+    """
+    if isinstance(value, GroupAggregates):
+        return {"__group_aggregates__": {name: encode_field(part, arrays) for name, part in value.to_field().items()}}
+    if isinstance(value, IndicatorStore):
+        arrays.append(np.ascontiguousarray(value.values, dtype=ARRAY_DTYPE))
+        return {
+            "__indicator_store__": {
+                "countries": value.countries,
+                "indicators": value.indicators,
+                "years": value.years.tolist(),
+                "array": len(arrays) - 1,
+            }
+        }
+    return value
+
+
+def decode_field(value, arrays):
+    """Decode a field written by encode_field, backing IndicatorStore values with the mapped arrays."""
+    if isinstance(value, dict) and "__group_aggregates__" in value:
+        return GroupAggregates.from_field(
+            {name: decode_field(part, arrays) for name, part in value["__group_aggregates__"].items()}
+        )
+    if isinstance(value, dict) and "__indicator_store__" in value:
+        store = value["__indicator_store__"]
+        return IndicatorStore(store["countries"], store["indicators"], store["years"], arrays[store["array"]])
+    return value
+
+
+def save_snapshot_file(sections, path=SNAPSHOT_FILE_PATH):
+    """
+    Write the dashboard sections to a snapshot file, replacing the previous one atomically.
+
+    :param sections: Dictionary mapping section names to (built_at, {field: value}) tuples.
+    :param path: File to write.
+    """
+    arrays = []
+    metadata = country_metadata.peek_metadata()
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.time(),
+        "country_metadata": metadata.records if metadata else [],
+        "sections": {
+            section: {
+                "built_at": built_at,
+                "fields": {name: encode_field(value, arrays) for name, value in fields.items()},
+            }
+            for section, (built_at, fields) in sections.items()
+        },
+    }
+
+    # Array offsets are relative to the start of the array block, which follows the header
+    offset = 0
+    header["arrays"] = []
+    for array in arrays:
+        header["arrays"].append({"offset": offset, "shape": list(array.shape), "dtype": ARRAY_DTYPE})
+        offset = align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    array_block_start = align(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            snapshot_file.write(struct.pack("<Q", len(header_bytes)))
+            snapshot_file.write(header_bytes)
+            for array, array_header in zip(arrays, header["arrays"]):
+                snapshot_file.seek(array_block_start + array_header["offset"])
+                snapshot_file.write(array.tobytes())
+        # Workers that mapped the previous file keep reading it until they load the new one
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def load_snapshot_file(path=SNAPSHOT_FILE_PATH):
+    """
+    Load a snapshot file written by save_snapshot_file.
+
+    Indicator values are memory-mapped read-only rather than read, so all worker processes on a
+    host share one copy in the page cache. The country metadata is installed as well.
+
+    :param path: File to read.
+    :return: Dictionary mapping section names to (built_at, {field: value}) tuples, or None if the
+             file is missing, unreadable or written in another format version.
+    """
+    try:
+        with open(path, "rb") as snapshot_file:
+            if snapshot_file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                logger.warning("%s is not a dashboard snapshot file", path)
+                return None
+            header_length, = struct.unpack("<Q", snapshot_file.read(8))
+            header = json.loads(snapshot_file.read(header_length).decode("utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error):
+        logger.exception("Reading the snapshot file %s failed", path)
+        return None
+
+    if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        logger.warning("Ignoring %s: format version %s is not supported", path, header.get("format_version"))
+        return None
+
+    array_block_start = align(len(SNAPSHOT_MAGIC) + 8 + header_length)
+    arrays = [
+        np.memmap(path, dtype=array["dtype"], mode="r", offset=array_block_start + array["offset"],
+                  shape=tuple(array["shape"]))
+        if all(array["shape"]) else np.empty(tuple(array["shape"]), dtype=array["dtype"])
+        for array in header["arrays"]
+    ]
+
+    if header.get("country_metadata"):
+        country_metadata.install_metadata(header["country_metadata"], loaded_at=header["created_at"])
+
+    return {
+        section: (content["built_at"], {name: decode_field(value, arrays) for name, value in content["fields"].items()})
+        for section, content in header["sections"].items()
+    }
@@ -0,0 +1,243 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# All metrics, in the order they are exposed
+_registry = []
+
+# Timings of the request being handled by the current thread, for the Server-Timing header
+_request_timings = threading.local()
+
+
+def escape_label_value(value):
+    """Escape backslashes, quotes and newlines in a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    """Format label names and values as a Prometheus label set (e.g., '{host="a",le="0.5"}')."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def format_number(value):
+    """Format a sample value the way the Prometheus text format expects."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class of a metric with a fixed set of labels. Safe to update from any thread."""
+
+    type_name = None
+
+    def __init__(self, name, documentation, label_names=()):
+        """
+        :param name: Metric name (e.g., 'tracker_upstream_requests_total').
+        :param documentation: One-line description shown in the HELP line.
+        :param label_names: Names of the labels every sample carries.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+        _registry.append(self)
+
+    def render(self):
+        """Return the metric in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self.lock:
+            lines.extend(self.render_samples())
+        return "\n".join(lines)
+
+    def render_samples(self):
+        return [
+            f"{self.name}{format_labels(self.label_names, labels)} {format_number(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Counter(Metric):
+    """Monotonically increasing count, e.g. of requests or errors."""
+
+    type_name = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    type_name = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self.lock:
+            self.values[labels] = value
+
+    def get(self, *labels):
+        with self.lock:
+            return self.values.get(labels)
+
+    def items(self):
+        """Return a list of (labels, value) pairs."""
+        with self.lock:
+            return sorted(self.values.items())
+
+    @contextmanager
+    def track_in_progress(self, *labels):
+        """Count the enclosed block as in progress while it runs."""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values (e.g., latencies) over fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, *labels, value):
+        with self.lock:
+            counts, total = self.values.get(labels, ([0] * len(self.buckets), 0.0))
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+                    break
+            self.values[labels] = (counts, total + value)
+
+    def render_samples(self):
+        lines = []
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = format_labels(self.label_names, labels, [("le", format_number(float(bound)))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {format_number(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "tracker_upstream_request_seconds", "Latency of single upstream HTTP attempts.", ["host"]
+)
+UPSTREAM_REQUESTS = Counter(
+    "tracker_upstream_requests_total", "Upstream HTTP attempts by host and status code ('error' if none).",
+    ["host", "status"],
+)
+UPSTREAM_IN_FLIGHT = Gauge("tracker_upstream_in_flight", "Upstream HTTP requests currently running.", ["host"])
+UPSTREAM_QUEUE_SECONDS = Histogram(
+    "tracker_upstream_queue_seconds", "Time upstream requests waited for their host's concurrency and rate limits.",
+    ["host"],
+)
+CACHE_LOOKUPS = Counter(
+    "tracker_cache_lookups_total", "Cache lookups by source and result (fresh, stale or missing).",
+    ["source", "state"],
+)
+STEP_SECONDS = Histogram(
+    "tracker_step_seconds", "Duration of fetch, compute and render steps.", ["step"]
+)
+SECTION_LAST_BUILD_SECONDS = Gauge(
+    "tracker_section_last_build_seconds", "Duration of the latest successful build of each dashboard section.",
+    ["section"],
+)
+
+PAGE_CACHE_LOOKUPS = Counter(
+    "tracker_page_cache_lookups_total", "Rendered page cache lookups by result (hit, miss or stale).", ["state"]
+)
+PAGE_CACHE_EVICTIONS = Counter(
+    "tracker_page_cache_evictions_total", "Rendered pages evicted to keep the cache within its size limit."
+)
+PAGE_CACHE_BYTES = Gauge("tracker_page_cache_bytes", "Total size of the rendered pages currently cached.")
+
+
+def render_metrics():
+    """
+    Return all metrics in the Prometheus text exposition format (version 0.0.4).
+
+    :return: String ending with a newline.
+    """
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+def start_request_timing():
+    """Start collecting Server-Timing entries for the request handled by the current thread."""
+    _request_timings.entries = []
+
+
+def record_request_timing(name, seconds, description=None):
+    """Add an entry to the current request's Server-Timing header, if a request is being timed."""
+    entries = getattr(_request_timings, "entries", None)
+    if entries is not None:
+        entries.append((name, seconds, description))
+
+
+def finish_request_timing():
+    """
+    Stop collecting timings for the current thread's request.
+
+    :return: Value for the Server-Timing header (empty if nothing was recorded).
+    """
+    entries = getattr(_request_timings, "entries", None) or []
+    _request_timings.entries = None
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" + (f';desc="{description}"' if description else "")
+        for name, seconds, description in entries
+    )
+
+
+@contextmanager
+def timed(step):
+    """
+    Time the enclosed block as a step: recorded in the step histogram and in the Server-Timing
+    header if it runs while a request is being handled on this thread.
+
+    :param step: Name of the step (e.g., 'generate_world_bank_insights').
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started_at
+        STEP_SECONDS.observe(step, value=seconds)
+        record_request_timing(step, seconds)
+
+
+def instrument(step=None):
+    """
+    Decorator timing every call of a function as a step (named after the function by default).
+
+    :param step: Optional name of the step.
+    """
+    def decorator(func):
+        name = step or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import os
+
+from flask import Response, request
+from werkzeug.http import http_date
+
+try:
+    import brotli
+except ImportError:  # Optional; responses are then compressed with gzip only
+    brotli = None
+
+# Seconds browsers and shared caches (reverse proxies, CDNs) may reuse a response without revalidating,
+# and may keep serving it while revalidating in the background
+HTTP_MAX_AGE = int(os.environ.get("TRACKER_HTTP_MAX_AGE", 60))
+HTTP_STALE_WHILE_REVALIDATE = int(os.environ.get("TRACKER_HTTP_STALE_WHILE_REVALIDATE", 600))
+
+# Bodies are compressed once per dataset version, so the slowest, smallest settings are affordable
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESSED_SIZE = 512
+
+# Content encodings in order of preference
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def make_etag(version):
+    """Return the entity tag of everything rendered from a dataset version."""
+    return hashlib.blake2b(repr(version).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def accepted_encoding():
+    """Return the preferred content encoding the client accepts ('br', 'gzip' or 'identity')."""
+    for encoding in ENCODINGS:
+        if request.accept_encodings[encoding] > 0:
+            return encoding
+    return "identity"
+
+
+def compress(body, encoding):
+    """Compress a body with the given content encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def cache_control(cacheable):
+    """Return the Cache-Control header of a response that may (or may not yet) be reused by caches."""
+    if not cacheable:
+        # Content still loading: caches must check back every time, the ETag keeps that cheap
+        return "no-cache"
+    return f"public, max-age={HTTP_MAX_AGE}, stale-while-revalidate={HTTP_STALE_WHILE_REVALIDATE}"
+
+
+def versioned_response(cache, key, version, render, mimetype, last_modified=None, cacheable=True, max_age=None):
+    """
+    Serve a response that only depends on a dataset version.
+
+    The response carries a strong ETag and Last-Modified header derived from the version, so a
+    conditional request for an unchanged version is answered with 304 without rendering anything.
+    Bodies are rendered and compressed once per version and encoding, then served from the cache.
+
+    :param cache: PageCache holding the rendered and compressed bodies.
+    :param key: Identifies what is rendered (e.g., ('index',)); combined with the encoding in the cache.
+    :param version: Hashable dataset version the body is rendered from.
+    :param render: Function without arguments returning the body as a string.
+    :param mimetype: Content type of the response.
+    :param last_modified: Time (in seconds since the epoch) the version was built, if known.
+    :param cacheable: False if the content is incomplete (e.g., sections still loading).
+    :param max_age: Optional seconds to keep the bodies in the cache, instead of the cache's max_age.
+    :return: flask.Response
+    """
+    tag = make_etag(version)
+    encoding = accepted_encoding()
+    # Every encoding of the same version is a different representation, with its own strong ETag
+    etag = tag if encoding == "identity" else f"{tag}-{encoding}"
+
+    headers = {"Cache-Control": cache_control(cacheable), "Vary": "Accept-Encoding"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(int(last_modified))
+
+    # The client holds this version if it has any of its representations (bodies too small to
+    # compress are sent as identity whatever the client accepts)
+    not_modified = (
+        any(request.if_none_match.contains(candidate) for candidate in [tag, *(f"{tag}-{e}" for e in ENCODINGS)])
+        if request.if_none_match
+        else last_modified is not None and request.if_modified_since is not None
+        and int(last_modified) <= request.if_modified_since.timestamp()
+    )
+    if not_modified:
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    body = cache.get((*key, encoding), tag)
+    if body is None:
+        identity = cache.get((*key, "identity"), tag)
+        if identity is None:
+            identity = render().encode("utf-8")
+            cache.put((*key, "identity"), tag, identity, max_age)
+        if encoding != "identity" and len(identity) < MIN_COMPRESSED_SIZE:
+            encoding, etag = "identity", tag
+        body = compress(identity, encoding)
+        if encoding != "identity":
+            cache.put((*key, encoding), tag, body, max_age)
+
+    response = Response(body, mimetype=mimetype, headers=headers)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+from monitoring.metrics import PAGE_CACHE_BYTES, PAGE_CACHE_EVICTIONS, PAGE_CACHE_LOOKUPS
+
+
+class PageCache:
+    """
+    Least-recently-used cache of rendered responses, bounded by the total size of their bodies.
+
+    Every entry records the dataset version it was rendered from; looking it up with another
+    version drops it, so a page is never served from data older than the caller's.
+    """
+
+    def __init__(self, max_bytes, max_age):
+        """
+        :param max_bytes: Total size of the cached bodies above which the least recently used are evicted.
+        :param max_age: Seconds after which an entry is dropped even if its version is still current.
+        """
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (version, body, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """
+        Return the cached body of a key if it was rendered from the given version and has not expired.
+
+        :return: Bytes, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                state = "miss"
+            elif entry[0] != version or entry[2] <= time.time():
+                self._remove(key)
+                state = "stale"
+            else:
+                self._entries.move_to_end(key)
+                state = "hit"
+        PAGE_CACHE_LOOKUPS.inc(state)
+        return entry[1] if state == "hit" else None
+
+    def put(self, key, version, body, max_age=None):
+        """
+        Cache a rendered body, evicting the least recently used entries until it fits.
+
+        :param body: Bytes (bodies larger than the whole cache are not cached).
+        :param max_age: Optional seconds to keep this entry, instead of the cache's max_age.
+        """
+        if len(body) > self.max_bytes:
+            return
+        expires_at = time.time() + (self.max_age if max_age is None else max_age)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, body, expires_at)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                PAGE_CACHE_EVICTIONS.inc()
+            PAGE_CACHE_BYTES.set(value=self.size)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            PAGE_CACHE_BYTES.set(value=0)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, body, _ = self._entries.pop(key)
+        self.size -= len(body)
+        PAGE_CACHE_BYTES.set(value=self.size)
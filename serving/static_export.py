@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from serving.http_cache import make_etag
+
+# File in the output directory recording what every exported file was rendered from
+EXPORT_MANIFEST_NAME = "export-manifest.json"
+
+# Hex digits of the content hash added to asset file names
+ASSET_HASH_LENGTH = 10
+
+
+def file_digest(path):
+    """Return the BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def directory_digests(directory, extensions=None):
+    """
+    Return the digest of every file under a directory.
+
+    :param directory: Directory to walk.
+    :param extensions: Optional tuple of file extensions (e.g., ('.py',)) to limit the files to.
+    :return: Sorted list of (path relative to the directory, file_digest) tuples.
+    """
+    return sorted(
+        (os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/"), file_digest(os.path.join(root, name)))
+        for root, _, names in os.walk(directory)
+        for name in names
+        if extensions is None or name.endswith(extensions)
+    )
+
+
+def write_atomically(path, content):
+    """Write a file so that readers (e.g., a CDN pulling from the directory) never see it half-written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as output_file:
+            output_file.write(content)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+class StaticExport:
+    """
+    Incremental export of rendered pages, JSON files and static assets into a directory.
+
+    Assets are copied under content-hashed names (style.css -> style.<hash>.css), so they can be
+    cached forever. A page is only rendered again if its dataset version, the templates or the
+    assets changed since the previous export into the same directory.
+    """
+
+    def __init__(self, output_dir, static_dir, template_dir, static_url_path="/static"):
+        """
+        :param output_dir: Directory to export into (created if needed).
+        :param static_dir: Directory of the static assets to copy.
+        :param template_dir: Directory of the templates the pages are rendered from.
+        :param static_url_path: URL path the static assets are served under.
+        """
+        self.output_dir = output_dir
+        self.static_dir = static_dir
+        self.template_dir = template_dir
+        self.static_url_path = static_url_path
+        self.asset_urls = {}
+        self.rendered = []
+        self.unchanged = []
+        self.assets_copied = 0
+
+        manifest_path = os.path.join(output_dir, EXPORT_MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding="utf-8") as manifest_file:
+                self.previous = json.load(manifest_file).get("files", {})
+        except (FileNotFoundError, ValueError):
+            self.previous = {}
+        # Files not exported this time (e.g., other countries' pages) keep their records
+        self.files = dict(self.previous)
+        self.inputs_digest = None
+
+    def copy_assets(self):
+        """
+        Copy every static asset under its content-hashed name, skipping those already exported.
+
+        :return: Dictionary mapping asset paths relative to the static directory (e.g., 'style.css')
+                 to their exported URLs (e.g., '/static/style.0a1b2c3d4e.css').
+        """
+        for root, _, names in os.walk(self.static_dir):
+            for name in sorted(names):
+                source = os.path.join(root, name)
+                relative = os.path.relpath(source, self.static_dir).replace(os.sep, "/")
+                stem, extension = os.path.splitext(relative)
+                hashed = f"{stem}.{file_digest(source)[:ASSET_HASH_LENGTH]}{extension}"
+                target = os.path.join(self.output_dir, self.static_url_path.strip("/"), *hashed.split("/"))
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copyfile(source, target)
+                    self.assets_copied += 1
+                self.asset_urls[relative] = f"{self.static_url_path}/{hashed}"
+
+        # Every page depends on the templates and on the asset names it links to
+        self.inputs_digest = make_etag((directory_digests(self.template_dir), sorted(self.asset_urls.items())))
+        return self.asset_urls
+
+    def export(self, path, version, render):
+        """
+        Write one file, rendering it only if its inputs changed since the previous export.
+
+        :param path: Path of the file relative to the output directory (e.g., 'country/POL/index.html').
+        :param version: Hashable dataset version the file is rendered from.
+        :param render: Function without arguments returning the file's content as a string.
+        :return: True if the file was rendered, False if the previous export was kept.
+        """
+        digest = make_etag((version, self.inputs_digest))
+        target = os.path.join(self.output_dir, *path.split("/"))
+        self.files[path] = digest
+        if self.previous.get(path) == digest and os.path.exists(target):
+            self.unchanged.append(path)
+            return False
+
+        write_atomically(target, render().encode("utf-8"))
+        self.rendered.append(path)
+        return True
+
+    def save_manifest(self):
+        """Record what every file was rendered from, for the next incremental export."""
+        manifest = {"files": self.files, "assets": self.asset_urls}
+        write_atomically(
+            os.path.join(self.output_dir, EXPORT_MANIFEST_NAME),
+            json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+        )
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The app's packages live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_fetching import cache, single_flight  # noqa: E402
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    """Point the persistent cache and the fetch locks at a temporary directory."""
+    connection = getattr(cache._local, "connection", None)
+    if connection is not None:
+        connection.close()
+    monkeypatch.setattr(cache._local, "connection", None, raising=False)
+    monkeypatch.setattr(cache, "CACHE_PATH", str(tmp_path / "tracker.sqlite3"))
+    monkeypatch.setattr(cache, "OFFLINE_MODE", False)
+    monkeypatch.setattr(single_flight, "LOCK_DIR", str(tmp_path / "locks"))
+    yield cache
+    connection = getattr(cache._local, "connection", None)
+    if connection is not None:
+        connection.close()
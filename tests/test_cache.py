@@ -0,0 +1,100 @@
+import threading
+import time
+
+from data_fetching import cache
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_lookup_of_missing_value(cache_db):
+    assert cache.lookup("world_bank", "UKR", "SP.POP.TOTL") == (None, "missing")
+
+
+def test_stored_value_is_fresh_until_its_ttl(cache_db, monkeypatch):
+    cache.store("world_bank", [("UKR", "SP.POP.TOTL", 41.1)])
+    assert cache.lookup("world_bank", "UKR", "SP.POP.TOTL") == (41.1, "fresh")
+
+    stored_at = time.time()
+    monkeypatch.setattr(time, "time", lambda: stored_at + cache.SOURCE_TTLS["world_bank"] + 1)
+    assert cache.lookup("world_bank", "UKR", "SP.POP.TOTL") == (41.1, "stale")
+
+
+def test_sources_without_ttl_use_the_default(cache_db, monkeypatch):
+    cache.store("unknown_source", [("", "key", [1, 2])])
+    stored_at = time.time()
+    monkeypatch.setattr(time, "time", lambda: stored_at + cache.DEFAULT_TTL - 1)
+    assert cache.lookup("unknown_source", "", "key") == ([1, 2], "fresh")
+    monkeypatch.setattr(time, "time", lambda: stored_at + cache.DEFAULT_TTL + 1)
+    assert cache.lookup("unknown_source", "", "key")[1] == "stale"
+
+
+def test_storing_again_replaces_the_value(cache_db):
+    cache.store("openalex", [("", "gender equality", ["old"])])
+    cache.store("openalex", [("", "gender equality", ["new"])])
+    assert cache.lookup("openalex", "", "gender equality") == (["new"], "fresh")
+
+
+def test_cached_fetch_fetches_missing_values_once(cache_db):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"value": 1}
+
+    assert cache.cached_fetch("wikidata", "UA", "counts", fetch) == {"value": 1}
+    assert cache.cached_fetch("wikidata", "UA", "counts", fetch) == {"value": 1}
+    assert len(calls) == 1
+
+
+def test_cached_fetch_does_not_cache_failures(cache_db):
+    assert cache.cached_fetch("wikidata", "UA", "counts", lambda: None) is None
+    assert cache.lookup("wikidata", "UA", "counts") == (None, "missing")
+    assert cache.cached_fetch("wikidata", "UA", "counts", lambda: 5) == 5
+
+
+def test_cached_fetch_serves_stale_values_while_refreshing(cache_db, monkeypatch):
+    cache.store("rest_countries", [("", "all", ["old"])])
+    stored_at = time.time()
+    later = stored_at + cache.SOURCE_TTLS["rest_countries"] + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return ["new"]
+
+    # Answered from the stale value without waiting for the refresh
+    assert cache.cached_fetch("rest_countries", "", "all", fetch) == ["old"]
+    release.set()
+    wait_until(lambda: cache.lookup("rest_countries", "", "all")[0] == ["new"])
+    assert cache.lookup("rest_countries", "", "all") == (["new"], "fresh")
+
+
+def test_offline_mode_never_fetches(cache_db, monkeypatch):
+    monkeypatch.setattr(cache, "OFFLINE_MODE", True)
+
+    def fetch():
+        raise AssertionError("fetched while offline")
+
+    assert cache.cached_fetch("openalex", "", "gender equality", fetch) is None
+
+
+def test_background_refreshes_are_deduplicated_by_key(cache_db):
+    release = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+
+    cache.refresh_in_background("key", refresh)
+    cache.refresh_in_background("key", refresh)
+    release.set()
+    wait_until(lambda: "key" not in cache._refreshing)
+    assert len(calls) == 1
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from data_fetching import cache, country_metadata, fetch_engine
+from data_fetching.country_metadata import CountryMetadataUnavailable, get_metadata, install_metadata, peek_metadata
+
+RECORDS = [
+    {"name": {"common": "Ukraine"}, "cca2": "UA", "cca3": "UKR", "borders": ["POL", "MDA"]},
+    {"name": {"common": "Poland"}, "cca2": "PL", "cca3": "POL", "borders": ["UKR"]},
+    {"name": {"common": "Moldova"}, "cca2": "MD", "cca3": "MDA", "borders": ["UKR"]},
+]
+
+
+class StubResponse:
+    def __init__(self, status_code, records=None):
+        self.status_code = status_code
+        self.records = records
+
+    def json(self):
+        return self.records
+
+
+@pytest.fixture
+def rest_countries(cache_db, monkeypatch):
+    """Stub REST Countries answering with `responses[-1]`, recording the requests."""
+    stub = {"responses": [StubResponse(200, RECORDS)], "requests": []}
+
+    def get(url, params=None, **options):
+        stub["requests"].append((url, params))
+        return stub["responses"][-1]
+
+    monkeypatch.setattr(fetch_engine, "get", get)
+    monkeypatch.setattr(country_metadata, "LOCAL_COUNTRIES_PATH", None)
+    monkeypatch.setattr(country_metadata, "_metadata", None)
+    return stub
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_all_countries_are_loaded_in_one_request(rest_countries):
+    metadata = get_metadata()
+    assert rest_countries["requests"] == [
+        (country_metadata.REST_COUNTRIES_ALL_URL, {"fields": country_metadata.REST_COUNTRIES_FIELDS})
+    ]
+    assert metadata.iso3("pl") == "POL"
+    assert metadata.iso3("UKR") == "UKR"
+    assert metadata.iso2("MDA") == "MD"
+    assert metadata.iso2("XYZ") is None
+    assert metadata.name("UA") == "Ukraine"
+    assert metadata.name("XYZ") == "XYZ"
+    assert metadata.neighbors("ua") == ["POL", "MDA"]
+    assert metadata.neighbors("XYZ") == []
+
+    assert get_metadata() is metadata
+    assert len(rest_countries["requests"]) == 1
+
+
+def test_outdated_index_is_reloaded_in_the_background(rest_countries):
+    install_metadata(RECORDS[:1], loaded_at=0)
+    old = peek_metadata()
+
+    # A failed reload keeps the old index in use
+    rest_countries["responses"].append(StubResponse(500))
+    assert get_metadata() is old
+    wait_until(lambda: "country_metadata" not in cache._refreshing)
+    assert peek_metadata() is old
+
+    rest_countries["responses"].append(StubResponse(200, RECORDS))
+    assert get_metadata() is old
+    wait_until(lambda: peek_metadata() is not old)
+    assert sorted(peek_metadata().names) == ["MDA", "POL", "UKR"]
+    assert peek_metadata().version != old.version
+
+
+def test_unavailable_metadata(rest_countries):
+    rest_countries["responses"].append(StubResponse(503))
+    with pytest.raises(CountryMetadataUnavailable):
+        get_metadata()
+    assert peek_metadata() is None
+    assert get_metadata(wait=False) is None
+    wait_until(lambda: "country_metadata" not in cache._refreshing)
+
+    # The cached records are used once they could be fetched
+    rest_countries["responses"].append(StubResponse(200, RECORDS))
+    assert "POL" in get_metadata().names
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from data_processing.derived_metrics import (
+    MISSING, DerivedMetrics, Gap, Largest, RegionalComparison, Rank, Text, Value, nest,
+)
+from data_processing.indicator_store import IndicatorStore
+
+
+def make_store(ukraine_parliament=20.8):
+    return IndicatorStore(
+        ["Ukraine", "Poland", "Moldova"],
+        ["women_in_parliament", "labor_female", "labor_male"],
+        [2023],
+        [
+            [[ukraine_parliament], [47.0], [62.0]],
+            [[30.0], [50.0], [65.0]],
+            [[40.0], [np.nan], [55.0]],
+        ],
+    )
+
+
+def make_metrics(renders):
+    def render(parliament, gap):
+        renders.append((parliament, gap))
+        return f"{parliament}% / {gap}"
+
+    return DerivedMetrics([
+        Value("parliament.value", "women_in_parliament"),
+        Rank("parliament.rank", "women_in_parliament"),
+        RegionalComparison("parliament.comparison", "women_in_parliament", "above", "below"),
+        Gap("labor.gap", "labor_female", "labor_male"),
+        Largest("labor.largest", (("Women", "labor_female"), ("Men", "labor_male"))),
+        Text("labor.text", ("labor.gap",), lambda gap: f"gap {gap}"),
+        Text("summary", ("parliament.value", "labor.gap"), render),
+    ])
+
+
+def test_metrics_of_every_kind():
+    values = make_metrics([]).compute(make_store(), "Ukraine")
+    assert values["parliament.value"] == 20.8
+    assert values["parliament.rank"] == 3
+    assert values["parliament.comparison"] == "below"
+    assert values["labor.gap"] == -15.0
+    assert values["labor.largest"] == "Men"
+    assert values["labor.text"] == "gap -15.0"
+    assert nest(values)["parliament"]["rank"] == 3
+
+
+def test_missing_values():
+    values = make_metrics([]).compute(make_store(), "Moldova")
+    assert values["labor.gap"] is None
+    assert values["labor.text"] is None
+    assert make_metrics([]).compute(make_store(), "Unknown")["parliament.value"] == MISSING
+
+
+def test_numeric_values_are_rounded_before_rendering():
+    renders = []
+    values = make_metrics(renders).compute(make_store(ukraine_parliament=83.7654321), "Ukraine")
+    assert values["parliament.value"] == 83.77
+    assert values["summary"] == "83.77% / -15.0"
+    assert renders == [(83.77, -15.0)]
+
+
+def test_only_metrics_of_changed_series_are_recomputed():
+    renders = []
+    metrics = make_metrics(renders)
+    metrics.compute(make_store(), "Ukraine")
+    metrics.compute(make_store(), "Ukraine")
+    assert len(renders) == 1
+
+    values = metrics.compute(make_store(ukraine_parliament=35.0), "Ukraine")
+    assert len(renders) == 2
+    assert values["parliament.rank"] == 2
+    assert values["labor.gap"] == -15.0
+
+
+def test_invalid_registries_are_rejected():
+    with pytest.raises(ValueError):
+        DerivedMetrics([Value("a", "x"), Value("a", "y")])
+    with pytest.raises(ValueError):
+        DerivedMetrics([Text("text", ("undefined",), str)])
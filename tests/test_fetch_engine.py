@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from data_fetching import fetch_engine, http_client
+
+
+class StubUpstream:
+    """Stands in for http_client.get, recording how many requests run at once per host."""
+
+    def __init__(self, delays=None, default_delay=0.05):
+        self.delays = list(delays or [])
+        self.default_delay = default_delay
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.started = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        host = url.split("/")[2]
+        with self.lock:
+            call = len(self.started)
+            self.started.append((time.monotonic(), url))
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+            delay = self.delays[call] if call < len(self.delays) else self.default_delay
+        try:
+            time.sleep(delay)
+            return {"call": call, "url": url, **kwargs}
+        finally:
+            with self.lock:
+                self.in_flight[host] -= 1
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    stub = StubUpstream()
+    monkeypatch.setattr(http_client, "get", stub.get)
+    monkeypatch.setattr(fetch_engine, "_host_limiters", {})
+    monkeypatch.setattr(fetch_engine, "HOST_LIMITS", {"limited.test": (2, 0), "other.test": (4, 0), "throttled.test": (10, 20)})
+    return stub
+
+
+def test_requests_in_flight_per_host_never_exceed_its_limit(upstream):
+    responses = fetch_engine.get_many(
+        [(f"http://limited.test/{i}", {}) for i in range(8)] + [(f"http://other.test/{i}", {}) for i in range(4)]
+    )
+
+    assert upstream.max_in_flight["limited.test"] == 2
+    # Other hosts have their own limits and are not held back
+    assert 1 < upstream.max_in_flight["other.test"] <= 4
+    assert [response["url"] for response in responses] == (
+        [f"http://limited.test/{i}" for i in range(8)] + [f"http://other.test/{i}" for i in range(4)]
+    )
+
+
+def test_requests_are_spaced_by_the_host_rate_limit(upstream):
+    upstream.default_delay = 0
+    fetch_engine.get_many([(f"http://throttled.test/{i}", {}) for i in range(5)])
+
+    starts = sorted(started for started, _ in upstream.started)
+    # 20 requests per second: one every 50 ms
+    assert starts[-1] - starts[0] >= 4 * 0.05 * 0.9
+
+
+def test_hedged_request_returns_the_faster_response(upstream):
+    upstream.delays = [1.0, 0.01]
+    started_at = time.monotonic()
+    response = fetch_engine.get("http://limited.test/slow", hedge_after=0.1)
+
+    assert response["call"] == 1
+    assert time.monotonic() - started_at < 0.8
+    assert len(upstream.started) == 2
+
+
+def test_fast_requests_are_not_hedged(upstream):
+    response = fetch_engine.get("http://limited.test/fast", hedge_after=1.0, params={"page": 1})
+    assert response["call"] == 0 and response["params"] == {"page": 1}
+    assert len(upstream.started) == 1
+
+
+def test_hedged_request_survives_one_failure(upstream, monkeypatch):
+    calls = []
+
+    def flaky(url, **kwargs):
+        calls.append(url)
+        if len(calls) == 1:
+            time.sleep(0.2)
+            raise ConnectionError("reset")
+        time.sleep(0.3)
+        return "second"
+
+    monkeypatch.setattr(http_client, "get", flaky)
+    assert fetch_engine.get("http://limited.test/flaky", hedge_after=0.05) == "second"
+
+
+def test_run_executes_coroutines_on_the_daemon_loop():
+    async def where():
+        return threading.current_thread().name
+
+    assert fetch_engine.run(where()) == "fetch-engine"
+    assert fetch_engine.get_loop() is fetch_engine.get_loop()
+    assert fetch_engine._loop_thread.daemon
+
+
+def test_run_from_the_loop_itself_is_refused():
+    async def nested():
+        async def inner():
+            return 1
+        fetch_engine.run(inner())
+
+    with pytest.raises(RuntimeError):
+        fetch_engine.run(nested())
+
+
+def test_run_concurrently_runs_blocking_functions_in_parallel():
+    started_at = time.monotonic()
+    results = fetch_engine.run_concurrently(*(lambda i=i: time.sleep(0.2) or i for i in range(4)))
+    assert results == [0, 1, 2, 3]
+    assert time.monotonic() - started_at < 0.6
@@ -0,0 +1,41 @@
+import pytest
+
+import app as tracker
+from data_fetching.country_metadata import CountryMetadata, CountryMetadataUnavailable
+
+RECORDS = [
+    {"name": {"common": "Poland"}, "cca2": "PL", "cca3": "POL", "borders": ["UKR"]},
+    {"name": {"common": "Ukraine"}, "cca2": "UA", "cca3": "UKR", "borders": ["POL"]},
+]
+
+
+@pytest.fixture
+def nothing_exported(monkeypatch):
+    """Fail the test if the command gets as far as exporting."""
+    def restore_snapshot():
+        raise AssertionError("the export started")
+
+    monkeypatch.setattr(tracker, "restore_snapshot", restore_snapshot)
+
+
+def freeze(*arguments):
+    return tracker.app.test_cli_runner().invoke(args=["freeze", *arguments])
+
+
+def test_unknown_country_is_rejected_before_exporting(tmp_path, monkeypatch, nothing_exported):
+    monkeypatch.setattr(tracker, "get_metadata", lambda: CountryMetadata(RECORDS))
+    result = freeze(str(tmp_path / "out"), "--country", "pl", "--country", "XYZ")
+    assert result.exit_code == 2
+    assert "unknown country code XYZ" in result.output
+    assert not (tmp_path / "out").exists()
+
+
+def test_unavailable_metadata_is_reported(tmp_path, monkeypatch, nothing_exported):
+    def get_metadata():
+        raise CountryMetadataUnavailable("No country metadata available from REST Countries")
+
+    monkeypatch.setattr(tracker, "get_metadata", get_metadata)
+    result = freeze(str(tmp_path / "out"), "--all-countries")
+    assert result.exit_code == 1
+    assert "Error: Country pages cannot be exported: No country metadata available" in result.output
+    assert not (tmp_path / "out").exists()
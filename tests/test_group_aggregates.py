@@ -0,0 +1,81 @@
+import numpy as np
+
+from data_processing import group_aggregates
+from data_processing.group_aggregates import (
+    POPULATION_INDICATOR, STATISTICS, CountryGroup, GroupAggregator, compute_group_statistics,
+)
+from data_processing.indicator_store import IndicatorStore
+
+nan = np.nan
+
+
+def statistic(statistics, name):
+    return statistics[STATISTICS.index(name), 0, 0]
+
+
+def test_missing_members_are_ignored():
+    statistics = compute_group_statistics(np.array([[[10.0]], [[nan]], [[30.0]]]), np.array([[1.0], [1.0], [1.0]]))
+    assert statistic(statistics, "count") == 2
+    assert statistic(statistics, "mean") == 20.0
+    assert statistic(statistics, "median") == 20.0
+    assert statistic(statistics, "weighted_mean") == 20.0
+
+
+def test_weighted_mean_leaves_out_members_without_population():
+    values = np.array([[[10.0]], [[20.0]], [[90.0]]])
+    statistics = compute_group_statistics(values, np.array([[1.0], [3.0], [nan]]))
+    assert statistic(statistics, "mean") == 40.0
+    assert statistic(statistics, "weighted_mean") == 17.5
+
+
+def test_group_without_values():
+    statistics = compute_group_statistics(np.full((2, 1, 1), nan), np.array([[1.0], [2.0]]))
+    assert statistic(statistics, "count") == 0
+    assert np.isnan(statistics[1:]).all()
+
+
+class StubPool:
+    """Country pool returning a fixed store, with versions set by the test."""
+
+    def __init__(self):
+        self.store = IndicatorStore(
+            ["POL", "HUN", "UKR"],
+            ["parliament", POPULATION_INDICATOR[0]],
+            [2022, 2023],
+            [
+                [[28.0, 30.0], [37.0, 38.0]],
+                [[12.0, 14.0], [9.7, 9.6]],
+                [[20.0, 21.0], [38.0, 37.0]],
+            ],
+        )
+        self.versions = {"POL": 1, "HUN": 1, "UKR": 1}
+
+    def get_store(self, country_names, sync=True):
+        return self.store.select(list(country_names)), {code: self.versions[code] for code in country_names}
+
+
+def test_update_recomputes_only_groups_with_changed_members(monkeypatch):
+    computed = []
+
+    def counting_statistics(values, weights):
+        computed.append(values.shape[0])
+        return compute_group_statistics(values, weights)
+
+    monkeypatch.setattr(group_aggregates, "compute_group_statistics", counting_statistics)
+    pool = StubPool()
+    aggregator = GroupAggregator(pool, ["parliament"])
+    groups = [CountryGroup("EU", "EU", "custom", ("POL", "HUN")), CountryGroup("EAP", "EaP", "custom", ("UKR",))]
+
+    aggregates = aggregator.update(groups)
+    assert len(computed) == 4  # Yearly and latest statistics of both groups
+    assert aggregates.value("EU", "parliament") == 22.0
+    assert aggregates.value("EU", "parliament", "count") == 2
+    assert aggregates.series("EAP", "parliament") == [(2022, 20.0), (2023, 21.0)]
+
+    aggregator.update(groups)
+    assert len(computed) == 4
+
+    pool.versions["UKR"] = 2
+    aggregates = aggregator.update(groups)
+    assert computed[4:] == [1, 1]  # Only the one-country group
+    assert aggregates.value("EU", "parliament") == 22.0
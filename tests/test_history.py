@@ -0,0 +1,74 @@
+from datetime import date
+
+import pytest
+
+from data_fetching import history
+from data_fetching.history import FIRST_YEAR, get_trend, store_values, sync_indicator_history
+
+INDICATORS = {"population": "SP.POP.TOTL", "parliament": "SG.GEN.PARL.ZS"}
+
+
+@pytest.fixture
+def requests(cache_db, monkeypatch):
+    """Answer history requests with one value per series and requested year, recording the requests."""
+    recorded = []
+
+    def fetch_history_values(country_codes, indicator_codes, start_year, end_year):
+        recorded.append((list(country_codes), list(indicator_codes), start_year, end_year))
+        return [
+            (country, indicator, year, float(year))
+            for country in country_codes for indicator in indicator_codes
+            for year in range(max(start_year, end_year - 1), end_year + 1)
+        ]
+
+    monkeypatch.setattr(history, "fetch_history_values", fetch_history_values)
+    return recorded
+
+
+def test_sync_requests_only_the_years_after_the_stored_ones(requests):
+    store_values([("UKR", "SP.POP.TOTL", 2020, 41.0), ("POL", "SP.POP.TOTL", 2019, 37.9), ("POL", "SP.POP.TOTL", 2020, 37.8)],
+                 [("UKR", "SP.POP.TOTL"), ("POL", "SP.POP.TOTL")])
+    with history.get_connection() as connection:
+        connection.execute("UPDATE indicator_history_sync SET synced_at = 0")  # Outdated
+
+    end_year = date.today().year
+    stored = sync_indicator_history(["UKR", "POL"], INDICATORS)
+    # Series never synced share one request from the first year; the stored ones only ask for newer years
+    assert requests == [
+        (["POL", "UKR"], ["SG.GEN.PARL.ZS"], FIRST_YEAR, end_year),
+        (["POL", "UKR"], ["SP.POP.TOTL"], 2021, end_year),
+    ]
+    assert stored == 8
+    assert history.get_sync_state()[("UKR", "SP.POP.TOTL")][0] == end_year
+
+
+def test_recently_synced_series_are_skipped(requests):
+    sync_indicator_history(["UKR"], INDICATORS)
+    requests.clear()
+    assert sync_indicator_history(["UKR"], INDICATORS) == 0
+    assert requests == []
+
+
+def test_series_without_new_values_are_still_marked_synced(requests, monkeypatch):
+    monkeypatch.setattr(history, "fetch_history_values", lambda *arguments: [])
+    sync_indicator_history(["UKR"], INDICATORS)
+    assert history.get_sync_state()[("UKR", "SP.POP.TOTL")][0] == FIRST_YEAR - 1
+
+    monkeypatch.setattr(history, "fetch_history_values", lambda *arguments: None)  # Upstream down
+    assert sync_indicator_history(["POL"], INDICATORS) == 0
+    assert ("POL", "SP.POP.TOTL") not in history.get_sync_state()
+
+
+def test_trend_summary(cache_db):
+    store_values([("UKR", "SG.GEN.PARL.ZS", year, value)
+                  for year, value in [(2010, 8.0), (2011, 10.0), (2012, 12.0), (2013, 14.0), (2014, 16.0)]])
+
+    trend = get_trend("UKR", "SG.GEN.PARL.ZS", since=2011)
+    assert (trend["start_year"], trend["start_value"]) == (2011, 10.0)
+    assert (trend["end_year"], trend["end_value"]) == (2014, 16.0)
+    assert trend["change"] == 6.0
+    assert trend["annual_change"] == pytest.approx(2.0)
+    assert trend["series"][0] == (2011, 10.0)
+
+    assert get_trend("UKR", "SG.GEN.PARL.ZS", since=2014) is None
+    assert get_trend("POL", "SG.GEN.PARL.ZS") is None
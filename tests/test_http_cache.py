@@ -0,0 +1,92 @@
+import gzip
+import time
+
+import pytest
+from flask import Flask
+from werkzeug.http import http_date
+
+from serving.http_cache import make_etag, versioned_response
+from serving.page_cache import PageCache
+
+app = Flask(__name__)
+
+BODY = "<html>" + "gender equality " * 100 + "</html>"
+
+
+@pytest.fixture
+def page_cache():
+    return PageCache(1024 * 1024, max_age=60)
+
+
+def respond(page_cache, version, headers=None, renders=None, **kwargs):
+    def render():
+        if renders is not None:
+            renders.append(version)
+        return BODY
+
+    with app.test_request_context("/", headers=headers or {}):
+        return versioned_response(page_cache, ("index",), version, render, "text/html", **kwargs)
+
+
+def test_response_carries_the_version_etag(page_cache):
+    response = respond(page_cache, "v1")
+    assert response.status_code == 200
+    assert response.get_etag() == (make_etag("v1"), False)
+    assert response.get_data(as_text=True) == BODY
+    assert response.headers["Cache-Control"].startswith("public")
+
+
+def test_matching_if_none_match_is_answered_with_304(page_cache):
+    renders = []
+    etag = respond(page_cache, "v1", renders=renders).get_etag()[0]
+
+    response = respond(page_cache, "v1", {"If-None-Match": f'"{etag}"'}, renders)
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert renders == ["v1"]
+
+
+def test_any_encoding_of_the_version_matches(page_cache):
+    gzip_etag = respond(page_cache, "v1", {"Accept-Encoding": "gzip"}).get_etag()[0]
+    assert gzip_etag == f"{make_etag('v1')}-gzip"
+
+    response = respond(page_cache, "v1", {"If-None-Match": f'"{gzip_etag}"'})
+    assert response.status_code == 304
+
+
+def test_a_new_version_is_rendered_again(page_cache):
+    renders = []
+    etag = respond(page_cache, "v1", renders=renders).get_etag()[0]
+
+    response = respond(page_cache, "v2", {"If-None-Match": f'"{etag}"'}, renders)
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+    assert renders == ["v1", "v2"]
+
+
+def test_bodies_are_rendered_once_per_version(page_cache):
+    renders = []
+    for _ in range(3):
+        respond(page_cache, "v1", renders=renders)
+        respond(page_cache, "v1", {"Accept-Encoding": "gzip"}, renders)
+    assert renders == ["v1"]
+
+
+def test_gzip_body_is_precompressed(page_cache):
+    response = respond(page_cache, "v1", {"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.get_data()).decode("utf-8") == BODY
+
+
+def test_if_modified_since_without_etag(page_cache):
+    built_at = time.time() - 100
+    headers = {"If-Modified-Since": http_date(int(built_at))}
+    assert respond(page_cache, "v1", headers, last_modified=built_at).status_code == 304
+    assert respond(page_cache, "v1", headers, last_modified=built_at + 50).status_code == 200
+
+
+def test_incomplete_responses_must_be_revalidated(page_cache):
+    response = respond(page_cache, "v1", cacheable=False)
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.get_etag()[0] == make_etag("v1")
@@ -0,0 +1,60 @@
+import numpy as np
+
+from data_processing.indicator_store import IndicatorStore
+
+NAN = np.nan
+
+
+def make_store():
+    return IndicatorStore(
+        ["Ukraine", "Poland", "Moldova"],
+        ["women_in_parliament", "unemployment_rate_female"],
+        [2021, 2022, 2023],
+        [
+            [[20.8, 20.8, NAN], [9.0, 9.5, 8.9]],
+            [[28.3, 28.3, 30.0], [3.5, NAN, NAN]],
+            [[NAN, NAN, NAN], [3.1, 3.3, 3.0]],
+        ],
+    )
+
+
+def test_latest_values_skip_missing_years():
+    store = make_store()
+    assert store.value("Ukraine", "women_in_parliament") == 20.8
+    assert store.value("Poland", "unemployment_rate_female") == 3.5
+    assert store.value("Moldova", "women_in_parliament") is None
+    assert store.value("Unknown", "women_in_parliament") is None
+
+
+def test_averages_ignore_missing_values_and_excluded_countries():
+    averages = make_store().averages(exclude=["Ukraine"])
+    assert averages["women_in_parliament"] == 30.0
+    assert averages["unemployment_rate_female"] == 3.25
+
+
+def test_rank_and_extreme():
+    store = make_store()
+    assert store.rank("Poland", "women_in_parliament") == 1
+    assert store.rank("Ukraine", "unemployment_rate_female", descending=False) == 3
+    assert store.rank("Moldova", "women_in_parliament") is None
+    assert store.extreme("unemployment_rate_female", highest=False) == ("Moldova", 3.0)
+
+
+def test_concat_aligns_years_and_renames_rows():
+    first = IndicatorStore(["UKR"], ["value"], [2020, 2021], [[[1.0, 2.0]]])
+    second = IndicatorStore(["POL"], ["value"], [2021, 2022], [[[3.0, 4.0]]])
+
+    store = IndicatorStore.concat([first, second], ["Ukraine", "Poland"])
+    assert store.countries == ["Ukraine", "Poland"]
+    assert store.years.tolist() == [2020, 2021, 2022]
+    np.testing.assert_array_equal(store.values[:, 0], [[1.0, 2.0, NAN], [NAN, 3.0, 4.0]])
+
+
+def test_select_and_select_indicators():
+    store = make_store()
+    assert store.select(["Moldova"]).to_country_data() == {
+        "Moldova": {"women_in_parliament": "N/A", "unemployment_rate_female": 3.0}
+    }
+    narrowed = store.select_indicators(["unemployment_rate_female"])
+    assert narrowed.indicators == ["unemployment_rate_female"]
+    assert narrowed.value("Ukraine", "unemployment_rate_female") == 8.9
@@ -0,0 +1,83 @@
+import zipfile
+
+import pytest
+
+from data_fetching import history, ingest_wdi
+from data_fetching.ingest_wdi import ingest_wdi_archive
+
+INDICATORS = {"population": "SP.POP.TOTL", "parliament": "SG.GEN.PARL.ZS"}
+
+ROWS = [
+    "Country Name,Country Code,Indicator Name,Indicator Code,2021,2022,2023,",
+    "Ukraine,UKR,Population,SP.POP.TOTL,41000000,40000000,,",
+    "Ukraine,UKR,GDP,NY.GDP.MKTP.CD,1,2,3,",
+    "Ukraine,UKR,Parliament,SG.GEN.PARL.ZS,20.8,21.0,n/a,",
+    "Poland,POL,Population,SP.POP.TOTL,37800000,37600000,37500000,",
+    "Poland,POL,Parliament,SG.GEN.PARL.ZS,28.7,,30.0,",
+]
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = tmp_path / "WDI_CSV.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("WDICSV.csv", "\n".join(ROWS) + "\n")
+    return str(path)
+
+
+def stored_values():
+    return {
+        (country, indicator, year): value
+        for country, indicator, year, value in history.get_connection().execute(
+            "SELECT country, indicator, year, value FROM indicator_history"
+        )
+    }
+
+
+def test_only_given_indicators_are_stored(cache_db, archive_path):
+    summary = ingest_wdi_archive(archive_path, INDICATORS)
+    assert summary["status"] == "completed"
+    assert summary["rows_read"] == 5
+    assert summary["series_ingested"] == 4
+    assert summary["values_stored"] == 9
+    assert summary["cells_skipped"] == 1
+
+    values = stored_values()
+    assert len(values) == 9
+    assert values[("UKR", "SG.GEN.PARL.ZS", 2022)] == 21.0
+    assert ("UKR", "SG.GEN.PARL.ZS", 2023) not in values
+    assert not any(indicator == "NY.GDP.MKTP.CD" for _, indicator, _ in values)
+    assert history.get_sync_state()[("POL", "SG.GEN.PARL.ZS")][0] == 2023
+
+
+def test_interrupted_import_resumes_after_the_committed_rows(cache_db, archive_path, monkeypatch):
+    write_values = history.write_values
+    batches = []
+
+    def interrupted_write(connection, rows, synced_series=()):
+        batches.append(list(synced_series))
+        write_values(connection, rows, synced_series)
+        if len(batches) == 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(history, "write_values", interrupted_write)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_wdi_archive(archive_path, INDICATORS, batch_rows=1)
+
+    # The second batch was rolled back together with its progress
+    assert set(stored_values()) == {("UKR", "SP.POP.TOTL", 2021), ("UKR", "SP.POP.TOTL", 2022)}
+    rows_done, completed = ingest_wdi.get_connection().execute("SELECT rows_done, completed FROM ingest_progress").fetchone()
+    assert (rows_done, completed) == (1, 0)
+
+    monkeypatch.setattr(history, "write_values", write_values)
+    summary = ingest_wdi_archive(archive_path, INDICATORS, batch_rows=1)
+    assert summary["rows_read"] == 4
+    assert summary["series_ingested"] == 3
+    assert len(stored_values()) == 9
+
+
+def test_completed_archive_is_not_read_again(cache_db, archive_path):
+    ingest_wdi_archive(archive_path, INDICATORS)
+    summary = ingest_wdi_archive(archive_path, INDICATORS)
+    assert summary["status"] == "already_complete"
+    assert summary["rows_read"] == 0
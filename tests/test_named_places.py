@@ -0,0 +1,63 @@
+from data_fetching.named_places import count_named_places, get_last_sync, load_naming_counts, store_named_places
+
+CLASSES = ["Q79007", "Q41176"]  # Street, building
+REGIONS = {
+    "Q1899": ("Kyiv", "Q1899", "Kyiv"),
+    "Q16666": ("Lviv", "Q164193", "Lviv Oblast"),
+    "Q27387": ("Drohobych", "Q164193", "Lviv Oblast"),
+}
+
+
+def item(classes, admins, namesakes, modified="2024-01-01T00:00:00Z"):
+    return {"modified": modified, "classes": classes, "admins": admins, "namesakes": namesakes}
+
+
+ITEMS = {
+    "Q1": item(["Q79007"], ["Q1899"], [["Q8", "female", "1991-08-24T00:00:00Z", None]]),
+    "Q2": item(["Q79007"], ["Q16666"], [["Q9", "male", "1956-01-01T00:00:00Z", None]]),
+    # Named after a woman and a man: counts for both genders
+    "Q3": item(["Q41176"], ["Q27387", "Q16666"], [["Q10", "female", None, None], ["Q11", "male", None, None]]),
+    # Not a street or building
+    "Q4": item(["Q5"], ["Q1899"], [["Q12", "female", None, None]]),
+    # Renamed: the naming ended
+    "Q5": item(["Q79007"], ["Q1899"], [["Q13", "male", "1950-01-01T00:00:00Z", "2022-05-01T00:00:00Z"]]),
+    # Namesake of unknown gender
+    "Q6": item(["Q79007"], ["Q1899"], [["Q14", None, None, None]]),
+}
+
+
+def test_places_are_counted_per_gender_and_breakdown():
+    counts = {(dimension, key): (label, female, male)
+              for dimension, key, label, female, male in count_named_places(ITEMS.values(), CLASSES, REGIONS)}
+    assert counts[("total", "UA")] == ("UA", 2, 2)
+    assert counts[("region", "Q1899")] == ("Kyiv", 1, 0)
+    assert counts[("region", "Q164193")] == ("Lviv Oblast", 1, 2)  # Q3 counts once in its region
+    assert counts[("locality", "Q16666")] == ("Lviv", 1, 2)
+    assert counts[("locality", "Q27387")] == ("Drohobych", 1, 1)
+    assert counts[("decade", "1990")] == ("1990s", 1, 0)
+    assert counts[("decade", "1950")] == ("1950s", 0, 1)
+    assert len(counts) == 8
+
+
+def test_incremental_sync_merges_edited_items(cache_db):
+    store_named_places(ITEMS, CLASSES, REGIONS, full=True)
+    full_synced_at = get_last_sync()[1]
+    assert load_naming_counts("total") == [{"key": "UA", "label": "UA", "female": 2, "male": 2}]
+
+    edited = {
+        # Renamed after a woman
+        "Q2": item(["Q79007"], ["Q16666"], [["Q15", "female", "2023-01-01T00:00:00Z", None]], "2024-02-01T00:00:00Z"),
+        "Q7": item(["Q79007"], ["Q1899"], [["Q16", "female", "2023-01-01T00:00:00Z", None]], "2024-02-02T00:00:00Z"),
+    }
+    store_named_places(edited, CLASSES, REGIONS, full=False)
+    assert load_naming_counts("total") == [{"key": "UA", "label": "UA", "female": 4, "male": 1}]
+    assert [(row["key"], row["female"]) for row in load_naming_counts("decade")] == [("1990", 1), ("2020", 2)]
+    assert [row["label"] for row in load_naming_counts("region")] == ["Lviv Oblast", "Kyiv"]
+
+    synced_at, last_full_sync, latest_modified = get_last_sync()
+    assert last_full_sync == full_synced_at <= synced_at
+    assert latest_modified == "2024-02-02T00:00:00Z"
+
+    # A full sync replaces the stored items
+    store_named_places({"Q7": edited["Q7"]}, CLASSES, REGIONS, full=True)
+    assert load_naming_counts("total") == [{"key": "UA", "label": "UA", "female": 1, "male": 0}]
@@ -0,0 +1,58 @@
+import time
+
+from serving.page_cache import PageCache
+
+
+def test_entries_are_only_served_for_their_version():
+    cache = PageCache(1000, max_age=60)
+    cache.put(("index", "identity"), "v1", b"page")
+    assert cache.get(("index", "identity"), "v1") == b"page"
+
+    # A newer dataset version invalidates the entry
+    assert cache.get(("index", "identity"), "v2") is None
+    assert cache.get(("index", "identity"), "v1") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_entries_expire_after_their_max_age(monkeypatch):
+    cache = PageCache(1000, max_age=60)
+    cache.put("page", "v1", b"page")
+    cache.put("short", "v1", b"short", max_age=5)
+    now = time.time()
+
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    assert cache.get("short", "v1") is None
+    assert cache.get("page", "v1") == b"page"
+
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("page", "v1") is None
+
+
+def test_least_recently_used_entries_are_evicted_beyond_the_size_limit():
+    cache = PageCache(10, max_age=60)
+    cache.put("a", "v", b"aaaa")
+    cache.put("b", "v", b"bbbb")
+    cache.get("a", "v")
+    cache.put("c", "v", b"cccc")
+
+    assert cache.get("b", "v") is None
+    assert cache.get("a", "v") == b"aaaa"
+    assert cache.get("c", "v") == b"cccc"
+    assert cache.size == 8
+
+
+def test_bodies_larger_than_the_cache_are_not_cached():
+    cache = PageCache(4, max_age=60)
+    cache.put("big", "v", b"too large")
+    assert len(cache) == 0
+    assert cache.get("big", "v") is None
+
+
+def test_replacing_an_entry_keeps_the_size_accurate():
+    cache = PageCache(100, max_age=60)
+    cache.put("page", "v1", b"12345")
+    cache.put("page", "v2", b"12")
+    assert cache.size == 2
+    cache.clear()
+    assert cache.size == 0 and len(cache) == 0
@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from data_fetching import research_corpus
+from data_fetching.research_corpus import get_connection, load_research_corpus, store_works, sync_research_corpus
+
+
+def paper(work_id, publication_date):
+    return {"id": work_id, "title": f"Paper {work_id}", "publication_date": publication_date}
+
+
+@pytest.fixture
+def openalex(cache_db, monkeypatch):
+    """Stub OpenAlex returning the works in `stub['works']`, recording the `since` of every request."""
+    stub = {"works": [], "since": []}
+
+    def fetch_research_works(query, since=None):
+        stub["since"].append(since)
+        return stub["works"]
+
+    monkeypatch.setattr(research_corpus, "fetch_research_works", fetch_research_works)
+    return stub
+
+
+def make_outdated(query):
+    with get_connection() as connection:
+        connection.execute("UPDATE research_sync SET synced_at = 0 WHERE query = ?", (query,))
+
+
+def test_sync_fetches_works_since_the_latest_stored_one(openalex):
+    openalex["works"] = [paper("W1", "2024-03-01"), paper("W2", "2024-05-10")]
+    assert sync_research_corpus("gender") == 2
+    assert openalex["since"] == [None]
+
+    # Synced within the TTL
+    assert sync_research_corpus("gender") == 0
+    assert len(openalex["since"]) == 1
+
+    make_outdated("gender")
+    openalex["works"] = [paper("W3", "2024-06-01")]
+    sync_research_corpus("gender")
+    assert openalex["since"][-1] == "2024-05-10"
+    assert [work["id"] for work in load_research_corpus("gender")] == ["W3", "W2", "W1"]
+
+
+def test_since_is_capped_at_today(openalex):
+    store_works("gender", [paper("W1", "2024-03-01"), paper("W9", "2999-01-01")])
+    make_outdated("gender")
+    sync_research_corpus("gender")
+    assert openalex["since"] == [date.today().isoformat()]
+
+
+def test_oldest_works_are_dropped_beyond_the_limit(openalex, monkeypatch):
+    monkeypatch.setattr(research_corpus, "RESEARCH_MAX_WORKS", 2)
+    store_works("gender", [paper("W1", "2024-01-01"), paper("W2", "2024-02-01"), paper("W3", "2024-03-01")])
+    assert [work["id"] for work in load_research_corpus("gender")] == ["W3", "W2"]
@@ -0,0 +1,49 @@
+from data_processing.research_index import ResearchIndex, get_research_index
+
+# Newest first, like the stored corpus
+PAPERS = [
+    {"id": "W4", "title": "Gender wage gaps in Eastern Europe", "authors": "Kowalska, A.",
+     "categories": ["Economics", "Labour"], "open_access": True},
+    {"id": "W3", "title": "Women in parliament", "authors": "Shevchenko, O.",
+     "categories": ["Political science"], "open_access": False},
+    {"id": "W2", "title": "Wage discrimination and gender", "authors": "Novak, P.",
+     "categories": ["Economics"], "open_access": False},
+    {"id": "W1", "title": "Parliamentary quotas", "authors": "Kowalska, A.",
+     "categories": ["Political science"], "open_access": True},
+]
+
+
+def ids(result):
+    total, papers = result
+    return total, [paper["id"] for paper in papers]
+
+
+def test_all_words_must_match_newest_first():
+    index = ResearchIndex(PAPERS)
+    assert ids(index.search("gender wage")) == (2, ["W4", "W2"])
+    assert ids(index.search("kowalska")) == (2, ["W4", "W1"])
+    assert ids(index.search("gender unknown")) == (0, [])
+    assert ids(index.search("")) == (4, ["W4", "W3", "W2", "W1"])
+
+
+def test_last_word_matches_as_a_prefix():
+    index = ResearchIndex(PAPERS)
+    assert ids(index.search("parl")) == (2, ["W3", "W1"])
+    assert ids(index.search("women parl")) == (1, ["W3"])
+    # Only the last word is a prefix
+    assert ids(index.search("parl women")) == (0, [])
+
+
+def test_category_and_open_access_filters():
+    index = ResearchIndex(PAPERS)
+    assert ids(index.search(category="Economics")) == (2, ["W4", "W2"])
+    assert ids(index.search("wage", category="Economics", open_access=True)) == (1, ["W4"])
+    assert ids(index.search(open_access=True, limit=1)) == (2, ["W4"])
+    assert ids(index.search(category="Unknown")) == (0, [])
+    assert index.top_categories(1) in (["Economics"], ["Political science"])
+
+
+def test_index_is_rebuilt_only_for_another_corpus():
+    index = get_research_index(PAPERS)
+    assert get_research_index(PAPERS) is index
+    assert get_research_index(list(PAPERS)) is not index
@@ -0,0 +1,48 @@
+import pytest
+
+import app as tracker
+from data_fetching import cache
+from data_processing import snapshot
+from data_processing.snapshot import DashboardSnapshot
+from monitoring.metrics import SECTION_LAST_BUILD_SECONDS, timed
+
+
+@pytest.fixture
+def client(cache_db, monkeypatch):
+    """Test client serving an empty snapshot, without building any section."""
+    monkeypatch.setattr(snapshot, "_current_snapshot", DashboardSnapshot())
+    monkeypatch.setattr(snapshot, "_section_ready", {})
+    monkeypatch.setattr(tracker, "start_snapshot_refresher", lambda *arguments: None)
+    SECTION_LAST_BUILD_SECONDS.set("research", value=1.5)
+    return tracker.app.test_client()
+
+
+def test_metrics_are_exposed(client):
+    with timed("test_step"):
+        pass
+    cache.lookup("test_source", "UKR", "SP.POP.TOTL")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "# TYPE tracker_step_seconds histogram" in text
+    assert 'tracker_step_seconds_bucket{step="test_step",le="+Inf"} 1' in text
+    assert 'tracker_step_seconds_count{step="test_step"} 1' in text
+    assert "# TYPE tracker_cache_lookups_total counter" in text
+    assert 'tracker_cache_lookups_total{source="test_source",state="missing"} 1' in text
+    assert 'tracker_section_last_build_seconds{section="research"} 1.5' in text
+
+
+def test_section_responses_report_the_source_builds(client):
+    response = client.get("/api/research")
+    assert response.status_code == 202
+    assert 'build_research;dur=1500.0;desc="last background build"' in response.headers["Server-Timing"]
+
+
+def test_other_responses_leave_out_the_source_builds(client):
+    assert "Server-Timing" not in client.get("/metrics").headers
+    static = client.get("/static/style.css")
+    assert static.status_code == 200
+    assert "build_research" not in static.headers.get("Server-Timing", "")
+    static.close()
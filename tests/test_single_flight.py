@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from data_fetching import single_flight
+
+
+def test_concurrent_callers_share_one_fetch(cache_db):
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    leader = threading.Thread(target=lambda: results.append(single_flight.do("key", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(single_flight.do("key", fetch))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["value"] * 4
+
+
+def test_errors_reach_the_leader_and_every_waiting_caller(cache_db):
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    def call():
+        try:
+            single_flight.do("key", fetch)
+        except ValueError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=call) for _ in range(2)]
+    for follower in followers:
+        follower.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert all(str(error) == "upstream failed" for error in errors)
+
+
+def test_a_failed_fetch_is_not_remembered(cache_db):
+    def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        single_flight.do("key", fail)
+    assert "key" not in single_flight._in_flight
+    assert single_flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_recheck_avoids_the_fetch(cache_db):
+    def fetch():
+        raise AssertionError("fetched although the value was available")
+
+    assert single_flight.do("key", fetch, lambda: "cached") == "cached"
+    assert single_flight.do("key", lambda: "fetched", lambda: single_flight.NOT_FOUND) == "fetched"
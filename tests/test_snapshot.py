@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from data_processing import snapshot, snapshot_file
+from data_processing.snapshot import (
+    DashboardSnapshot, get_current_snapshot, publish_section, refresh_section, wait_for_section,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot(monkeypatch):
+    """Start every test from an empty snapshot, recording saves instead of writing the snapshot file."""
+    saved = []
+    monkeypatch.setattr(snapshot, "_current_snapshot", DashboardSnapshot())
+    monkeypatch.setattr(snapshot, "_section_ready", {})
+    monkeypatch.setattr(snapshot, "_published_sections", {})
+    monkeypatch.setattr(snapshot_file, "save_snapshot_file", lambda sections: saved.append(dict(sections)))
+    return saved
+
+
+class SlowBuild:
+    """Section build that blocks until the test releases it."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.release = threading.Event()
+
+    def __call__(self):
+        assert self.release.wait(5)
+        return self.fields
+
+
+def refresh_in_background(section, build, budget):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(refresh_section(section, build, budget)))
+    thread.start()
+    return thread, results
+
+
+def test_slow_section_without_earlier_data_is_marked_missing(fresh_snapshot):
+    build = SlowBuild({"research_papers": ["paper"]})
+    thread, results = refresh_in_background("research", build, budget=0.05)
+
+    assert wait_for_section("research", timeout=5)
+    assert get_current_snapshot().is_missing("research")
+    assert not get_current_snapshot().is_ready("research")
+    assert get_current_snapshot().research_papers is None
+
+    # The late result is still published once it arrives
+    build.release.set()
+    thread.join(5)
+    assert results == [True]
+    current = get_current_snapshot()
+    assert current.is_ready("research") and not current.is_missing("research")
+    assert current.research_papers == ["paper"]
+    assert "research" in fresh_snapshot[-1]
+
+
+def test_slow_section_with_earlier_data_keeps_it(fresh_snapshot):
+    publish_section("research", {"research_papers": ["old paper"]}, built_at=1.0)
+    build = SlowBuild({"research_papers": ["new paper"]})
+    thread, results = refresh_in_background("research", build, budget=0.05)
+
+    thread.join(0.3)
+    assert thread.is_alive()
+    current = get_current_snapshot()
+    assert current.is_ready("research") and not current.is_missing("research")
+    assert current.research_papers == ["old paper"]
+
+    build.release.set()
+    thread.join(5)
+    assert get_current_snapshot().research_papers == ["new paper"]
+
+
+def test_failed_build_keeps_the_last_good_section(fresh_snapshot):
+    publish_section("research", {"research_papers": ["old paper"]}, built_at=1.0)
+
+    def failing_build():
+        raise ConnectionError("upstream down")
+
+    assert refresh_section("research", failing_build, budget=1) is False
+    current = get_current_snapshot()
+    assert current.research_papers == ["old paper"]
+    assert current.version(["research"]) == (("research", 1.0, False),)
+    assert fresh_snapshot == []
+
+
+def test_section_fields_are_published_together(fresh_snapshot):
+    mismatches = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            current = get_current_snapshot()
+            if current.gender_named_counts != current.gender_naming_breakdown:
+                mismatches.append(current)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for generation in range(2000):
+        publish_section("gender_naming", {
+            "gender_named_counts": {"generation": generation},
+            "gender_naming_breakdown": {"generation": generation},
+        })
+    done.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert mismatches == []
+    assert get_current_snapshot().gender_named_counts == {"generation": 1999}
+    assert get_current_snapshot().is_ready("gender_naming")
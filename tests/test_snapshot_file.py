@@ -0,0 +1,80 @@
+import numpy as np
+
+from data_fetching import country_metadata
+from data_processing import snapshot_file
+from data_processing.group_aggregates import CountryGroup, GroupAggregates, STATISTICS
+from data_processing.indicator_store import IndicatorStore
+
+RECORDS = [
+    {"name": {"common": "Ukraine"}, "cca2": "UA", "cca3": "UKR", "borders": ["POL"]},
+    {"name": {"common": "Poland"}, "cca2": "PL", "cca3": "POL", "borders": ["UKR"]},
+]
+
+
+def make_store():
+    return IndicatorStore(
+        ["Ukraine", "Poland"], ["women_in_parliament"], [2022, 2023], [[[20.8, np.nan]], [[28.3, 30.0]]]
+    )
+
+
+def make_group_aggregates():
+    group = CountryGroup("EU27", "European Union", "custom", ("POL",))
+    rows = [f"EU27/{statistic}" for statistic in STATISTICS]
+    yearly = IndicatorStore(rows, ["women_in_parliament"], [2022, 2023], np.arange(len(rows) * 2.0).reshape(-1, 1, 2))
+    latest = IndicatorStore(rows, ["women_in_parliament"], [0], np.arange(len(rows) * 1.0).reshape(-1, 1, 1))
+    return GroupAggregates([group], yearly, latest)
+
+
+def test_sections_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(country_metadata, "_metadata", country_metadata.CountryMetadata(RECORDS))
+    path = str(tmp_path / "dashboard.snapshot")
+    store = make_store()
+    sections = {
+        "world_bank": (1700000000.0, {
+            "indicator_store": store,
+            "country_data": store.to_country_data(),
+            "quick_overview_metrics": {"women_in_parliament": {"value": 20.8, "ranking": 2}},
+        }),
+        "country_groups": (1700000100.0, {"group_aggregates": make_group_aggregates()}),
+        "research": (1700000200.0, {"research_papers": [{"id": "W1", "title": "Gender gaps"}]}),
+    }
+    snapshot_file.save_snapshot_file(sections, path)
+    monkeypatch.setattr(country_metadata, "_metadata", None)
+
+    loaded = snapshot_file.load_snapshot_file(path)
+
+    assert set(loaded) == set(sections)
+    built_at, fields = loaded["world_bank"]
+    assert built_at == 1700000000.0
+    restored = fields["indicator_store"]
+    assert restored.countries == store.countries and restored.indicators == store.indicators
+    assert restored.years.tolist() == [2022, 2023]
+    np.testing.assert_array_equal(restored.values, store.values)
+    assert restored.value("Ukraine", "women_in_parliament") == 20.8
+    assert fields["country_data"] == store.to_country_data()
+    assert fields["quick_overview_metrics"] == sections["world_bank"][1]["quick_overview_metrics"]
+
+    aggregates = loaded["country_groups"][1]["group_aggregates"]
+    original = make_group_aggregates()
+    assert aggregates.groups_of("POL") == ["EU27"]
+    assert aggregates.summary("EU27", "women_in_parliament") == original.summary("EU27", "women_in_parliament")
+    assert aggregates.series("EU27", "women_in_parliament", "median") == original.series("EU27", "women_in_parliament", "median")
+    assert loaded["research"][1] == sections["research"][1]
+
+    # The country metadata saved with the sections is installed again
+    assert country_metadata.peek_metadata().neighbors("UA") == ["POL"]
+
+
+def test_missing_or_foreign_files_are_ignored(tmp_path):
+    assert snapshot_file.load_snapshot_file(str(tmp_path / "missing.snapshot")) is None
+    foreign = tmp_path / "foreign.snapshot"
+    foreign.write_bytes(b"not a snapshot at all")
+    assert snapshot_file.load_snapshot_file(str(foreign)) is None
+
+
+def test_other_format_versions_are_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "dashboard.snapshot")
+    monkeypatch.setattr(country_metadata, "_metadata", None)
+    snapshot_file.save_snapshot_file({"research": (1.0, {"research_papers": []})}, path)
+    monkeypatch.setattr(snapshot_file, "SNAPSHOT_FORMAT_VERSION", snapshot_file.SNAPSHOT_FORMAT_VERSION + 1)
+    assert snapshot_file.load_snapshot_file(path) is None
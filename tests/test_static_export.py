@@ -0,0 +1,57 @@
+import os
+
+from serving.static_export import StaticExport
+
+
+def make_export(tmp_path):
+    static_dir, template_dir = tmp_path / "static", tmp_path / "templates"
+    for directory in (static_dir, template_dir):
+        directory.mkdir(exist_ok=True)
+    if not (template_dir / "page.html").exists():
+        (static_dir / "style.css").write_text("body {}")
+        (template_dir / "page.html").write_text("{{ content }}")
+    export = StaticExport(str(tmp_path / "out"), str(static_dir), str(template_dir))
+    export.copy_assets()
+    return export
+
+
+def run_export(tmp_path, versions):
+    """Export one file per section and an index depending on every section, like the freeze command."""
+    export = make_export(tmp_path)
+    for section, version in versions.items():
+        export.export(f"sections/{section}.json", version, lambda section=section: f"{section} {versions[section]}")
+    export.export("index.html", tuple(sorted(versions.items())), lambda: "index")
+    export.save_manifest()
+    return export
+
+
+def test_unchanged_export_rewrites_nothing(tmp_path):
+    first = run_export(tmp_path, {"overview": 1, "research": 1})
+    assert sorted(first.rendered) == ["index.html", "sections/overview.json", "sections/research.json"]
+    assert first.assets_copied == 1
+
+    second = run_export(tmp_path, {"overview": 1, "research": 1})
+    assert second.rendered == []
+    assert len(second.unchanged) == 3
+    assert second.assets_copied == 0
+
+
+def test_changed_section_rewrites_only_its_dependents(tmp_path):
+    run_export(tmp_path, {"overview": 1, "research": 1})
+    export = run_export(tmp_path, {"overview": 1, "research": 2})
+    assert sorted(export.rendered) == ["index.html", "sections/research.json"]
+    assert export.unchanged == ["sections/overview.json"]
+    assert (tmp_path / "out" / "sections" / "research.json").read_text() == "research 2"
+
+
+def test_changed_templates_rewrite_every_page(tmp_path):
+    run_export(tmp_path, {"overview": 1})
+    (tmp_path / "templates" / "page.html").write_text("<p>{{ content }}</p>")
+    export = run_export(tmp_path, {"overview": 1})
+    assert sorted(export.rendered) == ["index.html", "sections/overview.json"]
+
+
+def test_deleted_file_is_exported_again(tmp_path):
+    run_export(tmp_path, {"overview": 1})
+    os.remove(tmp_path / "out" / "index.html")
+    assert run_export(tmp_path, {"overview": 1}).rendered == ["index.html"]